@@ -0,0 +1,145 @@
+"""
+Running income accounts of the tracker.
+Every drop or consumption is booked once into the account of the current map and the
+account of the whole session, per item and per item category, both before and after the
+exchange tax. Booking is O(1), so totals never need to be summed up again from the item
+lists, and switching the tax setting just reads the other column.
+
+Items are booked at the price in effect when they dropped. Each account also keeps what
+its items are worth at the latest known price; when a price changes, only that item's
+holdings are revalued.
+"""
+
+import threading
+
+from item_table import CATEGORY_NAMES, OTHER
+
+class Account:
+    """Per-item, per-category and total amounts and values of one map or of the session"""
+
+    def __init__(self):
+        self.amounts = {}       # item_id -> net amount
+        self.values = {}        # item_id -> value when booked, before tax
+        self.taxed_values = {}  # item_id -> value when booked, after tax
+        self.categories = {}    # category bit -> [gains, consumption, gains taxed, consumption taxed]
+        self.gains = 0.0
+        self.consumption = 0.0
+        self.gains_taxed = 0.0
+        self.consumption_taxed = 0.0
+        self.market_value = 0.0  # holdings at the latest known prices, before tax
+
+    def book(self, item_id, amount, value, taxed_value, category, market_value):
+        self.amounts[item_id] = self.amounts.get(item_id, 0) + amount
+        self.values[item_id] = self.values.get(item_id, 0) + value
+        self.taxed_values[item_id] = self.taxed_values.get(item_id, 0) + taxed_value
+        totals = self.categories.get(category)
+        if totals is None:
+            totals = self.categories[category] = [0.0, 0.0, 0.0, 0.0]
+        if amount > 0:
+            self.gains += value
+            self.gains_taxed += taxed_value
+            totals[0] += value
+            totals[2] += taxed_value
+        else:
+            self.consumption -= value
+            self.consumption_taxed -= taxed_value
+            totals[1] -= value
+            totals[3] -= taxed_value
+        self.market_value += market_value
+
+    def income(self, taxed=False):
+        if taxed:
+            return self.gains_taxed - self.consumption_taxed
+        return self.gains - self.consumption
+
+    def item_values(self, taxed=False):
+        return self.taxed_values if taxed else self.values
+
+    def category_totals(self, taxed=False):
+        """{category name: (gains, consumption)}"""
+        offset = 2 if taxed else 0
+        return {CATEGORY_NAMES.get(category, CATEGORY_NAMES[OTHER]): (totals[offset], totals[offset + 1])
+                for category, totals in self.categories.items()}
+
+    def to_dict(self):
+        return {
+            "amounts": dict(self.amounts),
+            "values": dict(self.values),
+            "taxed_values": dict(self.taxed_values),
+            "categories": {str(category): list(totals) for category, totals in self.categories.items()},
+            "gains": self.gains,
+            "consumption": self.consumption,
+            "gains_taxed": self.gains_taxed,
+            "consumption_taxed": self.consumption_taxed,
+            "market_value": self.market_value,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        account = cls()
+        account.amounts = dict(data["amounts"])
+        account.values = dict(data["values"])
+        account.taxed_values = dict(data["taxed_values"])
+        account.categories = {int(category): list(totals) for category, totals in data["categories"].items()}
+        account.gains = data["gains"]
+        account.consumption = data["consumption"]
+        account.gains_taxed = data["gains_taxed"]
+        account.consumption_taxed = data["consumption_taxed"]
+        account.market_value = data["market_value"]
+        return account
+
+class Ledger:
+    """The current map's account and the session account, booked together"""
+
+    def __init__(self, tax_rate, untaxed_ids=()):
+        self.tax_rate = tax_rate
+        self.untaxed_ids = frozenset(untaxed_ids)
+        self.map = Account()
+        self.session = Account()
+        self.marks = {}  # item_id -> latest known price, before tax
+        self._lock = threading.Lock()
+
+    def book(self, item_id, amount, price, category=OTHER):
+        """Book amount (negative for consumption) of an item at its price before tax"""
+        value = amount * price
+        taxed_value = value if item_id in self.untaxed_ids else value * self.tax_rate
+        with self._lock:
+            mark = self.marks.setdefault(item_id, price)
+            market_value = amount * mark
+            self.map.book(item_id, amount, value, taxed_value, category, market_value)
+            self.session.book(item_id, amount, value, taxed_value, category, market_value)
+
+    def reprice(self, item_id, price):
+        """Revalue the holdings of one item at a new price"""
+        with self._lock:
+            mark = self.marks.get(item_id)
+            if mark is None or mark == price:
+                return
+            self.marks[item_id] = price
+            change = price - mark
+            for account in (self.map, self.session):
+                amount = account.amounts.get(item_id)
+                if amount:
+                    account.market_value += amount * change
+
+    def market_value(self, account, taxed=False):
+        """What the holdings of an account are worth at the latest known prices"""
+        with self._lock:
+            if not taxed:
+                return account.market_value
+            untaxed = sum(account.amounts.get(item_id, 0) * self.marks.get(item_id, 0) for item_id in self.untaxed_ids)
+            return account.market_value * self.tax_rate + untaxed * (1 - self.tax_rate)
+
+    def start_map(self):
+        with self._lock:
+            self.map = Account()
+
+    def to_dict(self):
+        with self._lock:
+            return {"map": self.map.to_dict(), "session": self.session.to_dict(), "marks": dict(self.marks)}
+
+    def restore(self, data):
+        with self._lock:
+            self.map = Account.from_dict(data["map"])
+            self.session = Account.from_dict(data["session"])
+            self.marks = dict(data["marks"])
@@ -0,0 +1,216 @@
+"""
+Analytics over the session history in sessions.db.
+Map runs and item deltas are loaded once into columnar NumPy arrays and every query is a
+handful of vectorized aggregations (bincount, cumsum, searchsorted) over them, so reports
+over tens of thousands of map runs come back interactively. Each query is a plain
+function returning dicts, and the same queries are available from the command line.
+Values are before tax, whatever the tax setting was when a session was recorded; rows
+from versions that did not keep the price before tax count at the price they were stored with.
+
+Usage:
+    python analytics.py {maps,rate,items,types,consumption} [--db sessions.db] [--session N]
+                        [--days D] [--window SECONDS] [--limit N] [--table full_table.json] [--json]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+import numpy as np
+
+from item_catalog import ItemCatalog, FULL_TABLE_PATH
+from item_table import category_name
+from session_store import DB_PATH
+
+class History:
+    """Columnar copy of the finished map runs and the item deltas recorded in them"""
+
+    def __init__(self, runs, deltas):
+        # One entry per map run, ordered by the time the map was entered
+        run_ids, session_ids, map_index, scenes, entered, exited, duration = zip(*runs) if runs else ((),) * 7
+        self.run_ids = np.array(run_ids, dtype=np.int64)
+        self.session_ids = np.array(session_ids, dtype=np.int64)
+        self.map_index = np.array(map_index, dtype=np.int64)
+        self.scenes = list(scenes)
+        self.entered = np.array(entered, dtype=np.float64)
+        self.exited = np.array(exited, dtype=np.float64)
+        self.duration = np.array(duration, dtype=np.float64)
+
+        # One entry per item delta, with the position of its run in the arrays above;
+        # every column is numeric (ConfigBaseIds are digits) so they load as one 2-D array
+        columns = np.array(deltas, dtype=np.float64).reshape(-1, 4)
+        delta_runs = columns[:, 0].astype(np.int64)
+        item_ids, self.delta_items = np.unique(columns[:, 1].astype(np.int64), return_inverse=True)
+        self.item_ids = item_ids.astype(str)
+        self.amount = columns[:, 2]
+        self.price = columns[:, 3]
+        self.value = self.amount * self.price
+        order = np.argsort(self.run_ids)
+        self.delta_run = order[np.searchsorted(self.run_ids, delta_runs, sorter=order)] if len(order) else delta_runs
+
+    def __len__(self):
+        return len(self.run_ids)
+
+def load_history(db_path=DB_PATH, session_id=None, since=None):
+    """Finished map runs (optionally of one session or entered after `since`) and their item deltas"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        where = ["r.exited IS NOT NULL"]
+        params = []
+        if session_id is not None:
+            where.append("r.session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            where.append("r.entered >= ?")
+            params.append(since)
+        condition = " AND ".join(where)
+        runs = conn.execute(f"SELECT r.id, r.session_id, r.map_index, r.scene, r.entered, r.exited, r.duration "
+                            f"FROM map_runs r WHERE {condition} ORDER BY r.entered", params).fetchall()
+        # A database no tracker with raw_price has written to yet only has the stored price
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(item_deltas)")}
+        price = "COALESCE(d.raw_price, d.price)" if "raw_price" in columns else "d.price"
+        # Scanning the deltas in insertion order and looking up their run beats one index search per run
+        deltas = conn.execute(f"SELECT d.run_id, CAST(d.item_id AS INTEGER), d.amount, {price} FROM item_deltas d "
+                              f"JOIN map_runs r ON r.id = d.run_id WHERE {condition}", params).fetchall()
+    finally:
+        conn.close()
+    return History(runs, deltas)
+
+def _per_run(history, weights):
+    return np.bincount(history.delta_run, weights=weights, minlength=len(history))
+
+def map_profit(history):
+    """Gains, consumption cost, profit and profit per hour of every map run"""
+    gains = _per_run(history, np.where(history.value > 0, history.value, 0))
+    costs = _per_run(history, np.where(history.value < 0, -history.value, 0))
+    profit = gains - costs
+    hours = np.maximum(history.duration, 1) / 3600
+    per_hour = profit / hours
+    return [{"run": int(history.run_ids[i]), "session": int(history.session_ids[i]),
+             "map": int(history.map_index[i]), "scene": history.scenes[i],
+             "entered": float(history.entered[i]), "duration": float(history.duration[i]),
+             "gains": float(gains[i]), "cost": float(costs[i]), "profit": float(profit[i]),
+             "per_hour": float(per_hour[i])} for i in range(len(history))]
+
+def rolling_profit_per_hour(history, window=3600.0):
+    """Profit per hour of map time over the runs that ended within `window` seconds of each run's end"""
+    if not len(history):
+        return []
+    profit = _per_run(history, history.value)
+    order = np.argsort(history.exited)
+    exited = history.exited[order]
+    profit_sum = np.concatenate(([0], np.cumsum(profit[order])))
+    time_sum = np.concatenate(([0], np.cumsum(history.duration[order])))
+    end = np.arange(1, len(exited) + 1)
+    start = np.searchsorted(exited, exited - window, side="right")
+    window_profit = profit_sum[end] - profit_sum[start]
+    window_hours = np.maximum(time_sum[end] - time_sum[start], 1) / 3600
+    rate = window_profit / window_hours
+    return [{"time": float(exited[i]), "runs": int(end[i] - start[i]),
+             "profit": float(window_profit[i]), "per_hour": float(rate[i])} for i in range(len(exited))]
+
+def _distribution(history, groups, group_count, drops_only=True):
+    """Per-group totals, value, number of runs seen in, and per-run mean and spread"""
+    mask = history.amount > 0 if drops_only else history.amount < 0
+    runs = max(len(history), 1)
+    # Sum per (run, group) cell; only cells that occur are kept, runs x items would not fit
+    cells, cell_index = np.unique(history.delta_run[mask].astype(np.int64) * group_count + groups[mask],
+                                  return_inverse=True)
+    cell_amount = np.bincount(cell_index, weights=np.abs(history.amount[mask]), minlength=len(cells))
+    cell_group = cells % group_count if group_count else cells
+    total = np.bincount(cell_group, weights=cell_amount, minlength=group_count)
+    seen = np.bincount(cell_group, minlength=group_count)
+    value = np.bincount(groups[mask], weights=np.abs(history.value[mask]), minlength=group_count)
+    # Runs where a group did not show up count as zero
+    mean = total / runs
+    squares = np.bincount(cell_group, weights=cell_amount ** 2, minlength=group_count)
+    std = np.sqrt(np.maximum(squares / runs - mean ** 2, 0))
+    return total, value, seen, mean, std
+
+def item_distribution(history, catalog=None):
+    """How much of every item dropped: total, value, per-map mean and spread, and share of maps it dropped in"""
+    total, value, seen, mean, std = _distribution(history, history.delta_items, len(history.item_ids))
+    runs = max(len(history), 1)
+    rows = [{"item": str(item_id), "name": catalog.name(item_id, str(item_id)) if catalog else str(item_id),
+             "total": float(total[i]), "value": float(value[i]), "per_map": float(mean[i]),
+             "per_map_std": float(std[i]), "drop_rate": float(seen[i] / runs)}
+            for i, item_id in enumerate(history.item_ids) if total[i]]
+    return sorted(rows, key=lambda row: -row["value"])
+
+def type_distribution(history, catalog):
+    """item_distribution() summed per item category"""
+    # Normalized categories, so "Memory Glow" and "Memory Fluorescence" are one row
+    types, item_types = np.unique(np.array([category_name(catalog.type(item_id))
+                                            for item_id in history.item_ids], dtype=str), return_inverse=True)
+    groups = item_types[history.delta_items] if len(history.item_ids) else history.delta_items
+    total, value, seen, mean, std = _distribution(history, groups, len(types))
+    runs = max(len(history), 1)
+    rows = [{"type": str(name), "total": float(total[i]), "value": float(value[i]), "per_map": float(mean[i]),
+             "per_map_std": float(std[i]), "drop_rate": float(seen[i] / runs)}
+            for i, name in enumerate(types) if total[i]]
+    return sorted(rows, key=lambda row: -row["value"])
+
+def consumption_cost(history, catalog=None):
+    """What was used up in maps: cost per item and the average cost per map"""
+    total, value, seen, mean, std = _distribution(history, history.delta_items, len(history.item_ids),
+                                                  drops_only=False)
+    runs = max(len(history), 1)
+    rows = [{"item": str(item_id), "name": catalog.name(item_id, str(item_id)) if catalog else str(item_id),
+             "used": float(total[i]), "cost": float(value[i]), "cost_per_map": float(value[i] / runs),
+             "maps_used_in": int(seen[i])}
+            for i, item_id in enumerate(history.item_ids) if total[i]]
+    return sorted(rows, key=lambda row: -row["cost"])
+
+def print_rows(rows, columns, limit=None):
+    if limit:
+        rows = rows[:limit]
+    print("  ".join(f"{name:>12}" for name in columns))
+    for row in rows:
+        cells = []
+        for name in columns:
+            cell = row[name]
+            cells.append(f"{round(cell, 2):>12}" if isinstance(cell, float) else f"{str(cell)[:12]:>12}")
+        print("  ".join(cells))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query the session history recorded in sessions.db")
+    parser.add_argument("query", choices=["maps", "rate", "items", "types", "consumption"])
+    parser.add_argument("--db", default=DB_PATH, help="session database")
+    parser.add_argument("--session", type=int, help="only this session")
+    parser.add_argument("--days", type=float, help="only map runs from the last DAYS days")
+    parser.add_argument("--window", type=float, default=3600.0, help="rolling window in seconds for 'rate'")
+    parser.add_argument("--limit", type=int, help="show at most this many rows")
+    parser.add_argument("--table", default=FULL_TABLE_PATH, help="item table with names and types")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        # The tracker creates the database with the first session it records
+        print(f"No session history yet: {args.db} does not exist. Run the tracker to record some map runs.")
+        return
+
+    since = time.time() - args.days * 86400 if args.days else None
+    history = load_history(args.db, session_id=args.session, since=since)
+    catalog = ItemCatalog(args.table, autosave=False)
+
+    if args.query == "maps":
+        rows, columns = map_profit(history), ["run", "map", "duration", "gains", "cost", "profit", "per_hour"]
+    elif args.query == "rate":
+        rows, columns = rolling_profit_per_hour(history, args.window), ["runs", "profit", "per_hour"]
+    elif args.query == "items":
+        rows, columns = item_distribution(history, catalog), ["name", "total", "value", "per_map", "per_map_std", "drop_rate"]
+    elif args.query == "types":
+        rows, columns = type_distribution(history, catalog), ["type", "total", "value", "per_map", "per_map_std", "drop_rate"]
+    else:
+        rows, columns = consumption_cost(history, catalog), ["name", "used", "cost", "cost_per_map", "maps_used_in"]
+
+    if args.json:
+        print(json.dumps(rows[:args.limit] if args.limit else rows, indent=4, ensure_ascii=False))
+    else:
+        print(f"{len(history)} map runs")
+        print_rows(rows, columns, args.limit)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Startup bag reconstruction from the existing UE_game.log.
+The game writes a full BagMgr@:InitBagData dump on login and on every bag sort, so the
+current inventory is usually already in the log. The log is memory-mapped, the last dump
+is found by searching backwards from the end, and the bag and scene lines after it are
+replayed into the tracker, so tracking starts right away without sorting the bag first.
+Only the region from the last dump to the end is touched, in bounded blocks.
+
+A dump is written within one frame, so all of its lines carry the timestamp of its last line.
+The last dump starts at the earliest InitBagData line with that timestamp, but not before the
+last login marker or bag change before it, nor at a slot that is listed again, so two dumps
+written shortly after each other are not taken for one whatever order the slots come in.
+"""
+
+import mmap
+import os
+import re
+
+from log_parser import LOGIN_MARKERS, LogParser, filter_lines
+from log_tailer import BLOCK_SIZE, open_shared
+
+DUMP_MARKER = b"BagMgr@:InitBagData"
+MODIFY_MARKER = b"BagMgr@:Modfy"
+LOGIN_MARKER_BYTES = tuple(marker.encode() for marker in LOGIN_MARKERS)
+# A dump is written in one burst; entries further apart than this are not searched for
+DUMP_GAP = 64 * 1024
+REBUILD_MARKERS = (b"BagMgr@:", b"PageApplyBase@")
+SLOT_PATTERN = re.compile(rb"PageId = (\d+) SlotId = (\d+)")
+
+def line_time(mm, start):
+    """The [timestamp] a log line starts with, or None"""
+    if mm[start:start + 1] != b"[":
+        return None
+    close = mm.find(b"]", start, start + 64)
+    return mm[start:close + 1] if close > 0 else None
+
+def find_last_bag_dump(mm, end):
+    """Offset of the line starting the last InitBagData dump before end, or -1"""
+    pos = mm.rfind(DUMP_MARKER, 0, end)
+    if pos < 0:
+        return -1
+    # Nothing before the login that wrote the dump belongs to it
+    login = max(mm.rfind(marker, 0, pos) for marker in LOGIN_MARKER_BYTES)
+    first = mm.rfind(b"\n", 0, pos) + 1
+    stamp = line_time(mm, first)
+    seen = set()
+    while True:
+        # SLOT_PATTERN never spans lines, and end follows a newline
+        match = SLOT_PATTERN.search(mm, pos, mm.find(b"\n", pos, end))
+        seen.add(match.groups() if match else None)
+        previous = mm.rfind(DUMP_MARKER, max(pos - DUMP_GAP, login + 1), first)
+        if previous < 0 or mm.find(MODIFY_MARKER, previous, first) >= 0:
+            return first
+        start = mm.rfind(b"\n", 0, previous) + 1
+        match = SLOT_PATTERN.search(mm, previous, mm.find(b"\n", previous, end))
+        if line_time(mm, start) != stamp or (match.groups() if match else None) in seen:
+            # Written in another frame, or listed again: this entry ends an earlier dump
+            return first
+        pos, first = previous, start
+
+def iter_events(mm, start, end, block_size=BLOCK_SIZE):
+    """Bag and scene events of the complete lines between start and end, one block at a time"""
+    parser = LogParser()
+    while start < end:
+        cut = mm.rfind(b"\n", start, min(start + block_size, end)) + 1
+        if cut <= start:
+            # A single line longer than the block
+            cut = mm.find(b"\n", start, end) + 1 or end
+        text = filter_lines(mm[start:cut], REBUILD_MARKERS).decode("utf-8", errors="replace")
+        yield from parser.tokenize(text)
+        start = cut
+
+def rebuild_from_log(path, tracker, block_size=BLOCK_SIZE):
+    """Rebuild the tracker's bag from the last dump in the log.
+    Returns (inode, offset) of the first byte not replayed, or None if the log has no usable dump."""
+    try:
+        f = open_shared(path)
+    except OSError as e:
+        print(f"Could not open {path} to rebuild the bag: {e}")
+        return None
+    try:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # Only complete lines, a line still being written is left to the tailer
+            end = mm.rfind(b"\n") + 1
+            start = find_last_bag_dump(mm, end)
+            if start < 0:
+                print("No bag dump in the log, sort the bag to initialize")
+                return None
+            if not tracker.rebuild(iter_events(mm, start, end, block_size)):
+                return None
+            return st.st_ino, end
+    finally:
+        f.close()
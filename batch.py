@@ -0,0 +1,183 @@
+"""
+Batch analysis of many archived UE_game.log files.
+Every log is replayed in its own worker process through the same tracking code as
+replay.py (bag diffs and map segmentation), streaming the file block by block. A worker
+only sends back a small per-log summary, which is merged into per-account and overall
+profit and drop statistics as soon as it arrives, so memory does not grow with the logs.
+
+The account of a log is the first directory below the given folder, e.g.
+    archive/alice/2024-05-01/UE_game.log -> alice
+and the file name for logs directly in the folder.
+
+Usage:
+    python batch.py path/to/archive [--jobs N] [--pattern *.log] [--table full_table.json] [--tax] [--json]
+"""
+
+import argparse
+import fnmatch
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from item_catalog import ItemCatalog, FULL_TABLE_PATH
+from replay import replay
+
+def find_logs(root, pattern="*.log"):
+    """(account, path) of every log below root, largest first so the big ones do not finish last"""
+    if os.path.isfile(root):
+        return [(os.path.splitext(os.path.basename(root))[0], root)]
+    logs = []
+    for folder, _, files in os.walk(root):
+        for name in files:
+            if fnmatch.fnmatch(name, pattern):
+                path = os.path.join(folder, name)
+                logs.append((account_of(root, path), path))
+    logs.sort(key=lambda log: -os.path.getsize(log[1]))
+    return logs
+
+def account_of(root, path):
+    parts = os.path.relpath(path, root).split(os.sep)
+    return parts[0] if len(parts) > 1 else os.path.splitext(parts[0])[0]
+
+def analyze_log(account, path, table_path=FULL_TABLE_PATH, tax=False):
+    """Replay one log and summarize it; runs in a worker process"""
+    try:
+        tracker, maps, stats = replay(path, table_path, tax=tax)
+    except Exception as e:
+        return {"account": account, "path": path, "error": str(e)}
+    drops = {}
+    consumption = {}
+    value = {}
+    for item_id, amount in tracker.drop_list_all.items():
+        if amount > 0:
+            drops[item_id] = amount
+        elif amount < 0:
+            consumption[item_id] = -amount
+        value[item_id] = tracker.drop_value_all.get(item_id, 0)
+    return {
+        "account": account,
+        "path": path,
+        "map_count": tracker.map_count,
+        "income": tracker.income_all,
+        "map_income": [record["income"] for record in maps],
+        "drops": drops,
+        "consumption": consumption,
+        "value": value,
+        "bytes": stats["bytes"],
+        "seconds": stats["seconds"],
+    }
+
+class Totals:
+    """Running profit and drop statistics over any number of log summaries"""
+
+    def __init__(self):
+        self.logs = 0
+        self.errors = 0
+        self.map_count = 0
+        self.income = 0.0
+        self.best_map = None
+        self.drops = {}
+        self.consumption = {}
+        self.value = {}
+        self.bytes = 0
+
+    def add(self, summary):
+        if "error" in summary:
+            self.errors += 1
+            return
+        self.logs += 1
+        self.map_count += summary["map_count"]
+        self.income += summary["income"]
+        if summary["map_income"]:
+            best = max(summary["map_income"])
+            self.best_map = best if self.best_map is None else max(self.best_map, best)
+        self.bytes += summary["bytes"]
+        for field in ("drops", "consumption", "value"):
+            totals = getattr(self, field)
+            for item_id, amount in summary[field].items():
+                totals[item_id] = totals.get(item_id, 0) + amount
+
+    def as_dict(self):
+        return {
+            "logs": self.logs,
+            "errors": self.errors,
+            "map_count": self.map_count,
+            "income": round(self.income, 4),
+            "income_per_map": round(self.income / self.map_count, 4) if self.map_count else 0,
+            "best_map": self.best_map,
+            "drops": self.drops,
+            "consumption": self.consumption,
+            "value": {item_id: round(amount, 4) for item_id, amount in self.value.items()},
+        }
+
+def analyze(logs, table_path=FULL_TABLE_PATH, tax=False, jobs=None, on_result=None):
+    """Replay logs ([(account, path)]) across a process pool, returns (per-account Totals, overall Totals).
+    on_result(summary) is called in this process for every log as it finishes."""
+    accounts = {}
+    overall = Totals()
+    jobs = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=min(jobs, max(len(logs), 1))) as pool:
+        futures = [pool.submit(analyze_log, account, path, table_path, tax) for account, path in logs]
+        for future in as_completed(futures):
+            summary = future.result()
+            accounts.setdefault(summary["account"], Totals()).add(summary)
+            overall.add(summary)
+            if on_result:
+                on_result(summary)
+    return accounts, overall
+
+def print_totals(title, totals, catalog):
+    print(f"=== {title}: {totals.logs} logs, {totals.map_count} maps, income {round(totals.income, 2)}"
+          f" ({round(totals.income / totals.map_count, 2) if totals.map_count else 0} per map,"
+          f" best {round(totals.best_map or 0, 2)}) ===")
+    top = sorted(totals.drops, key=lambda item_id: -totals.value.get(item_id, 0))[:10]
+    for item_id in top:
+        print(f"  + {catalog.name(item_id, item_id)} x{totals.drops[item_id]} [{round(totals.value.get(item_id, 0), 2)}]")
+    if totals.errors:
+        print(f"  {totals.errors} logs could not be read")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a folder of UE_game.log files in parallel and report per-account and overall income")
+    parser.add_argument("root", help="folder with the archived logs (one sub-folder per account), or a single log")
+    parser.add_argument("--pattern", default="*.log", help="file name pattern of the logs")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--table", default=FULL_TABLE_PATH, help="item table with names and prices")
+    parser.add_argument("--tax", action="store_true", help="value items after the exchange tax")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    args = parser.parse_args(argv)
+
+    logs = find_logs(args.root, args.pattern)
+    if not logs:
+        print(f"No logs matching {args.pattern} in {args.root}")
+        return
+
+    start = time.perf_counter()
+
+    def progress(summary):
+        if "error" in summary:
+            print(f"{summary['path']}: {summary['error']}", file=sys.stderr)
+        else:
+            print(f"{summary['path']}: {summary['map_count']} maps, income {round(summary['income'], 2)} "
+                  f"({round(summary['seconds'], 2)}s)", file=sys.stderr)
+
+    accounts, overall = analyze(logs, args.table, args.tax, args.jobs, on_result=progress)
+    seconds = time.perf_counter() - start
+
+    if args.json:
+        print(json.dumps({"accounts": {name: totals.as_dict() for name, totals in sorted(accounts.items())},
+                          "total": overall.as_dict(), "seconds": seconds}, indent=4, ensure_ascii=False))
+        return
+    catalog = ItemCatalog(args.table, autosave=False)
+    for name, totals in sorted(accounts.items()):
+        print_totals(name, totals, catalog)
+    print_totals("Total", overall, catalog)
+    mb = overall.bytes / (1024 * 1024)
+    print(f"Analyzed {overall.logs} logs ({round(mb, 2)} MB) in {round(seconds, 2)}s ({round(mb / max(seconds, 1e-9), 2)} MB/s)")
+
+if __name__ == "__main__":
+    # Needed for the worker processes of a frozen build on Windows
+    multiprocessing.freeze_support()
+    main()
@@ -0,0 +1,165 @@
+"""
+Benchmarks for the tracker's hot paths: tokenizing log chunks, the per-tick pipeline
+(map detection, bag diff, drop processing, price parsing) and building the drop view.
+Input comes from the synthetic log generator, so runs are repeatable. Every case reports
+throughput (lines/s, MB/s), per-call latency (p50/p99) and peak traced memory.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--quick] [--json] [--output bench_output.txt]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The trackers are set up like the tests set them up
+sys.path.insert(0, os.path.join(ROOT, "tests"))
+
+from helpers import new_tracker
+
+from drop_view import build_drop_rows
+from item_table import ALL
+from log_parser import LogParser, parse_log
+from synthetic_log import SyntheticLog
+
+def initialized_tracker(log):
+    """Tracker whose bag was initialized from the generator's current bag"""
+    tracker = new_tracker()
+    tracker.start_initialization()
+    tracker.process(parse_log("".join(log.init_dump())))
+    return tracker
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+def measure(name, param, setup):
+    """Run setup() -> (func, inputs) twice: once timed, once under tracemalloc for the peak"""
+    latencies = []
+    # The tracker reports every drop on stdout, keep that out of the timings and the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        func, inputs = setup()
+        text_bytes = sum(len(x.encode("utf-8")) for x in inputs if isinstance(x, str))
+        lines = sum(x.count("\n") for x in inputs if isinstance(x, str))
+        start = time.perf_counter()
+        for item in inputs:
+            t0 = time.perf_counter()
+            func(item)
+            latencies.append(time.perf_counter() - t0)
+        elapsed = max(time.perf_counter() - start, 1e-9)
+
+        func, inputs = setup()
+        tracemalloc.start()
+        for item in inputs:
+            func(item)
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {
+        "name": name,
+        "param": param,
+        "calls": len(inputs),
+        "lines_per_s": lines / elapsed if lines else None,
+        "mb_per_s": text_bytes / elapsed / (1024 * 1024) if text_bytes else None,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_kb": peak / 1024,
+    }
+
+def chunk_of(size, seed=1):
+    """At least `size` bytes of synthetic log"""
+    log = SyntheticLog(seed=seed, price_pairs_per_tick=0.2)
+    parts = []
+    total = 0
+    while total < size:
+        text = log.tick()
+        parts.append(text)
+        total += len(text)
+    return "".join(parts)
+
+def bench_tokenizer(sizes):
+    for size in sizes:
+        chunk = chunk_of(size)
+        yield measure("tokenize", f"{size // 1024} KB chunk", lambda: (parse_log, [chunk] * 5))
+
+def bench_ticks(slot_counts, ticks):
+    for slots in slot_counts:
+        def setup(slots=slots):
+            log = SyntheticLog(seed=2, slots_per_page=slots // 2, modfy_per_tick=5, ticks_in_hideout=5, sort_every=0)
+            tracker = initialized_tracker(log)
+            inputs = list(log.ticks(ticks))
+            parser = LogParser()
+            return (lambda text: tracker.process(parser.parse(text))), inputs
+        yield measure("tick pipeline", f"{slots} slots", setup)
+
+def bench_bag_sort(slot_counts):
+    for slots in slot_counts:
+        def setup(slots=slots):
+            log = SyntheticLog(seed=3, slots_per_page=slots // 2, sort_every=0)
+            tracker = initialized_tracker(log)
+            tracker.process(parse_log(log.scene_change("/Game/Art/Maps/02KD/KD.KD")))
+            bursts = [parse_log("".join(log.modfy_burst(slots))) for _ in range(5)]
+            return tracker.detect_bag_changes, bursts
+        yield measure("detect_bag_changes", f"{slots}-line Modfy burst", setup)
+
+def bench_prices(pair_counts):
+    for pairs in pair_counts:
+        def setup(pairs=pairs):
+            log = SyntheticLog(seed=4)
+            chunks = ["".join(line for _ in range(pairs) for line in log.price_pair()) for _ in range(5)]
+            tracker = new_tracker()
+            return (lambda text: tracker.get_price_info(parse_log(text))), chunks
+        yield measure("get_price_info", f"{pairs} searches/chunk", setup)
+
+def bench_drop_view(item_counts):
+    for count in item_counts:
+        def setup(count=count):
+            tracker = new_tracker()
+            drops = {item_id: n + 1 for n, item_id in enumerate(list(tracker.catalog.items)[:count])}
+            return (lambda _: build_drop_rows(drops, tracker, ALL)), [None] * 200
+        yield measure("drop view rows", f"{count} items", setup)
+
+def run(quick=False):
+    results = []
+    results += bench_tokenizer([64 * 1024, 1024 * 1024, (2 if quick else 8) * 1024 * 1024])
+    results += bench_ticks([120, 1200, 6000], 150 if quick else 600)
+    results += bench_bag_sort([120, 1200, 6000])
+    results += bench_prices([1, 10, 50])
+    results += bench_drop_view([10, 100, 240])
+    return results
+
+def format_results(results):
+    def fmt(value, digits=2):
+        return "-" if value is None else f"{value:,.{digits}f}"
+    header = f"{'benchmark':<20} {'case':<24} {'calls':>6} {'lines/s':>14} {'MB/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'peak KB':>10}"
+    rows = [header, "-" * len(header)]
+    for r in results:
+        rows.append(f"{r['name']:<20} {r['param']:<24} {r['calls']:>6} {fmt(r['lines_per_s'], 0):>14} "
+                    f"{fmt(r['mb_per_s']):>9} {fmt(r['p50_ms'], 3):>9} {fmt(r['p99_ms'], 3):>9} {fmt(r['peak_kb'], 1):>10}")
+    return "\n".join(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the tracker's parsing and accounting hot paths")
+    parser.add_argument("--quick", action="store_true", help="smaller inputs for a fast check")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    results = run(quick=args.quick)
+    report = json.dumps(results, indent=4) if args.json else format_results(results)
+    print(report)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+
+if __name__ == "__main__":
+    main()
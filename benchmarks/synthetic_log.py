@@ -0,0 +1,189 @@
+"""
+Synthetic UE_game.log generator for benchmarks and offline checks.
+Produces the lines the tracker reads (InitBagData dumps, Modfy bursts, map transitions and
+XchgSearchPrice send/receive pairs) mixed with unrelated game noise, one tick of log at a
+time, with every rate configurable.
+
+Usage:
+    python benchmarks/synthetic_log.py out.log --ticks 3600 [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from log_parser import HIDEOUT_SCENE
+
+PREFIX = "GameLog: Display: [Game] "
+MAP_SCENES = [
+    "/Game/Art/Maps/02KD/KD_YuanSuKuangDong000/KD_YuanSuKuangDong000.KD_YuanSuKuangDong000",
+    "/Game/Art/Maps/03SL/SL_ShenLinMiJing000/SL_ShenLinMiJing000.SL_ShenLinMiJing000",
+    "/Game/Art/Maps/04DC/DC_DiXiaCheng000/DC_DiXiaCheng000.DC_DiXiaCheng000",
+]
+NOISE = [
+    "LogNet: Verbose: NotifyAcceptingConnection accepted from: 127.0.0.1:51234",
+    "GameLog: Display: [Game] SkillMgr@:CastSkill SkillId = 10010 Target = 0",
+    "LogStreaming: Display: Flushing async loaders.",
+    "GameLog: Display: [Game] MonsterMgr@:OnMonsterDie MonsterId = 402113 DropCount = 2",
+    "LogAudio: Display: Audio Device changed",
+]
+
+class SyntheticLog:
+    """Stateful generator of game log text with a consistent bag"""
+
+    def __init__(self, seed=1, item_ids=None, pages=(102, 103), slots_per_page=60,
+                 noise_per_tick=40, modfy_per_tick=2, price_pairs_per_tick=0.05,
+                 price_values=60, ticks_per_map=120, ticks_in_hideout=20, sort_every=900,
+                 start=None):
+        self.random = random.Random(seed)
+        self.item_ids = item_ids or self._default_item_ids()
+        self.pages = pages
+        self.slots_per_page = slots_per_page
+        self.noise_per_tick = noise_per_tick
+        self.modfy_per_tick = modfy_per_tick
+        self.price_pairs_per_tick = price_pairs_per_tick
+        self.price_values = price_values
+        self.ticks_per_map = ticks_per_map
+        self.ticks_in_hideout = ticks_in_hideout
+        self.sort_every = sort_every
+        self.now = start or datetime(2025, 10, 22, 14, 0, 0)
+        self.frame = 0
+        self.syn_id = 1000
+        self.tick_count = 0
+        self.in_map = False
+        self.scene = HIDEOUT_SCENE
+        self.phase_ticks = 0
+        self.bag = {}
+        for page in pages:
+            for slot in range(slots_per_page):
+                self.bag[(page, slot)] = [self.random.choice(self.item_ids), self.random.randint(1, 500)]
+
+    @staticmethod
+    def _default_item_ids():
+        try:
+            from item_catalog import ItemCatalog
+            ids = list(ItemCatalog(os.path.join(ROOT, "full_table.json"), autosave=False).items.keys())
+            if ids:
+                return ids
+        except Exception:
+            pass
+        return ["100300", "100200", "5080", "5140", "200029", "1001", "1009", "1011"]
+
+    def stamp(self, ms=0):
+        moment = self.now + timedelta(milliseconds=ms)
+        self.frame = (self.frame + 1) % 1000
+        return f"[{moment.strftime('%Y.%m.%d-%H.%M.%S')}:{moment.microsecond // 1000:03d}][{self.frame:3d}]"
+
+    def line(self, text, ms=0):
+        return f"{self.stamp(ms)}{PREFIX}{text}\n"
+
+    def init_dump(self):
+        """Full InitBagData dump, as written after a bag sort"""
+        lines = []
+        for (page, slot), (item_id, num) in sorted(self.bag.items()):
+            lines.append(self.line(f"BagMgr@:InitBagData PageId = {page} SlotId = {slot} ConfigBaseId = {item_id} Num = {num}"))
+        return lines
+
+    def modfy(self):
+        """One slot modification: mostly pickups, sometimes consumption or a new stack"""
+        key = self.random.choice(list(self.bag))
+        item_id, num = self.bag[key]
+        roll = self.random.random()
+        if roll < 0.75:
+            num += self.random.randint(1, 20)
+        elif roll < 0.97:
+            num = max(num - self.random.randint(1, 5), 0)
+        else:
+            item_id, num = self.random.choice(self.item_ids), self.random.randint(1, 10)
+        self.bag[key] = [item_id, num]
+        page, slot = key
+        return self.line(f"BagMgr@:Modfy BagItem PageId = {page} SlotId = {slot} ConfigBaseId = {item_id} Num = {num}")
+
+    def modfy_burst(self, count):
+        return [self.modfy() for _ in range(count)]
+
+    def scene_change(self, next_scene):
+        line = self.line(f"PageApplyBase@ _UpdateGameEnd: LastSceneName = World'{self.scene}' NextSceneName = World'{next_scene}'")
+        self.scene = next_scene
+        return line
+
+    def price_pair(self, item_id=None, values=None):
+        """An XchgSearchPrice request and its response"""
+        item_id = item_id or self.random.choice(self.item_ids)
+        values = self.price_values if values is None else values
+        self.syn_id += 1
+        base = self.random.uniform(0.01, 500)
+        lines = [
+            self.line(f"----Socket SendMessage STT----XchgSearchPrice----SynId = {self.syn_id}"),
+            self.line(""),
+            f"+filter+0+refer [{item_id}]\n",
+            "----Socket SendMessage End----\n",
+            self.line(f"----Socket RecvMessage STT----XchgSearchPrice----SynId = {self.syn_id}", 80),
+            self.line("", 80),
+        ]
+        for n in range(values):
+            lines.append(f"+{n + 1} [{round(base * (1 + n * 0.01), 4)}]\n")
+        lines.append("----Socket RecvMessage End----\n")
+        return lines
+
+    def noise(self, count):
+        return [f"{self.stamp()}{self.random.choice(NOISE)}\n" for _ in range(count)]
+
+    def tick(self):
+        """Text the game writes in one second"""
+        lines = self.noise(self.noise_per_tick)
+        self.phase_ticks += 1
+        if self.in_map:
+            count = int(self.modfy_per_tick) + (self.random.random() < self.modfy_per_tick % 1)
+            lines += self.modfy_burst(count)
+            if self.phase_ticks >= self.ticks_per_map:
+                lines.append(self.scene_change(HIDEOUT_SCENE))
+                self.in_map = False
+                self.phase_ticks = 0
+        else:
+            if self.random.random() < self.price_pairs_per_tick:
+                lines += self.price_pair()
+            if self.phase_ticks >= self.ticks_in_hideout:
+                lines.append(self.scene_change(self.random.choice(MAP_SCENES)))
+                self.in_map = True
+                self.phase_ticks = 0
+        if self.sort_every and self.tick_count % self.sort_every == 0:
+            lines += self.init_dump()
+        self.tick_count += 1
+        self.now += timedelta(seconds=1)
+        return "".join(lines)
+
+    def ticks(self, count):
+        for _ in range(count):
+            yield self.tick()
+
+    def write(self, path, ticks):
+        """Write `ticks` seconds of log to path, returns the number of bytes written"""
+        size = 0
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            for text in self.ticks(ticks):
+                f.write(text)
+                size += len(text)
+        return size
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic UE_game.log")
+    parser.add_argument("output")
+    parser.add_argument("--ticks", type=int, default=3600, help="seconds of game time to generate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--noise", type=int, default=40, help="unrelated lines per second")
+    parser.add_argument("--modfy", type=float, default=2, help="Modfy lines per second in maps")
+    parser.add_argument("--prices", type=float, default=0.05, help="price searches per second in the hideout")
+    args = parser.parse_args(argv)
+    log = SyntheticLog(seed=args.seed, noise_per_tick=args.noise, modfy_per_tick=args.modfy,
+                       price_pairs_per_tick=args.prices)
+    size = log.write(args.output, args.ticks)
+    print(f"Wrote {args.ticks} ticks ({round(size / (1024 * 1024), 2)} MB) to {args.output}")
+
+if __name__ == "__main__":
+    main()
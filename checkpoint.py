@@ -0,0 +1,75 @@
+"""
+Crash-safe checkpoints of the tracking state.
+The bag, its baselines, the session counters, the open exchange block and the log byte
+offset they correspond to are written together as one JSON document, atomically and
+fsynced, a few seconds apart. On restart the tracker is restored from it and only the
+log written since the checkpoint is read, so there is no need to sort the bag again.
+"""
+
+import json
+import os
+import time
+
+CHECKPOINT_PATH = "checkpoint.json"
+CHECKPOINT_VERSION = 4
+
+class Checkpointer:
+    """Periodic snapshots of a Tracker and LogParser at a LogTailer position"""
+
+    def __init__(self, path=CHECKPOINT_PATH, interval=10.0):
+        self.path = path
+        self.interval = interval
+        self._last_save = 0
+        self._saved_offset = None
+
+    def load(self, log_path):
+        """Checkpoint taken on this log, or None if there is no usable one"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading checkpoint: {e}")
+            return None
+        if checkpoint.get("version") != CHECKPOINT_VERSION:
+            return None
+        if os.path.abspath(checkpoint["path"]) != os.path.abspath(log_path):
+            return None
+        return checkpoint
+
+    def save(self, tracker, parser, tailer, force=False):
+        """Write a checkpoint, at most once per interval unless forced or nothing was read since"""
+        offset = tailer.offset
+        now = time.monotonic()
+        if not force and (offset == self._saved_offset or now - self._last_save < self.interval):
+            return False
+        checkpoint = {
+            "version": CHECKPOINT_VERSION,
+            "time": time.time(),
+            "path": os.path.abspath(tailer.path),
+            "inode": tailer.inode,
+            "offset": offset,
+            "tracker": tracker.snapshot(),
+            "parser": parser.snapshot(),
+        }
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(checkpoint, f, ensure_ascii=False)
+                # The rename must never expose a file whose content is not on disk yet
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving checkpoint: {e}")
+            return False
+        self._saved_offset = offset
+        self._last_save = now
+        return True
+
+    @staticmethod
+    def restore(checkpoint, tracker, parser):
+        """Put a loaded checkpoint back into the tracker and parser"""
+        tracker.restore(checkpoint["tracker"])
+        parser.restore(checkpoint["parser"])
@@ -0,0 +1,59 @@
+"""
+Rows of the drop listbox, built without Tk so the redraw cost can be measured and
+reused outside the App window.
+"""
+
+from item_table import LISTED
+
+# Checkmark, Circle, X: price updated within 3 minutes, within 15 minutes, older
+STATUS = ["✔", "◯", "✘"]
+
+def price_status(last_update, now):
+    """Freshness marker for a price last updated at last_update"""
+    time_passed = now - last_update
+    if time_passed < 180:
+        return STATUS[0]
+    elif time_passed < 900:
+        return STATUS[1]
+    return STATUS[2]
+
+def build_drop_rows(drops, tracker, show_mask=LISTED, now=None, values=None, orderbooks=None):
+    """Listbox lines for the given {item_id: amount} drops, filtered to the categories in show_mask.
+    values ({item_id: value when dropped}) keeps past drops at their price; items missing from it
+    are valued at the current price. With an OrderbookCache, drops of items searched recently also
+    show what selling them now would bring. now defaults to the tracker's log clock, which
+    price updates and orderbooks are stamped with."""
+    if now is None:
+        now = tracker.now()
+    catalog = tracker.catalog
+    table = catalog.table
+    items = catalog.items
+    rows = []
+    for item_id, idx in table.select(drops.keys(), show_mask):
+        amount = drops[item_id]
+        entry = items.get(item_id)
+        status = price_status(entry.get("last_update", 0) if entry else 0, now)
+        if values is not None and item_id in values:
+            value = values[item_id]
+        else:
+            value = amount * tracker.item_price(item_id)
+        row = f"{status} {table.names[idx]} x{amount} [{round(value, 2)}]"
+        if orderbooks is not None and amount > 0:
+            sell_now = orderbooks.sell_now(item_id, amount, now)
+            if sell_now is not None:
+                row += f" ~{round(sell_now, 2)} now"
+        rows.append(row)
+    return rows
+
+def diff_rows(old, new):
+    """Smallest single splice turning old into new: (start, delete_count, rows_to_insert).
+    Unchanged rows at both ends are kept, so a count change or a new drop touches one line."""
+    limit = min(len(old), len(new))
+    start = 0
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    return start, end_old - start, new[start:end_new]
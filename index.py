@@ -5,15 +5,11 @@ scanning for a bag refresh (sort action) in the game logs, using BagMgr@:InitBag
 """
 
 import time
-from datetime import datetime
 import psutil
 import win32gui
 import win32process
-import win32api
-import tkinter
-from tkinter import messagebox, BitmapImage, Label, Button
+from tkinter import messagebox
 import threading
-import re
 import json
 from tkinter import *
 from tkinter.ttk import *
@@ -21,6 +17,20 @@ from tkinter import ttk
 import ctypes
 import requests as rq
 import os
+from bag_scan import rebuild_from_log
+from checkpoint import Checkpointer
+from drop_view import build_drop_rows, diff_rows, STATUS
+from item_catalog import get_catalog
+import item_table
+from log_tailer import LogTailer
+from log_parser import LogParser, filter_lines
+from price_submitter import PriceSubmitter
+from price_history import PriceHistory
+from price_sync import PriceSync
+from session_store import SessionStore
+from sinks import create_sinks
+from tracker import Tracker
+from ui_events import UiEventQueue
 
 server = "serverp.furtorch.heili.tech"
 
@@ -43,15 +53,15 @@ if not os.path.exists("translation_mapping.json"):
 
 config_data = {}
 
-# Track bag state and initialization status
-bag_state = {}
-bag_initialized = False
-first_scan = True
-
-# Initialize button state
-awaiting_initialization = False
-initialization_complete = False
-initialization_in_progress = False
+# Tracking core (bag state, map state and income), created in main()
+tracker = None
+# State changes posted by the log thread, drained by the window
+ui_events = UiEventQueue()
+submitter = None
+session_store = None
+sinks = []
+root = None
+position_log = "UE_game.log"
 
 # Global flag to stop background threads
 app_running = True
@@ -70,103 +80,12 @@ def save_translation_mapping(mapping):
     with open("translation_mapping.json", "w", encoding="utf-8") as f:
         json.dump(mapping, f, ensure_ascii=False, indent=4)
 
-def get_price_info(text):
-    try:
-        pattern_id = r'XchgSearchPrice----SynId = (\d+).*?\+refer \[(\d+)\]'
-        match = re.findall(pattern_id, text, re.DOTALL)
-        result = list(match)
-        for i, item in enumerate(result, 1):
-            ids = item[1]
-            synid = item[0]
-            pattern = re.compile(
-                rf'----Socket RecvMessage STT----XchgSearchPrice----SynId = {synid}\s+'  # Match target SynId
-                r'\[.*?\]\s*GameLog: Display: \[Game\]\s+'  # Match time and fixed prefix
-                r'(.*?)(?=----Socket RecvMessage STT----|$)',  # Match data block content (to the next data block or end)
-                re.DOTALL  # Allow . to match newlines
-            )
-
-            # Find target data block
-            match = pattern.search(text)
-            if not match:
-                print(f'Record found: ID:{item[1]}, Price:-1')
-                continue
-                
-            data_block = match.group(1)
-            if int(item[1]) == 100300:
-                continue
-                
-            # Extract all +number [value] values (ignore currency)
-            value_pattern = re.compile(r'\+\d+\s+\[([\d.]+)\]')  # Match +number [x.x] format
-            values = value_pattern.findall(data_block)
-            # Get the average of the first 30 values, or all if there are fewer than 30
-            if len(values) == 0:
-                average_value = -1
-            else:
-                num_values = min(len(values), 30)
-                sum_values = sum(float(values[i]) for i in range(num_values))
-                average_value = sum_values / num_values
-                
-            with open("full_table.json", 'r', encoding="utf-8") as f:
-                full_table = json.load(f)
-                try:
-                    full_table[ids]['last_time'] = round(time.time())
-                    full_table[ids]['from'] = "FurryHeiLi"
-                    full_table[ids]['price'] = round(average_value, 4)
-                except:
-                    pass
-            with open("full_table.json", 'w', encoding="utf-8") as f:
-                json.dump(full_table, f, indent=4, ensure_ascii=False)
-            print(f'Updating item value: ID:{ids}, Name:{full_table[ids]["name"]}, Price:{round(average_value, 4)}')
-            price_submit(ids, round(average_value, 4), get_user())
-    except Exception as e:
-        print(e)
-
-def initialize_bag_state(text):
-    """Initialize the bag state by scanning all current items (legacy method)"""
-    global bag_state, bag_initialized, first_scan
-    
-    if not first_scan:
-        return False  # Only try to initialize on the first scan
-    
-    first_scan = False
-    
-    # Try to find initialization marker
-    if "PlayerInitPkgMgr" in text or "Login2Client" in text:
-        print("Detected player login or initialization - resetting bag state")
-        bag_state.clear()
-        return True
-    
-    # Pattern to match all bag items
-    pattern = r'\[.*?\]\[.*?\]GameLog: Display: \[Game\] BagMgr@:Modfy BagItem PageId = (\d+) SlotId = (\d+) ConfigBaseId = (\d+) Num = (\d+)'
-    matches = re.findall(pattern, text)
-    
-    if len(matches) > 10:  # Assume we found a big batch of items - good for initialization
-        print(f"Found {len(matches)} bag items - initializing bag state")
-        for match in matches:
-            page_id, slot_id, config_base_id, num = match
-            # Create a unique key for this item slot
-            item_key = f"{page_id}:{slot_id}:{config_base_id}"
-            num = int(num)
-            # Update the bag state
-            bag_state[item_key] = num
-            
-        bag_initialized = True
-        return True
-    
-    return False
-
 def start_initialization():
     """Start the initialization process by scanning for bag reset in the logs"""
-    global awaiting_initialization, initialization_in_progress, root
-    
-    if initialization_in_progress:
+    if not tracker.start_initialization():
         messagebox.showinfo("Initialization", "Initialization already in progress. Please wait.")
         return
     
-    # Set the flag to await initialization
-    awaiting_initialization = True
-    initialization_in_progress = True
-    
     # Update the UI to show we're waiting
     root.label_initialize_status.config(text="Waiting for bag update...",
                                        foreground="blue")
@@ -177,221 +96,16 @@ def start_initialization():
                        "Click 'OK' and then sort your bag in-game by clicking the sort button.\n\n"
                        "This will refresh your inventory and allow the tracker to initialize with the correct item counts.")
 
-def process_initialization(text):
-    """Process the log text for initialization by scanning for BagMgr@:InitBagData entries"""
-    global bag_state, bag_initialized, awaiting_initialization, initialization_complete, initialization_in_progress, root
-    
-    if not awaiting_initialization:
-        return False
-    
-    # Pattern to match BagMgr@:InitBagData entries (complete inventory data)
-    pattern = r'\[.*?\]GameLog: Display: \[Game\] BagMgr@:InitBagData PageId = (\d+) SlotId = (\d+) ConfigBaseId = (\d+) Num = (\d+)'
-    matches = re.findall(pattern, text)
-    
-    # Only proceed if we found a significant number of entries
-    if len(matches) < 20:
-        return False
-    
-    print(f"Found {len(matches)} BagMgr@:InitBagData entries - initializing bag state")
-    
-    # Clear any existing bag state
-    bag_state.clear()
-    
-    # Dictionary to track item totals (by ConfigBaseId)
-    item_totals = {}
-    
-    # Process all matches to get the complete bag state
-    for match in matches:
-        page_id, slot_id, config_base_id, count = match
-        count = int(count)
-        
-        # Store both the slot-based entry and update the total
-        slot_key = f"{page_id}:{slot_id}:{config_base_id}"
-        bag_state[slot_key] = count
-        
-        # Track totals by item ID
-        if config_base_id not in item_totals:
-            item_totals[config_base_id] = 0
-        item_totals[config_base_id] += count
-    
-    # Store the totals in the bag state with a special prefix
-    for item_id, total in item_totals.items():
-        init_key = f"init:{item_id}"
-        bag_state[init_key] = total
-    
-    # Only consider initialization successful if we found items
-    if matches:
-        print(f"Successfully initialized {len(item_totals)} unique item types across {len(matches)} inventory slots")
-        bag_initialized = True
-        initialization_complete = True
-        awaiting_initialization = False
-        initialization_in_progress = False
-        
-        # Update UI in the main thread
-        root.after(0, lambda: root.label_initialize_status.config(
-            text=f"Initialized {len(item_totals)} items",
-            foreground="green"))
-        root.after(0, lambda: root.button_initialize.config(state="normal"))
-        
-        return True
-    
-    return False
-
-def detect_bag_changes(text):
-    """Detect changes to the bag and calculate both gains and losses"""
-    global bag_state, bag_initialized
-    
-    # If bag isn't initialized yet, we can't detect changes properly
-    if not bag_initialized:
-        return []
-    
-    # Pattern to match bag item modifications
-    pattern = r'\[.*?\]GameLog: Display: \[Game\] BagMgr@:Modfy BagItem PageId = (\d+) SlotId = (\d+) ConfigBaseId = (\d+) Num = (\d+)'
-    matches = re.findall(pattern, text)
-    
-    if not matches:
-        return []
-    
-    changes = []
-    slot_changes = {}
-    
-    # Process all matches to calculate item changes
-    for match in matches:
-        page_id, slot_id, config_base_id, count = match
-        count = int(count)
-        
-        # Check previous value in this slot
-        slot_key = f"{page_id}:{slot_id}:{config_base_id}"
-        prev_count = bag_state.get(slot_key, 0)
-        
-        # Update the bag state
-        bag_state[slot_key] = count
-        
-        # Track changes by item ID
-        if config_base_id not in slot_changes:
-            slot_changes[config_base_id] = 0
-        
-        # Track the change in this slot
-        slot_changes[config_base_id] += (count - prev_count)
-    
-    # Now compare with initial values to see net changes
-    for item_id, slot_change in slot_changes.items():
-        if slot_change == 0:
-            continue
-            
-        init_key = f"init:{item_id}"
-        initial_total = bag_state.get(init_key, 0)
-        
-        # Calculate current total by summing all slots for this item
-        current_total = 0
-        for key, value in bag_state.items():
-            if key.startswith("init:"):
-                continue
-            parts = key.split(':')
-            if len(parts) == 3 and parts[2] == item_id:
-                current_total += value
-        
-        # Calculate net change from initial state
-        net_change = current_total - initial_total
-        
-        if net_change != 0:
-            changes.append((item_id, net_change))
-            
-            # Update the baseline to current total for this item
-            # This ensures subsequent changes are measured from the new baseline
-            bag_state[init_key] = current_total
-    
-    return changes
-
-def scan_for_bag_changes(text):
-    """Enhanced bag change scanner that handles initialization"""
-    global bag_initialized, awaiting_initialization
-    
-    # Check if we're in initialization mode and process accordingly
-    if awaiting_initialization:
-        if process_initialization(text):
-            return []  # Skip drop detection during initialization
-    
-    # If bag is properly initialized, use the new tracking method
-    if bag_initialized and initialization_complete:
-        return detect_bag_changes(text)
-    
-    # If bag isn't initialized yet, use the old method
-    if not bag_initialized:
-        # Use the original initialization method as fallback
-        if initialize_bag_state(text):
-            return []
-        
-    # Legacy method for tracking changes if not properly initialized
-    pattern = r'\[.*?\]\[.*?\]GameLog: Display: \[Game\] BagMgr@:Modfy BagItem PageId = (\d+) SlotId = (\d+) ConfigBaseId = (\d+) Num = (\d+)'
-    matches = re.findall(pattern, text)
-    
-    if not matches:
-        return []
-        
-    drops = []
-    
-    # Track total counts of each item type before this update
-    previous_totals = {}
-    for item_key, qty in bag_state.items():
-        if ":" not in item_key:
-            continue
-        parts = item_key.split(':')
-        if len(parts) != 3:
-            continue
-        _, _, item_id = parts
-        if item_id not in previous_totals:
-            previous_totals[item_id] = 0
-        previous_totals[item_id] += qty
-    
-    # Process all matches first to get the current state
-    current_state = bag_state.copy()
-    for match in matches:
-        page_id, slot_id, config_base_id, num = match
-        # Create a unique key for this item slot
-        item_key = f"{page_id}:{slot_id}:{config_base_id}"
-        num = int(num)
-        
-        # Update the current state
-        current_state[item_key] = num
-    
-    # Now compute total counts after the update
-    current_totals = {}
-    for item_key, qty in current_state.items():
-        if ":" not in item_key:
-            continue
-        parts = item_key.split(':')
-        if len(parts) != 3:
-            continue
-        _, _, item_id = parts
-        if item_id not in current_totals:
-            current_totals[item_id] = 0
-        current_totals[item_id] += qty
-    
-    # Compare total counts to detect drops, even across stacks
-    for item_id, current_total in current_totals.items():
-        previous_total = previous_totals.get(item_id, 0)
-        if current_total > previous_total:
-            # We got more of this item
-            drops.append((item_id, current_total - previous_total))
-    
-    # Update the bag state
-    bag_state.update(current_state)
-    
-    return drops
-
-def detect_map_change(text):
-    """Detect entering or leaving a map from the log text"""
-    # Pattern to match entering a map from the refuge
-    enter_pattern = r"PageApplyBase@ _UpdateGameEnd: LastSceneName = World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200' NextSceneName = World'/Game/Art/Maps"
-    
-    # Pattern to match returning to the refuge
-    exit_pattern = r"NextSceneName = World'/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200'"
-    
-    entering_map = bool(re.search(enter_pattern, text))
-    exiting_map = bool(re.search(exit_pattern, text))
-    
-    return entering_map, exiting_map
+def load_config():
+    """Read config.json into config_data; everything built in main() is configured from it"""
+    global config_data
+    try:
+        with open("config.json", "r", encoding="utf-8") as f:
+            config_data = json.load(f)
+    except Exception as e:
+        print(f"Error loading config.json: {e}")
+        config_data = {}
+    return config_data
 
 def get_user():
     """Get or register user ID"""
@@ -410,29 +124,21 @@ def get_user():
         user_id = config_data["user"]
     return user_id
 
-def price_submit(ids, price, user):
-    try:
-        r = rq.get(f"http://{server}/submit?user={user}&ids={ids}&new_price={price}", timeout=10).json()
-        print(r)
-        return r
-    except Exception as e:
-        print(e)
-
 def initialize_data_files():
     """Initialize the English data files"""
     # Check if we need to create full_table.json from en_id_table.json
     if os.path.exists("en_id_table.json") and not os.path.exists("full_table.json"):
         try:
-            # Load English ID table
-            with open("en_id_table.json", 'r', encoding="utf-8") as f:
-                english_items = json.load(f)
+            # Load English ID table, item types come out normalized to one spelling each
+            english_items = item_table.ItemTable()
+            english_items.load_id_table("en_id_table.json")
                 
             # Create initial full_table.json with prices set to 0
             full_table = {}
-            for item_id, item_data in english_items.items():
+            for item_id, idx in english_items.index.items():
                 full_table[item_id] = {
-                    "name": item_data["name"],
-                    "type": item_data["type"],
+                    "name": english_items.names[idx],
+                    "type": item_table.CATEGORY_NAMES[english_items.categories[idx]],
                     "price": 0
                 }
                 
@@ -444,218 +150,45 @@ def initialize_data_files():
         except Exception as e:
             print(f"Error initializing data files: {e}")
 
-# Track bag state and initialization status
-bag_state = {}
-bag_initialized = False
-first_scan = True
-
-all_time_passed = 1
-
-# Try to find the game and log file
-game_found = False
-try:
-    hwnd = win32gui.FindWindow(None, "Torchlight: Infinite  ")
-    if hwnd:
-        tid, pid = win32process.GetWindowThreadProcessId(hwnd)
-        process = psutil.Process(pid)
-        position_game = process.exe()
-        position_log = position_game + "/../../../TorchLight/Saved/Logs/UE_game.log"
-        position_log = position_log.replace("\\", "/")
-        print(f"Log file location: {position_log}")
-        with open(position_log, "r", encoding="utf-8") as f:
-            print(f"Successfully opened log file, first 100 characters: {f.read(100)}")
-            # Go to the end of the file
-            f.seek(0, 2)
-        game_found = True
-except Exception as e:
-    print(f"Error finding game: {e}")
-    # Use a default log path as fallback
-    position_log = "UE_game.log"
-    
-if not game_found:
-    messagebox.showwarning("Game Not Found", 
-                        "Could not find Torchlight: Infinite game process or log file. "\
-                        "The tool will continue running but won't be able to track drops until the game is started.\n\n"\
-                        "Please make sure the game is running with logging enabled, then restart this tool.")
-
-exclude_list = []
-pending_items = {}
-
-def process_drops(drops, item_id_table, price_table):
-    """Process detected drops and consumption, update statistics"""
-    global income, income_all, drop_list, drop_list_all, config_data
-    
-    # First, consolidate multiple changes to the same item in this batch
-    consolidated_changes = {}
-    for change in drops:
-        item_id, amount = change
-        item_id = str(item_id)
-        if item_id not in consolidated_changes:
-            consolidated_changes[item_id] = 0
-        consolidated_changes[item_id] += amount
-    
-    # Now process the consolidated changes
-    for item_id, amount in consolidated_changes.items():
-        # Check if we have a name for this item
-        if item_id in item_id_table:
-            item_name = item_id_table[item_id]
-        else:
-            # No item name found, use ID as name and add to pending queue
-            item_name = f"Unknown item (ID: {item_id})"
-            if item_id not in pending_items:
-                print(f"[NETWORK] ID {item_id} doesn't exist locally, fetching")
-                pending_items[item_id] = amount
-            else:
-                pending_items[item_id] += amount
-                print(f"[NETWORK] ID {item_id} already in queue, accumulated: {pending_items[item_id]}")
-            continue
-            
-        # Check exclusion list
-        if exclude_list and item_name in exclude_list:
-            print(f"Excluded: {item_name} x{amount}")
-            continue
-            
-        # Update counters (positive for gains, negative for consumption)
-        if item_id not in drop_list:
-            drop_list[item_id] = 0
-        drop_list[item_id] += amount
-
-        if item_id not in drop_list_all:
-            drop_list_all[item_id] = 0
-        drop_list_all[item_id] += amount
-        
-        # Calculate price impact
-        price = 0.0
-        if item_id in price_table:
-            price = price_table[item_id]
-            if config_data.get("tax", 0) == 1 and item_id != "100300":
-                price = price * 0.875
-            # Amount can be positive (gain) or negative (consumption)
-            income += price * amount
-            income_all += price * amount
-            
-            # If this is consumption (negative amount), immediately update the UI
-            if amount < 0:
-                root.reshow()
-            
-        # Log to drop.txt
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        if amount > 0:
-            log_line = f"[{timestamp}] Drop: {item_name} x{amount} ({round(price, 3)}/each)\n"
-        else:
-            log_line = f"[{timestamp}] Consumed: {item_name} x{abs(amount)} ({round(price, 3)}/each)\n"
-        with open("drop.txt", "a", encoding="utf-8") as f:
-            f.write(log_line)
-            
-        if amount > 0:
-            print(f"Processed drop: {item_name} x{amount} ({round(price, 3)}/each)")
-        else:
-            print(f"Processed consumption: {item_name} x{abs(amount)} ({round(price, 3)}/each)")
-
-def reset_map_baseline():
-    """Reset the baseline for map tracking to current inventory state"""
-    global bag_state
-    
-    # Calculate current totals for all items
-    item_totals = {}
-    for key, value in bag_state.items():
-        if not key.startswith("init:") and ":" in key:
-            parts = key.split(':')
-            if len(parts) == 3:
-                item_id = parts[2]
-                if item_id not in item_totals:
-                    item_totals[item_id] = 0
-                item_totals[item_id] += value
-    
-    # Update the init keys to current totals
-    for item_id, total in item_totals.items():
-        init_key = f"init:{item_id}"
-        bag_state[init_key] = total
-    
-    print(f"Reset map baseline for {len(item_totals)} items")
-
-def deal_change(changed_text):
-    global root
-    global is_in_map, all_time_passed, drop_list, income, t, drop_list_all, income_all, total_time, map_count
-    
-    # Check if entering/leaving maps based on scene changes
-    entering_map, exiting_map = detect_map_change(changed_text)
-    
-    if entering_map:
-        is_in_map = True
-        drop_list = {}
-        income = 0  # Start fresh for this map, costs will be tracked automatically
-        map_count += 1
-        
-        # Reset baseline when entering a map - snapshot current state as starting point
-        # This needs to happen BEFORE processing any bag changes from this log batch
-        reset_map_baseline()
-        # Refresh UI so raw income per map shows 0 at the start of a new map
-        try:
-            root.reshow()
-        except Exception:
-            pass
-        
-    if exiting_map:
-        is_in_map = False
-        total_time += time.time() - t
-        # Refresh UI when leaving a map
-        try:
-            root.reshow()
-        except Exception:
-            pass
-    
-    # Load item data and prices
-    id_table = {}
-    price_table = {}
+def find_game_log():
+    """Try to find the game and its log file, returns (log path, game found)"""
     try:
-        with open("full_table.json", 'r', encoding="utf-8") as f:
-            f_data = json.load(f)
-            for i in f_data.keys():
-                id_table[str(i)] = f_data[i]["name"]
-                price_table[str(i)] = f_data[i]["price"]
+        hwnd = win32gui.FindWindow(None, "Torchlight: Infinite  ")
+        if hwnd:
+            tid, pid = win32process.GetWindowThreadProcessId(hwnd)
+            process = psutil.Process(pid)
+            position_game = process.exe()
+            position_log = position_game + "/../../../TorchLight/Saved/Logs/UE_game.log"
+            position_log = position_log.replace("\\", "/")
+            print(f"Log file location: {position_log}")
+            with open(position_log, "r", encoding="utf-8") as f:
+                print(f"Successfully opened log file, first 100 characters: {f.read(100)}")
+            return position_log, True
     except Exception as e:
-        print(f"Error loading item data: {e}")
-        return
-    
-    # Scan for bag changes to keep internal state up to date at all times
-    # Note: We only process and count changes while inside a map.
-    drops = scan_for_bag_changes(changed_text)
-    if is_in_map and drops:
-        process_drops(drops, id_table, price_table)
-        root.reshow()
+        print(f"Error finding game: {e}")
+    # Use a default log path as fallback
+    return "UE_game.log", False
 
 # Debug function to examine log format and bag state
 def debug_log_format():
     """Print recent log entries and current bag state to help diagnose issues"""
     try:
         print("=== CURRENT BAG STATE ===")
-        print(f"Initialized: {bag_initialized}")
-        print(f"Initialization complete: {initialization_complete}")
+        bag_state = tracker.bag_state
+        print(f"Initialized: {tracker.bag_initialized}")
+        print(f"Initialization complete: {tracker.initialization_complete}")
         print(f"Total tracked slots: {len(bag_state)}")
         
-        # Group by item ID for better display
-        grouped = {}
-        for key, amount in bag_state.items():
-            if key.startswith("init:"):
-                item_id = key.split(':')[1]
-            elif ":" in key and len(key.split(':')) == 3:
-                _, _, item_id = key.split(':')
-            else:
-                item_id = key
-                
-            if item_id not in grouped:
-                grouped[item_id] = 0
-            grouped[item_id] += amount
+        # Per-item totals are kept by the inventory
+        grouped = bag_state.totals
         
         # Load item names if available
         try:
-            with open("full_table.json", 'r', encoding="utf-8") as f:
-                item_data = json.load(f)
+            catalog = get_catalog()
             
             print("Item totals:")
             for item_id, total in grouped.items():
-                name = item_data.get(item_id, {}).get("name", f"Unknown (ID: {item_id})")
+                name = catalog.name(item_id, f"Unknown (ID: {item_id})")
                 print(f"  {name}: {total}")
         except:
             print("Item IDs and totals:")
@@ -675,8 +208,8 @@ def debug_log_format():
         # Show in a dialog
         messagebox.showinfo("Debug Information", 
                         f"Debug information has been printed to the console.\n\n"
-                        f"Bag state initialized: {bag_initialized}\n"
-                        f"Initialization complete: {initialization_complete}\n"
+                        f"Bag state initialized: {tracker.bag_initialized}\n"
+                        f"Initialization complete: {tracker.initialization_complete}\n"
                         f"Total items tracked: {len(grouped)}\n"
                         f"Total inventory slots: {len(bag_state)}")
     except Exception as e:
@@ -684,20 +217,13 @@ def debug_log_format():
         import traceback
         traceback.print_exc()
 
-is_in_map = False
-drop_list = {}
-drop_list_all = {}
-income = 0
-income_all = 0
-t = time.time()
 show_all = False
-total_time = 0
-map_count = 0
 
 class App(Tk):
-    show_type = ["Compass","Currency","Special Item","Memory Material","Equipment Material","Gameplay Ticket","Map Ticket","Cube Material","Corruption Material","Dream Material","Tower Material","BOSS Ticket","Memory Glow","Divine Emblem","Overlap Material","Hard Currency"]
+    # Item categories shown in the drop list, as item_table category bits
+    show_mask = item_table.LISTED
     # Checkmark, Circle, X
-    status = ["✔", "◯", "✘"]
+    status = STATUS
     
     def __init__(self):
         super().__init__()
@@ -735,7 +261,7 @@ class App(Tk):
         label_total_speed.grid(row=1, column=1, padx=5, sticky="w")
         label_map_count = ttk.Label(basic_frame, text="🎫 0", font=("Arial", 14))
         label_map_count.grid(row=0, column=2, padx=5, sticky="w")
-        label_current_earn = ttk.Label(basic_frame, text="🔥 0", font=("Arial", 14))
+        label_current_earn = ttk.Label(basic_frame, text="🔥 0 💰 0", font=("Arial", 14))
         label_current_earn.grid(row=1, column=2, padx=5, sticky="w")
         inner_pannel_drop_listbox = Listbox(advanced_frame, height=15, width=45, font=("Arial", 10))
         inner_pannel_drop_listbox.insert(END, "Drops will be displayed here")
@@ -776,6 +302,11 @@ class App(Tk):
         self.label_map_count = label_map_count
         self.label_current_earn = label_current_earn
 
+        # Last state posted by the log thread and the drop rows currently in the listbox
+        self.view = {"map_count": 0, "income": 0, "income_all": 0, "market_value": 0, "market_value_all": 0,
+                     "drop_list": {}, "drop_list_all": {}, "drop_value": {}, "drop_value_all": {}}
+        self.drop_rows = []
+
         # Create child windows
         self.inner_pannel_settings = Toplevel(self)
         self.inner_pannel_settings.title("Settings")
@@ -812,6 +343,10 @@ class App(Tk):
         # Reset button
         reset_button = ttk.Button(self.inner_pannel_settings, text="Reset Tracking", command=self.reset_tracking)
         reset_button.grid(row=2, column=0, columnspan=2, padx=5, pady=10)
+
+        # Stats button, shows what each stage of the log thread costs
+        stats_button = ttk.Button(self.inner_pannel_settings, text="Stats", command=self.show_stats)
+        stats_button.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
         
         # Setup default values
         self.scale_setting_2.set(config_data["opacity"])
@@ -861,21 +396,45 @@ class App(Tk):
         self.inner_pannel_drop_yingguang.config(cursor="hand2", command=self.show_yingguang)
         self.inner_pannel_drop_qita.config(cursor="hand2", command=self.show_qita)
         
+        # Create stats panel
+        self.inner_pannel_stats = Toplevel(self)
+        self.inner_pannel_stats.title("Stats")
+        self.inner_pannel_stats.resizable(False, False)
+        self.inner_pannel_stats.attributes('-toolwindow', True)
+        self.inner_pannel_stats.geometry('+0+0')
+        text_stats = Text(self.inner_pannel_stats, height=20, width=80, font=("Consolas", 9))
+        text_stats.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
+        self.text_stats = text_stats
+        words_profile = StringVar()
+        words_profile.set("Start profiling")
+        button_profile = ttk.Button(self.inner_pannel_stats, textvariable=words_profile, command=self.toggle_profiling)
+        button_profile.grid(row=1, column=0, padx=5, pady=5)
+        self.words_profile = words_profile
+        button_dump = ttk.Button(self.inner_pannel_stats, text="Save to tick_stats.txt",
+                                 command=lambda: tracker.stats.dump())
+        button_dump.grid(row=1, column=1, padx=5, pady=5)
+
         # Hide child windows initially
         self.inner_pannel_drop.withdraw()
         self.inner_pannel_settings.withdraw()
+        self.inner_pannel_stats.withdraw()
         
         # Set window closing protocols
         self.inner_pannel_drop.protocol("WM_DELETE_WINDOW", self.close_diaoluo)
         self.inner_pannel_settings.protocol("WM_DELETE_WINDOW", self.close_settings)
+        self.inner_pannel_stats.protocol("WM_DELETE_WINDOW", self.close_stats)
         
         # Now that all windows are created, set up opacity
         self.change_opacity(config_data["opacity"])
+
+        # Redraw at most ui_fps times per second, however often the state changes
+        self.frame_interval = max(int(1000 / config_data.get("ui_fps", 10)), 16)
         
         # Keep all windows on top
         self.attributes('-topmost', True)
         self.inner_pannel_drop.attributes('-topmost', True)
         self.inner_pannel_settings.attributes('-topmost', True)
+        self.inner_pannel_stats.attributes('-topmost', True)
         
         # Set up proper window close handling
         self.protocol("WM_DELETE_WINDOW", self.exit_app)
@@ -901,6 +460,14 @@ class App(Tk):
             global app_running
             app_running = False
             
+            # Persist any price changes still waiting in the catalog, and keep unsent prices for next time
+            get_catalog().flush()
+            tracker.price_history.flush()
+            submitter.stop()
+            session_store.stop()
+            for sink in sinks:
+                sink.stop()
+            
             # Close all child windows first
             try:
                 self.inner_pannel_drop.destroy()
@@ -910,6 +477,10 @@ class App(Tk):
                 self.inner_pannel_settings.destroy()
             except:
                 pass
+            try:
+                self.inner_pannel_stats.destroy()
+            except:
+                pass
             
             # Close main window
             self.destroy()
@@ -917,28 +488,13 @@ class App(Tk):
 
     def reset_tracking(self):
         """Reset all tracking data"""
-        global bag_state, bag_initialized, first_scan, drop_list, drop_list_all, income, income_all, total_time, map_count
-        global initialization_complete, awaiting_initialization, initialization_in_progress
-        
         if messagebox.askyesno("Reset Tracking", 
                          "Are you sure you want to reset all tracking data? This will clear all drop statistics."):
-            bag_state.clear()
-            bag_initialized = False
-            initialization_complete = False
-            awaiting_initialization = False
-            initialization_in_progress = False
-            first_scan = True
-            drop_list.clear()
-            drop_list_all.clear()
-            income = 0
-            income_all = 0
-            total_time = 0
-            map_count = 0
+            tracker.reset()
             
             # Update UI
-            self.label_current_earn.config(text=f"🔥 0")
-            self.label_map_count.config(text=f"🎫 0")
-            self.inner_pannel_drop_listbox.delete(1, END)
+            self.view = tracker.view_state()
+            self.reshow()
             self.label_initialize_status.config(text="Not initialized")
             
             messagebox.showinfo("Reset Complete", "All tracking data has been reset.")
@@ -949,8 +505,11 @@ class App(Tk):
             config_data = f.read()
         config_data = json.loads(config_data)
         config_data["tax"] = int(value)
+        tracker.tax = config_data["tax"] == 1
         with open("config.json", "w", encoding="utf-8") as f:
             json.dump(config_data, f, ensure_ascii=False, indent=4)
+        # Both forms are kept in the ledger, the totals switch right away
+        tracker.refresh()
 
     def change_states(self):
         global show_all
@@ -983,6 +542,30 @@ class App(Tk):
         else:
             this.withdraw()
 
+    def close_stats(self):
+        self.inner_pannel_stats.withdraw()
+
+    def show_stats(self):
+        this = self.inner_pannel_stats
+        if this.state() == "withdrawn":
+            this.deiconify()
+            self.update_stats()
+        else:
+            this.withdraw()
+
+    def update_stats(self):
+        """Redraw the stats panel every second while it is open"""
+        if self.inner_pannel_stats.state() == "withdrawn":
+            return
+        self.text_stats.delete("1.0", END)
+        self.text_stats.insert(END, tracker.stats.format())
+        self.after(1000, self.update_stats)
+
+    def toggle_profiling(self):
+        enabled = not tracker.stats.profile_requested
+        tracker.stats.set_profiling(enabled)
+        self.words_profile.set("Stop profiling" if enabled else "Start profiling")
+
     def change_opacity(self, value):
         with open("config.json", "r", encoding="utf-8") as f:
             config_data = f.read()
@@ -1000,103 +583,163 @@ class App(Tk):
         
         if hasattr(self, 'inner_pannel_settings') and self.inner_pannel_settings.winfo_exists():
             self.inner_pannel_settings.attributes('-alpha', float(value))
+    def pump(self):
+        """Apply what the log thread posted since the last frame, then schedule the next frame"""
+        for topic, payload in ui_events.drain().items():
+            if topic == "state":
+                self.view = payload
+                self.reshow()
+            elif topic == "clock":
+                self.show_clock(payload)
+            elif topic == "initialized":
+                self.label_initialize_status.config(text=f"Initialized {payload} items", foreground="green")
+                self.button_initialize.config(state="normal")
+        if app_running:
+            self.after(self.frame_interval, self.pump)
+
+    def show_clock(self, clock):
+        map_time = clock["map_time"]
+        m = int(map_time // 60)
+        s = int(map_time % 60)
+        self.label_current_time.config(text=f"Current: {m}m{s}s")
+
+        # Calculate current speed (can be negative)
+        current_time_minutes = max(map_time / 60, 0.01)
+        current_speed = (clock["income"] / current_time_minutes) * 60
+        self.label_current_speed.config(text=f"🔥 {round(current_speed, 2)} /hr")
+
+        tmp_total_time = clock["total_time"]
+        m = int(tmp_total_time // 60)
+        s = int(tmp_total_time % 60)
+        self.label_total_time.config(text=f"Total: {m}m{s}s")
+
+        # Calculate total speed (can be negative)
+        total_time_minutes = max(tmp_total_time / 60, 0.01)
+        total_speed = (clock["income_all"] / total_time_minutes) * 60
+        self.label_total_speed.config(text=f"🔥 {round(total_speed, 2)} /hr")
+
     def reshow(self):
-        global drop_list, drop_list_all
-        with open("full_table.json", 'r', encoding="utf-8") as f:
-            full_table = json.load(f)
-        self.label_map_count.config(text=f"🎫 {map_count}")
+        view = self.view
+        self.label_map_count.config(text=f"🎫 {view['map_count']}")
+        # Income at the prices the drops were booked at, then what the same drops are worth now
         if show_all:
-            tmp = drop_list_all
-            self.label_current_earn.config(text=f"🔥 {round(income_all, 2)}")
+            tmp, values = view["drop_list_all"], view.get("drop_value_all")
+            self.label_current_earn.config(text=f"🔥 {round(view['income_all'], 2)} 💰 {round(view['market_value_all'], 2)}")
         else:
-            tmp = drop_list
-            self.label_current_earn.config(text=f"🔥 {round(income, 2)}")
-        self.inner_pannel_drop_listbox.delete(1, END)
-        for i in tmp.keys():
-            item_id = str(i)
-            if item_id not in full_table:
-                continue
-                
-            item_name = full_table[item_id]["name"]
-            item_type = full_table[item_id]["type"]
-            if item_type not in self.show_type:
-                continue
-            now = time.time()
-            last_time = full_table[item_id].get("last_update", 0)
-            time_passed = now - last_time
-            if time_passed < 180:
-                status = self.status[0]
-            elif time_passed < 900:
-                status = self.status[1]
-            else:
-                status = self.status[2]
-            item_price = full_table[item_id]["price"]
-            if config_data.get("tax", 0) == 1 and item_id != "100300":
-                item_price = item_price * 0.875
-            self.inner_pannel_drop_listbox.insert(END, f"{status} {item_name} x{tmp[i]} [{round(tmp[i] * item_price, 2)}]")
+            tmp, values = view["drop_list"], view.get("drop_value")
+            self.label_current_earn.config(text=f"🔥 {round(view['income'], 2)} 💰 {round(view['market_value'], 2)}")
+        self.set_drop_rows(build_drop_rows(tmp, tracker, self.show_mask, values=values, orderbooks=tracker.orderbooks))
+
+    def set_drop_rows(self, rows):
+        """Update the listbox below its header line, touching only the rows that changed"""
+        start, delete_count, insert = diff_rows(self.drop_rows, rows)
+        listbox = self.inner_pannel_drop_listbox
+        if delete_count:
+            listbox.delete(1 + start, start + delete_count)
+        if insert:
+            listbox.insert(1 + start, *insert)
+        self.drop_rows = rows
 
     def show_all_type(self):
-        self.show_type = ["Compass","Currency","Special Item","Memory Material","Equipment Material","Gameplay Ticket","Map Ticket","Cube Material","Corruption Material","Dream Material","Tower Material","BOSS Ticket","Memory Glow","Divine Emblem","Overlap Material", "Hard Currency"]
+        self.show_mask = item_table.LISTED
         self.reshow()
     def show_tonghuo(self):
-        self.show_type = ["Currency", "Hard Currency"]
+        self.show_mask = item_table.CURRENCY | item_table.HARD_CURRENCY
         self.reshow()
     def show_huijing(self):
-        self.show_type = ["Equipment Material", "Ashes"]
+        self.show_mask = item_table.EQUIPMENT_MATERIAL
         self.reshow()
     def show_luopan(self):
-        self.show_type = ["Compass"]
+        self.show_mask = item_table.COMPASS
         self.reshow()
     def show_yingguang(self):
-        self.show_type = ["Memory Glow", "Memory Fluorescence"]
+        self.show_mask = item_table.MEMORY_GLOW
         self.reshow()
     def show_qita(self):
-        self.show_type = ["Special Item","Memory Material","Gameplay Ticket","Map Ticket","Cube Material","Corruption Material","Dream Material","Tower Material","BOSS Ticket","Divine Emblem","Overlap Material"]
+        self.show_mask = item_table.LISTED & ~(item_table.CURRENCY | item_table.HARD_CURRENCY | item_table.EQUIPMENT_MATERIAL
+                                            | item_table.COMPASS | item_table.MEMORY_GLOW)
         self.reshow()
 
 class MyThread(threading.Thread):
-    history = ""
+    tailer = None
     def run(self):
-        global all_time_passed, income, drop_list, t, root
+        # One parser for the whole session keeps exchange messages split across reads together
+        parser = LogParser()
+        checkpointer = Checkpointer(interval=config_data.get("checkpoint_interval", 10.0))
+        checkpoint = checkpointer.load(position_log)
         try:
-            self.history = open(position_log, "r", encoding="utf-8")
-            self.history.seek(0, 2)
+            # Wake on log changes instead of sleeping a fixed second, and resume from
+            # the checkpointed byte if the tool was restarted on the same log
+            self.tailer = LogTailer(position_log,
+                                    min_latency=config_data.get("log_min_latency", 0.05),
+                                    max_latency=config_data.get("log_max_latency", 5.0),
+                                    resume=(checkpoint["inode"], checkpoint["offset"]) if checkpoint else None)
         except:
             print(f"Could not open log file at {position_log}")
-            self.history = None
-            
+            self.tailer = None
+
+        # The bag and counters are only still valid if the log continues where they were taken
+        if self.tailer and self.tailer.resumed:
+            Checkpointer.restore(checkpoint, tracker, parser)
+            print(f"Restored tracking state from {checkpointer.path}")
+        elif self.tailer and config_data.get("scan_bag_on_start", True):
+            # Otherwise take the bag from the last dump already in the log and tail on from there
+            scanned = rebuild_from_log(position_log, tracker)
+            if scanned and scanned[0] == self.tailer.inode:
+                self.tailer.seek(scanned[1])
+
+        stats = tracker.stats
+        catch_up_bytes = config_data.get("catch_up_bytes", 8 * 1024 * 1024)
         while app_running:
             try:
-                time.sleep(1)
+                # Start or stop cProfile here, it only sees the thread that enables it
+                stats.update_profiler()
+                if self.tailer:
+                    # Inside a map the clock labels still need a refresh every second
+                    self.tailer.wait(1.0 if tracker.is_in_map else None)
+                else:
+                    time.sleep(1)
                 if not app_running:
                     break
                     
-                if self.history:
-                    things = self.history.read()
-                    # Process log changes
-                    deal_change(things)
-                    get_price_info(things)
-                if is_in_map:
-                    m = int((time.time() - t) // 60)
-                    s = int((time.time() - t) % 60)
-                    root.label_current_time.config(text=f"Current: {m}m{s}s")
-                    
-                    # Calculate current speed (can be negative)
-                    current_time_minutes = max((time.time() - t) / 60, 0.01)
-                    current_speed = (income / current_time_minutes) * 60
-                    root.label_current_speed.config(text=f"🔥 {round(current_speed, 2)} /hr")
-                    
-                    tmp_total_time = total_time + (time.time() - t)
-                    m = int(tmp_total_time // 60)
-                    s = int(tmp_total_time % 60)
-                    root.label_total_time.config(text=f"Total: {m}m{s}s")
-                    
-                    # Calculate total speed (can be negative)
-                    total_time_minutes = max(tmp_total_time / 60, 0.01)
-                    total_speed = (income_all / total_time_minutes) * 60
-                    root.label_total_speed.config(text=f"🔥 {round(total_speed, 2)} /hr")
-                else:
-                    t = time.time()
+                if self.tailer:
+                    tick_start = time.perf_counter()
+                    start_offset = self.tailer.offset
+                    # A large backlog (tool paused, or started on a long log) is caught up on
+                    # with only the bag, scene and login lines; old exchange traffic is skipped,
+                    # the last catch_up_bytes of it are read whole
+                    line_filter = None
+                    filter_until = None
+                    backlog = self.tailer.backlog()
+                    if backlog > catch_up_bytes:
+                        print(f"Catching up on {backlog} bytes of log")
+                        # An exchange block left open can not continue across skipped lines
+                        tracker.process(parser.flush())
+                        line_filter = filter_lines
+                        filter_until = start_offset + backlog - catch_up_bytes
+                    # Stream the new lines block by block, so memory stays bounded by the block size
+                    lines = 0
+                    blocks = self.tailer.read_blocks(line_filter, filter_until)
+                    while True:
+                        with stats.stage("read"):
+                            things = next(blocks, None)
+                        if things is None:
+                            break
+                        lines += things.count("\n")
+                        # Tokenize the new log text once and hand the events to every handler
+                        with stats.stage("parse"):
+                            events = parser.parse(things)
+                        tracker.process(events)
+                    if lines:
+                        stats.observe("bytes", max(self.tailer.offset - start_offset, 0))
+                        stats.observe("lines", lines)
+                    with stats.stage("persist"):
+                        checkpointer.save(tracker, parser, self.tailer)
+                        tracker.price_history.maybe_flush()
+                    stats.record("tick", time.perf_counter() - tick_start)
+                with stats.stage("ui"):
+                    self.update_labels()
+                stats.maybe_dump(interval=config_data.get("stats_dump_interval", 60))
             except Exception as e:
                 print("-------------Exception-----------")
                 # Output error line number
@@ -1104,73 +747,116 @@ class MyThread(threading.Thread):
                 traceback.print_exc()
         
         # Clean up
-        if self.history:
-            self.history.close()
+        stats.set_profiling(False)
+        stats.update_profiler()
+        if self.tailer:
+            checkpointer.save(tracker, parser, self.tailer, force=True)
+            self.tailer.close()
+
+    def update_labels(self):
+        """Hand the map clock to the window, it formats the labels on its own thread"""
+        if tracker.is_in_map:
+            ui_events.post("clock", {
+                "map_time": tracker.current_map_time(),
+                "total_time": tracker.total_map_time(),
+                "income": tracker.income,
+                "income_all": tracker.income_all,
+            })
+        else:
+            tracker.tick()
 
 def price_update():
     """Get price updates from the server and handle translations"""
+    price_sync = PriceSync(f"http://{server}", get_catalog(), history=tracker.price_history)
+    tracker.stats.add_gauge("price sync requests", lambda: f"{price_sync.requests} ({price_sync.not_modified} unchanged)")
+    tracker.stats.add_gauge("price sync bytes", lambda: price_sync.bytes_transferred)
+    tracker.stats.add_gauge("price sync items changed", lambda: price_sync.items_changed)
     while app_running:
         try:
             time.sleep(600)
             if not app_running:
                 break
                 
-            # Get data from server (in Chinese)
-            response = rq.get(f"http://{server}/get", timeout=10)
-            
-            # Check if response is successful and has content
-            if response.status_code != 200:
-                print(f"Server returned status code: {response.status_code}")
-                time.sleep(60)
-                continue
-                
-            if not response.text.strip():
-                print("Server returned empty response")
+            # Conditional request, only prices that moved are applied and saved
+            with tracker.stats.stage("sync"):
+                changed = price_sync.sync()
+            if changed is None:
                 time.sleep(60)
                 continue
             
-            # Try to parse JSON
-            try:
-                r = response.json()
-            except json.JSONDecodeError as json_err:
-                print(f"Failed to parse JSON from server. Response content: {response.text[:200]}...")
-                time.sleep(60)
-                continue
-            
-            # Get current data
-            with open("full_table.json", 'r', encoding="utf-8") as f:
-                data = json.load(f)
-                
-            # Update prices from server
-            for item_id, item_data in r.items():
-                if item_id in data:
-                    data[item_id]["price"] = item_data["price"]
-                    data[item_id]["last_update"] = time.time()
-            
-            # Save updated data
-            with open("full_table.json", 'w', encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-                
-            print(f"Updated prices for {len(r)} items from server")
             # Wait before next update
             time.sleep(30)
         except Exception as e:
             print(f"Error in price update: {e}")
             time.sleep(60)
 
-# Initialize data files before starting the application
-initialize_data_files()
-
-# Create the main application
-root = App()
-root.wm_attributes('-topmost', 1)
-
-# Start the log reading thread
-MyThread().start()
-
-# Start the price update thread
-import _thread
-_thread.start_new_thread(price_update, ())
-
-# Start the main loop
-root.mainloop()
+def on_initialized(item_count):
+    """Called on the log thread once the bag is loaded, the window updates its widgets"""
+    ui_events.post("initialized", item_count)
+
+def main():
+    global tracker, submitter, session_store, sinks, root, position_log
+    
+    # Try to find the game and log file
+    position_log, game_found = find_game_log()
+    if not game_found:
+        messagebox.showwarning("Game Not Found", 
+                            "Could not find Torchlight: Infinite game process or log file. "\
+                            "The tool will continue running but won't be able to track drops until the game is started.\n\n"\
+                            "Please make sure the game is running with logging enabled, then restart this tool.")
+    
+    # Initialize data files before starting the application
+    initialize_data_files()
+    # The settings below are read before the window exists
+    load_config()
+    
+    # Create the tracking core and the main application
+    # Every price seen is kept with its time, so drops stay valued at the price they dropped at
+    price_history = PriceHistory(estimator=config_data.get("price_estimator", "mean30"))
+    price_history.load()
+    tracker = Tracker.from_config(config_data, price_history=price_history)
+    root = App()
+    root.wm_attributes('-topmost', 1)
+    tracker.on_refresh = lambda: ui_events.post("state", tracker.view_state())
+    tracker.on_initialized = on_initialized
+    
+    # Prices found in the log are sent by a background worker, never from the log thread
+    submitter = PriceSubmitter(f"http://{server}", get_user, stats=tracker.stats)
+    submitter.start()
+    tracker.on_price = submitter.submit
+
+    # Drops, consumption and map runs are kept in sessions.db across restarts
+    session_store = SessionStore()
+    session_store.start()
+    tracker.listeners.append(session_store.handle)
+
+    # Optional JSONL / CSV / HTTP feeds of the same events, each on its own thread
+    sinks = create_sinks(config_data.get("sinks", {}), get_catalog())
+    for sink in sinks:
+        sink.start()
+        tracker.listeners.append(sink.handle)
+        tracker.stats.add_gauge(f"{sink.name} sink queued", sink.queue_depth)
+        tracker.stats.add_gauge(f"{sink.name} sink dropped", lambda sink=sink: sink.dropped)
+
+    # Queue depths shown next to the stage timings
+    tracker.stats.add_gauge("price submissions queued", submitter.queue_depth)
+    tracker.stats.add_gauge("price submit backoff (s)", lambda: submitter.backoff)
+    tracker.stats.add_gauge("session events queued", session_store.queue_depth)
+    tracker.stats.add_gauge("price searches waiting", lambda: len(tracker.price_queries))
+    if tracker.orderbooks is not None:
+        tracker.stats.add_gauge("orderbooks cached", lambda: len(tracker.orderbooks))
+    tracker.stats.add_gauge("ui updates coalesced", lambda: f"{ui_events.coalesced} of {ui_events.posted}")
+    
+    # Start the log reading thread
+    MyThread().start()
+    
+    # Start the price update thread
+    import _thread
+    _thread.start_new_thread(price_update, ())
+    
+    # Start drawing what the log thread posts, then the main loop
+    root.pump()
+    root.mainloop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Inventory model for bag tracking.
+Slots are keyed by (PageId, SlotId) and hold the item currently in them, a running total
+is kept per ConfigBaseId so a slot change updates totals in O(1), and the baselines drops
+are measured against live in their own dict instead of `init:` keys mixed into the slots.
+"""
+
+class Inventory:
+    """Bag slots, per-item totals and per-item baselines"""
+
+    def __init__(self):
+        self.slots = {}      # (page_id, slot_id) -> (item_id, num)
+        self.totals = {}     # item_id -> total count across all slots
+        self.baselines = {}  # item_id -> total count changes are measured from
+
+    def __len__(self):
+        return len(self.slots)
+
+    def clear(self):
+        self.slots.clear()
+        self.totals.clear()
+        self.baselines.clear()
+
+    def total(self, item_id):
+        return self.totals.get(item_id, 0)
+
+    def _add(self, item_id, amount):
+        total = self.totals.get(item_id, 0) + amount
+        if total:
+            self.totals[item_id] = total
+        else:
+            self.totals.pop(item_id, None)
+
+    def set_slot(self, page_id, slot_id, item_id, num):
+        """Set the content of a slot, returns a list of (item_id, delta) caused by the change"""
+        key = (page_id, slot_id)
+        prev_item, prev_num = self.slots.get(key, (item_id, 0))
+        if num:
+            self.slots[key] = (item_id, num)
+        else:
+            self.slots.pop(key, None)
+
+        if prev_item == item_id:
+            delta = num - prev_num
+            if delta:
+                self._add(item_id, delta)
+                return [(item_id, delta)]
+            return []
+
+        # The slot now holds a different item, the previous stack left it
+        self._add(prev_item, -prev_num)
+        self._add(item_id, num)
+        changes = [(prev_item, -prev_num)] if prev_num else []
+        if num:
+            changes.append((item_id, num))
+        return changes
+
+    def load(self, entries):
+        """Replace the whole bag with (page_id, slot_id, item_id, num) entries and make it the baseline"""
+        self.clear()
+        for entry in entries:
+            # BagInit events carry their log time after the four slot fields
+            page_id, slot_id, item_id, num = entry[:4]
+            self.set_slot(page_id, slot_id, item_id, num)
+        self.reset_baseline()
+
+    def reset_baseline(self):
+        """Measure future changes from the current totals"""
+        self.baselines = dict(self.totals)
+
+    def net_change(self, item_id):
+        """Current total minus the baseline for one item"""
+        return self.totals.get(item_id, 0) - self.baselines.get(item_id, 0)
+
+    def commit(self, item_id):
+        """Move the baseline of one item up to its current total"""
+        self.baselines[item_id] = self.totals.get(item_id, 0)
+
+    def snapshot(self):
+        """JSON-friendly copy of the slots and baselines; totals are rebuilt from the slots"""
+        return {
+            "slots": [[page_id, slot_id, item_id, num] for (page_id, slot_id), (item_id, num) in self.slots.items()],
+            "baselines": dict(self.baselines),
+        }
+
+    def restore(self, data):
+        """Replace the bag with a snapshot() taken earlier"""
+        self.clear()
+        for page_id, slot_id, item_id, num in data["slots"]:
+            self.set_slot(page_id, slot_id, item_id, num)
+        self.baselines = dict(data["baselines"])
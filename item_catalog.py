@@ -0,0 +1,168 @@
+"""
+Process-wide in-memory item catalog backed by full_table.json.
+The table is decoded once, lookups are plain dict reads, and price changes are applied in
+memory and written back by a debounced, atomic write-behind instead of rewriting the file
+for every price record.
+"""
+
+import json
+import os
+import threading
+import time
+
+from item_table import ItemTable
+
+FULL_TABLE_PATH = "full_table.json"
+
+class ItemCatalog:
+    """Item names, types and prices keyed by ConfigBaseId (as a string)"""
+
+    def __init__(self, path=FULL_TABLE_PATH, save_delay=5.0, autosave=True):
+        self.path = path
+        self.save_delay = save_delay
+        self.autosave = autosave
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._timer = None
+        self._dirty = False
+        self.items = {}
+        self.table = ItemTable()
+        self.listeners = []  # called with (item_id, price) whenever a price changes
+        self.load()
+
+    def load(self):
+        """(Re)load the table from disk"""
+        try:
+            with open(self.path, 'r', encoding="utf-8") as f:
+                items = json.load(f)
+        except Exception as e:
+            print(f"Error loading item data: {e}")
+            items = {}
+        with self._lock:
+            self.items = {str(item_id): entry for item_id, entry in items.items()}
+            # Dense ids and category bits for the drop view and the ledger
+            self.table = ItemTable.compile(self.items)
+
+    def __contains__(self, item_id):
+        return str(item_id) in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def get(self, item_id):
+        """Full entry for an item, or None if unknown"""
+        return self.items.get(str(item_id))
+
+    def name(self, item_id, default=None):
+        entry = self.items.get(str(item_id))
+        return entry["name"] if entry else default
+
+    def type(self, item_id, default=None):
+        entry = self.items.get(str(item_id))
+        return entry["type"] if entry else default
+
+    def category(self, item_id):
+        """Category bit of an item (see item_table), OTHER if unknown"""
+        return self.table.category(str(item_id))
+
+    def price(self, item_id, default=0):
+        entry = self.items.get(str(item_id))
+        return entry.get("price", default) if entry else default
+
+    def update_price(self, item_id, price, source=None, field="last_time", timestamp=None):
+        """Set the price of a known item in memory and schedule a save. Returns False for unknown items."""
+        item_id = str(item_id)
+        with self._lock:
+            entry = self.items.get(item_id)
+            if entry is None:
+                return False
+            changed = entry.get("price") != price
+            entry["price"] = price
+            entry[field] = timestamp if timestamp is not None else time.time()
+            if source is not None:
+                entry["from"] = source
+        self.schedule_save()
+        if changed:
+            self.notify(item_id, price)
+        return True
+
+    def notify(self, item_id, price):
+        for listener in self.listeners:
+            try:
+                listener(item_id, price)
+            except Exception as e:
+                print(f"Error in price listener: {e}")
+
+    def update_prices(self, prices, field="last_update"):
+        """Apply a {item_id: price} mapping, returns the number of items whose price changed.
+        Unchanged items only get their timestamp refreshed in memory, which alone never triggers a save."""
+        now = time.time()
+        changed = {}
+        with self._lock:
+            for item_id, price in prices.items():
+                entry = self.items.get(str(item_id))
+                if entry is None:
+                    continue
+                entry[field] = now
+                if entry.get("price") != price:
+                    entry["price"] = price
+                    changed[str(item_id)] = price
+        if changed:
+            self.schedule_save()
+            for item_id, price in changed.items():
+                self.notify(item_id, price)
+        return len(changed)
+
+    def touch(self, item_ids, field="last_update"):
+        """Mark prices as confirmed now, in memory only"""
+        now = time.time()
+        with self._lock:
+            for item_id in item_ids:
+                entry = self.items.get(str(item_id))
+                if entry is not None:
+                    entry[field] = now
+
+    def schedule_save(self):
+        """Mark the table dirty; bursts of changes within save_delay are written once"""
+        with self._lock:
+            self._dirty = True
+            if self.autosave and self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write the table to disk now if it has unsaved changes"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = json.dumps(self.items, indent=4, ensure_ascii=False)
+
+        # Write to a temporary file and swap it in, so a crash never leaves a half-written table
+        with self._save_lock:
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, 'w', encoding="utf-8") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving item data: {e}")
+                with self._lock:
+                    self._dirty = True
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def get_catalog():
+    """Shared catalog instance, loaded on first use"""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = ItemCatalog()
+        return _catalog
@@ -0,0 +1,171 @@
+"""
+Compiled item metadata for fast filtering in the drop view.
+Every ConfigBaseId gets a dense index into parallel arrays of names and category bits.
+Prices stay in the catalog, which changes them all the time. The many spellings of item types found in full_table.json, en_id_table.json and
+id_table.json ("Memory Glow" / "Memory Fluorescence" / 记忆荧光, "Boss Ticket" / "BOSS Ticket",
+...) are normalized once into one category bit each, so a filter is a bitmask ANDed with
+the category column of all selected rows at once instead of a string search through a list.
+"""
+
+import json
+from array import array
+
+import numpy as np
+
+# One bit per item category
+COMPASS = 1 << 0
+CURRENCY = 1 << 1
+HARD_CURRENCY = 1 << 2
+SPECIAL_ITEM = 1 << 3
+MEMORY_MATERIAL = 1 << 4
+EQUIPMENT_MATERIAL = 1 << 5
+GAMEPLAY_TICKET = 1 << 6
+MAP_TICKET = 1 << 7
+CUBE_MATERIAL = 1 << 8
+CORRUPTION_MATERIAL = 1 << 9
+DREAM_MATERIAL = 1 << 10
+TOWER_MATERIAL = 1 << 11
+BOSS_TICKET = 1 << 12
+MEMORY_GLOW = 1 << 13
+DIVINE_EMBLEM = 1 << 14
+OVERLAP_MATERIAL = 1 << 15
+OTHER = 1 << 16
+ALL = (1 << 17) - 1
+# What the drop view lists under "All"; items of an unknown type were never shown there
+LISTED = ALL & ~OTHER
+
+CATEGORY_NAMES = {
+    COMPASS: "Compass",
+    CURRENCY: "Currency",
+    HARD_CURRENCY: "Hard Currency",
+    SPECIAL_ITEM: "Special Item",
+    MEMORY_MATERIAL: "Memory Material",
+    EQUIPMENT_MATERIAL: "Equipment Material",
+    GAMEPLAY_TICKET: "Gameplay Ticket",
+    MAP_TICKET: "Map Ticket",
+    CUBE_MATERIAL: "Cube Material",
+    CORRUPTION_MATERIAL: "Corruption Material",
+    DREAM_MATERIAL: "Dream Material",
+    TOWER_MATERIAL: "Tower Material",
+    BOSS_TICKET: "BOSS Ticket",
+    MEMORY_GLOW: "Memory Glow",
+    DIVINE_EMBLEM: "Divine Emblem",
+    OVERLAP_MATERIAL: "Overlap Material",
+    OTHER: "Other",
+}
+
+# Every type spelling seen in the item tables, normalized by normalize_type()
+CATEGORY_ALIASES = {
+    "compass": COMPASS, "罗盘": COMPASS,
+    "currency": CURRENCY,
+    "hard currency": HARD_CURRENCY, "硬通货": HARD_CURRENCY,
+    "special item": SPECIAL_ITEM, "特殊道具": SPECIAL_ITEM,
+    "memory material": MEMORY_MATERIAL, "remembrance material": MEMORY_MATERIAL, "追忆材料": MEMORY_MATERIAL,
+    "equipment material": EQUIPMENT_MATERIAL, "ashes": EQUIPMENT_MATERIAL, "装备材料": EQUIPMENT_MATERIAL,
+    "gameplay ticket": GAMEPLAY_TICKET, "game ticket": GAMEPLAY_TICKET, "玩法门票": GAMEPLAY_TICKET,
+    "map ticket": MAP_TICKET, "地图门票": MAP_TICKET,
+    "cube material": CUBE_MATERIAL, "magic cube material": CUBE_MATERIAL, "魔方材料": CUBE_MATERIAL,
+    "corruption material": CORRUPTION_MATERIAL, "corrosion material": CORRUPTION_MATERIAL,
+    "erosion material": CORRUPTION_MATERIAL, "侵蚀材料": CORRUPTION_MATERIAL,
+    "dream material": DREAM_MATERIAL, "做梦材料": DREAM_MATERIAL,
+    "tower material": TOWER_MATERIAL, "高塔材料": TOWER_MATERIAL,
+    "boss ticket": BOSS_TICKET, "boss 门票": BOSS_TICKET,
+    "memory glow": MEMORY_GLOW, "memory fluorescence": MEMORY_GLOW, "记忆荧光": MEMORY_GLOW,
+    "divine emblem": DIVINE_EMBLEM, "god's emblem": DIVINE_EMBLEM, "神威纹章": DIVINE_EMBLEM,
+    "overlap material": OVERLAP_MATERIAL, "overlay material": OVERLAP_MATERIAL, "叠界材料": OVERLAP_MATERIAL,
+}
+
+def normalize_type(type_name):
+    """Category bit of an item type string in any of its spellings, OTHER if unknown"""
+    if not type_name:
+        return OTHER
+    key = " ".join(type_name.lower().split())
+    if key.endswith("s") and key not in CATEGORY_ALIASES:
+        # "Tower Materials", "Magic Cube Materials"
+        key = key[:-1]
+    return CATEGORY_ALIASES.get(key, OTHER)
+
+def category_name(type_name):
+    """Canonical name of an item type string"""
+    return CATEGORY_NAMES[normalize_type(type_name)]
+
+class ItemTable:
+    """Dense, array-backed item metadata: index by ConfigBaseId, then names and categories by index"""
+
+    def __init__(self):
+        self.index = {}             # item_id -> dense index
+        self.ids = []
+        self.names = []
+        self.categories = array("L")
+        self._category_column = None  # NumPy copy of categories for select(), rebuilt after add()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, item_id, name, type_name=None):
+        """Add an item or update it in place, returns its index"""
+        item_id = str(item_id)
+        idx = self.index.get(item_id)
+        category = normalize_type(type_name)
+        self._category_column = None
+        if idx is None:
+            idx = len(self.ids)
+            self.index[item_id] = idx
+            self.ids.append(item_id)
+            self.names.append(name)
+            self.categories.append(category)
+        else:
+            self.names[idx] = name
+            if type_name:
+                self.categories[idx] = category
+        return idx
+
+    def category(self, item_id):
+        """Category bit of an item, OTHER if it is not in the table"""
+        idx = self.index.get(item_id)
+        return self.categories[idx] if idx is not None else OTHER
+
+    @classmethod
+    def compile(cls, items):
+        """Table of a full_table.json style {item_id: {"name", "type", ...}} mapping"""
+        table = cls()
+        for item_id, entry in items.items():
+            table.add(item_id, entry.get("name", str(item_id)), entry.get("type"))
+        return table
+
+    def load_id_table(self, path):
+        """Add the items of en_id_table.json / id_table.json ({id: {name, type}}) or a
+        .conf table ("id name" per line) that are not in the table yet"""
+        try:
+            if path.endswith(".json"):
+                with open(path, "r", encoding="utf-8") as f:
+                    entries = {item_id: (entry.get("name"), entry.get("type")) for item_id, entry in json.load(f).items()}
+            else:
+                entries = {}
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        parts = line.strip().split(" ", 1)
+                        if len(parts) == 2:
+                            entries[parts[0]] = (parts[1], None)
+        except Exception as e:
+            print(f"Error loading item table {path}: {e}")
+            return 0
+        added = 0
+        for item_id, (name, type_name) in entries.items():
+            if str(item_id) not in self.index:
+                self.add(item_id, name, type_name)
+                added += 1
+        return added
+
+    def select(self, item_ids, mask):
+        """(item_id, index) of the given items that are known and in one of the categories in mask"""
+        index = self.index
+        item_ids = [item_id for item_id in item_ids if item_id in index]
+        if not item_ids:
+            return []
+        categories = self._category_column
+        if categories is None:
+            categories = self._category_column = np.array(self.categories, dtype=np.uint32)
+        indexes = np.fromiter((index[item_id] for item_id in item_ids), dtype=np.intp, count=len(item_ids))
+        keep = np.flatnonzero(categories[indexes] & mask)
+        return [(item_ids[i], int(indexes[i])) for i in keep]
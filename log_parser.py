@@ -0,0 +1,191 @@
+"""
+Single-pass tokenizer for UE_game.log chunks.
+Every chunk read from the log is scanned exactly once, line by line, and the lines the
+tracker cares about (bag changes, bag dumps, scene changes and exchange price searches)
+are turned into typed events for the handlers in index.py.
+"""
+
+import calendar
+import re
+from collections import namedtuple
+
+# Scene path of the hideout (refuge) every map run starts from and returns to
+HIDEOUT_SCENE = "/Game/Art/Maps/01SD/XZ_YuJinZhiXiBiNanSuo200/XZ_YuJinZhiXiBiNanSuo200.XZ_YuJinZhiXiBiNanSuo200"
+MAP_SCENE_PREFIX = "/Game/Art/Maps"
+
+# Typed events produced by the tokenizer. time is the log's own UTC timestamp of the line the
+# event came from (of the first line for exchange messages), None if it has none
+BagModify = namedtuple("BagModify", "page_id slot_id item_id num time", defaults=(None,))
+BagInit = namedtuple("BagInit", "page_id slot_id item_id num time", defaults=(None,))
+SceneChange = namedtuple("SceneChange", "last_scene next_scene time", defaults=(None,))
+PlayerLogin = namedtuple("PlayerLogin", "time", defaults=(None,))
+PriceQuery = namedtuple("PriceQuery", "syn_id item_id time", defaults=(None,))
+PriceResult = namedtuple("PriceResult", "syn_id values time", defaults=(None,))
+
+# Compiled once at import, matched only against lines that passed the cheap substring checks
+BAG_PATTERN = re.compile(r'BagMgr@:(Modfy BagItem|InitBagData) PageId = (\d+) SlotId = (\d+) ConfigBaseId = (\d+) Num = (\d+)')
+SCENE_PATTERN = re.compile(r"PageApplyBase@ _UpdateGameEnd: LastSceneName = World'([^']*)' NextSceneName = World'([^']*)'")
+SYNID_PATTERN = re.compile(r'XchgSearchPrice----SynId = (\d+)')
+REFER_PATTERN = re.compile(r'\+refer \[(\d+)\]')
+VALUE_PATTERN = re.compile(r'\+\d+\s+\[([\d.]+)\]')  # Match +number [x.x] format
+
+LOGIN_MARKERS = ("PlayerInitPkgMgr", "Login2Client")
+
+# Lines that still matter when catching up on a backlog; old exchange traffic is skipped
+CATCH_UP_MARKERS = (b"BagMgr@:", b"PageApplyBase@", b"PlayerInitPkgMgr", b"Login2Client")
+
+def filter_lines(data, markers=CATCH_UP_MARKERS):
+    """Only the lines of a block of complete lines that contain one of the markers.
+    Each marker is located with bytes.find, which skips the noise between hits at memchr
+    speed instead of splitting and decoding every line."""
+    spans = []
+    for marker in markers:
+        pos = data.find(marker)
+        while pos >= 0:
+            start = data.rfind(b"\n", 0, pos) + 1
+            end = data.find(b"\n", pos)
+            end = len(data) if end < 0 else end + 1
+            spans.append((start, end))
+            pos = data.find(marker, end)
+    if not spans:
+        return b""
+    # Put the lines of the different markers back in log order, once each
+    spans.sort()
+    kept = []
+    last_end = -1
+    for start, end in spans:
+        if start >= last_end:
+            kept.append(data[start:end])
+            last_end = end
+    return b"".join(kept)
+
+class LogClock:
+    """Timestamps of "[2025.10.22-14.00.19:080]..." log lines. Consecutive lines mostly share
+    the same second, so the date and time are only converted when that prefix changes and a
+    line in the same second only costs a string compare and the milliseconds."""
+
+    def __init__(self):
+        self._prefix = None   # "2025.10.22-14.00.19"
+        self._seconds = None
+        self._day = None      # "2025.10.22"
+        self._day_seconds = None
+
+    def parse(self, line):
+        """UTC seconds since the epoch of a log line, None without a timestamp"""
+        if len(line) < 25 or line[0] != "[" or line[24] != "]":
+            return None
+        try:
+            prefix = line[1:20]
+            if prefix != self._prefix:
+                day = prefix[:10]
+                if day != self._day:
+                    self._day_seconds = calendar.timegm((int(day[0:4]), int(day[5:7]), int(day[8:10]), 0, 0, 0))
+                    self._day = day
+                self._seconds = self._day_seconds + int(prefix[11:13]) * 3600 + int(prefix[14:16]) * 60 + int(prefix[17:19])
+                self._prefix = prefix
+            return self._seconds + int(line[21:24]) / 1000
+        except ValueError:
+            return None
+
+class LogParser:
+    """Tokenizer that keeps exchange messages open across chunks, so a price search whose
+    lines are split over two reads is still parsed as one block"""
+
+    def __init__(self):
+        # Exchange messages span several lines, so remember which block we are inside
+        self.send_syn_id = None
+        self.recv_syn_id = None
+        self.recv_values = []
+        self.block_time = None
+        self.clock = LogClock()
+
+    def snapshot(self):
+        """The open exchange block, so a checkpoint taken mid-block resumes inside it"""
+        return {"send_syn_id": self.send_syn_id, "recv_syn_id": self.recv_syn_id, "recv_values": list(self.recv_values),
+                "block_time": self.block_time}
+
+    def restore(self, data):
+        self.send_syn_id = data["send_syn_id"]
+        self.recv_syn_id = data["recv_syn_id"]
+        self.recv_values = list(data["recv_values"])
+        self.block_time = data.get("block_time")
+
+    def _close_block(self):
+        """Finish the open block, returns its PriceResult if it was a response"""
+        result = None
+        if self.recv_syn_id is not None:
+            result = PriceResult(self.recv_syn_id, self.recv_values, self.block_time)
+        self.send_syn_id = None
+        self.recv_syn_id = None
+        self.recv_values = []
+        self.block_time = None
+        return result
+
+    def tokenize(self, text):
+        """Scan a log chunk once and yield the typed events found in it, in log order"""
+        for line in text.splitlines():
+            if "----Socket" in line:
+                # Any socket marker closes the block that was open before it
+                result = self._close_block()
+                if result is not None:
+                    yield result
+
+                match = SYNID_PATTERN.search(line)
+                if not match:
+                    continue
+                if "RecvMessage" in line:
+                    self.recv_syn_id = match.group(1)
+                else:
+                    self.send_syn_id = match.group(1)
+                self.block_time = self.clock.parse(line)
+                line = line[match.end():]
+
+            elif "BagMgr@:" in line:
+                match = BAG_PATTERN.search(line)
+                if match:
+                    kind, page_id, slot_id, item_id, num = match.groups()
+                    event = BagModify if kind == "Modfy BagItem" else BagInit
+                    yield event(int(page_id), int(slot_id), item_id, int(num), self.clock.parse(line))
+                continue
+
+            elif "PageApplyBase@" in line:
+                match = SCENE_PATTERN.search(line)
+                if match:
+                    yield SceneChange(match.group(1), match.group(2), self.clock.parse(line))
+                continue
+
+            elif LOGIN_MARKERS[0] in line or LOGIN_MARKERS[1] in line:
+                yield PlayerLogin(self.clock.parse(line))
+                continue
+
+            # Lines inside an exchange message belong to the open block; values are
+            # collected as the lines stream by instead of re-searching the text per SynId
+            if self.recv_syn_id is not None:
+                if "[" in line:
+                    self.recv_values.extend(VALUE_PATTERN.findall(line))
+            elif self.send_syn_id is not None:
+                match = REFER_PATTERN.search(line)
+                if match:
+                    yield PriceQuery(self.send_syn_id, match.group(1), self.block_time)
+                    self.send_syn_id = None
+
+    def parse(self, text):
+        """Tokenize a chunk into a list of events; an unfinished block stays open for the next chunk"""
+        if not text:
+            return []
+        return list(self.tokenize(text))
+
+    def flush(self):
+        """Close an unfinished block at the end of the input, returns the remaining events"""
+        result = self._close_block()
+        return [result] if result is not None else []
+
+def parse_log_time(line):
+    """Seconds since the epoch of a single log line, None without a timestamp. The engine
+    writes these stamps in UTC. Use a LogClock to parse many lines."""
+    return LogClock().parse(line)
+
+def parse_log(text):
+    """Tokenize a self-contained chunk into a list of events, closing any block left open at its end"""
+    parser = LogParser()
+    return parser.parse(text) + parser.flush()
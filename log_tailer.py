@@ -0,0 +1,345 @@
+"""
+Event-driven tailer for UE_game.log.
+Instead of sleeping a fixed second between reads, the tailer waits for a change
+notification on the log directory (FindFirstChangeNotification on Windows, inotify on
+Linux) and falls back to adaptive polling where neither is available. Reads happen in
+bounded binary blocks and a partial trailing line is carried over to the next read, so an
+event that is half written when we read it is no longer lost. A line that grows beyond
+MAX_LINE_SIZE without a newline is skipped rather than held in memory.
+When the game truncates, recreates or rotates the log the tailer notices and reopens it,
+and it can resume from a given (inode, offset), e.g. of a checkpoint, after a restart.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+try:
+    import msvcrt
+    import win32con
+    import win32event
+    import win32file
+except ImportError:
+    win32file = None
+
+BLOCK_SIZE = 1024 * 1024
+HEAD_SIZE = 256
+# No line the tracker reads comes close to this; a longer one is skipped up to its newline
+MAX_LINE_SIZE = 4 * BLOCK_SIZE
+DEFAULT_MIN_LATENCY = 0.05
+DEFAULT_MAX_LATENCY = 5.0
+
+class PollWatcher:
+    """Fallback watcher that polls the file size and mtime, backing off while idle"""
+
+    def __init__(self, path, min_interval=DEFAULT_MIN_LATENCY, max_interval=1.0):
+        self.path = path
+        self.min_interval = max(min_interval, 0.01)
+        self.max_interval = max(max_interval, self.min_interval)
+        self.interval = self.min_interval
+        self.last = self._stat()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+            return st.st_size, st.st_mtime_ns, st.st_ino
+        except OSError:
+            return None
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self._stat()
+            if current != self.last:
+                self.last = current
+                self.interval = self.min_interval
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            time.sleep(min(self.interval, remaining))
+            self.interval = min(self.interval * 2, self.max_interval)
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """Linux watcher on the log's directory using inotify through libc"""
+
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.name = os.fsencode(os.path.basename(path))
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = (self.IN_MODIFY | self.IN_ATTRIB | self.IN_CLOSE_WRITE | self.IN_MOVED_FROM
+                | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE)
+        directory = os.path.dirname(os.path.abspath(path))
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def _drain(self):
+        """Read pending notifications, True if any of them is about our file"""
+        relevant = False
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            if not data:
+                return relevant
+            offset = 0
+            while offset < len(data):
+                _, _, _, length = struct.unpack_from("iIII", data, offset)
+                name = data[offset + 16:offset + 16 + length].rstrip(b"\0")
+                if name == self.name:
+                    relevant = True
+                offset += 16 + length
+
+    def wait(self, timeout):
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return False
+            if self._drain():
+                return True
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+class Win32Watcher:
+    """Windows watcher using a directory change notification handle"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        flags = win32con.FILE_NOTIFY_CHANGE_SIZE | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE | win32con.FILE_NOTIFY_CHANGE_FILE_NAME
+        self.handle = win32file.FindFirstChangeNotification(directory, False, flags)
+
+    def wait(self, timeout):
+        result = win32event.WaitForSingleObject(self.handle, int(timeout * 1000))
+        if result == win32event.WAIT_OBJECT_0:
+            win32file.FindNextChangeNotification(self.handle)
+            return True
+        return False
+
+    def close(self):
+        if self.handle is not None:
+            win32file.FindCloseChangeNotification(self.handle)
+            self.handle = None
+
+def open_shared(path):
+    """Open the log for reading without stopping the game from deleting or renaming it"""
+    if sys.platform == "win32" and win32file is not None:
+        share = win32con.FILE_SHARE_READ | win32con.FILE_SHARE_WRITE | win32con.FILE_SHARE_DELETE
+        handle = win32file.CreateFile(path, win32con.GENERIC_READ, share, None, win32con.OPEN_EXISTING, 0, None)
+        fd = msvcrt.open_osfhandle(handle.Detach(), os.O_RDONLY)
+        return os.fdopen(fd, "rb")
+    return open(path, "rb")
+
+def create_watcher(path, min_latency=DEFAULT_MIN_LATENCY, max_latency=DEFAULT_MAX_LATENCY, use_notifications=True):
+    """Best change notification available on this platform, or a polling watcher"""
+    if use_notifications:
+        try:
+            if sys.platform == "win32" and win32file is not None:
+                return Win32Watcher(path)
+            if sys.platform.startswith("linux"):
+                return InotifyWatcher(path)
+        except Exception as e:
+            print(f"Change notifications unavailable, polling the log instead: {e}")
+    return PollWatcher(path, min_latency, max_latency)
+
+class LogTailer:
+    """Follow a growing log file and return only complete lines"""
+
+    def __init__(self, path, min_latency=DEFAULT_MIN_LATENCY, max_latency=DEFAULT_MAX_LATENCY,
+                 block_size=BLOCK_SIZE, from_end=True, use_notifications=True,
+                 resume=None, max_line_size=MAX_LINE_SIZE):
+        self.path = path
+        self.min_latency = min_latency
+        self.max_latency = max_latency
+        self.block_size = block_size
+        self.max_line_size = max_line_size
+        self._carry = b""
+        self._skip_line = False  # dropping the rest of an overlong line
+        self._file = None
+        self._inode = None
+        self._head = b""
+        # (inode, offset) to start from if it is still the same file, e.g. from a checkpoint
+        self._resume = resume
+        self._open(from_end)
+        self._watcher = create_watcher(path, min_latency, max_latency, use_notifications)
+
+    def _open(self, from_end=False):
+        """Open the current file at path, resuming from the given offset when it still applies"""
+        self._file = open_shared(self.path)
+        self._inode = os.fstat(self._file.fileno()).st_ino
+        self._carry = b""
+        self._skip_line = False
+        self._head = self._read_head()
+        size = os.fstat(self._file.fileno()).st_size
+
+        saved = self._resume
+        self._resume = None
+        self.resumed = bool(saved and saved[0] == self._inode and saved[1] <= size)
+        if self.resumed:
+            self._file.seek(saved[1])
+            print(f"Resuming log from byte {saved[1]} of {size}")
+        elif from_end:
+            self._file.seek(0, 2)
+
+    def _read_head(self):
+        """First bytes of the file, used to notice a truncate-and-rewrite of the same size"""
+        position = self._file.tell()
+        self._file.seek(0)
+        head = self._file.read(HEAD_SIZE)
+        self._file.seek(position)
+        return head
+
+    @property
+    def offset(self):
+        """Byte offset of the first byte not yet returned as a complete line"""
+        return self._file.tell() - len(self._carry)
+
+    def wait(self, timeout=None):
+        """Block until the log changes or the timeout (max_latency by default) expires"""
+        if timeout is None:
+            timeout = self.max_latency
+        changed = self._watcher.wait(timeout)
+        if changed and self.min_latency > 0:
+            # Give the game a moment to finish the burst so it lands in one read
+            time.sleep(self.min_latency)
+        return changed
+
+    def _check_file(self):
+        """Handle truncation in place, returns True if the path now points at a different file"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            # Deleted or mid-rotation, keep reading the old handle until the new file shows up
+            return False
+        if st.st_ino != self._inode and st.st_ino and self._inode:
+            return True
+        truncated = st.st_size < self._file.tell()
+        if not truncated:
+            # Same or larger size, but a rewritten file no longer starts with the bytes we saw
+            head = self._read_head()
+            truncated = not head.startswith(self._head)
+            self._head = head
+        if truncated:
+            print(f"Log file was truncated ({st.st_size} bytes), reading from the start")
+            self._file.seek(0)
+            self._carry = b""
+            self._skip_line = False
+            self._head = self._read_head()
+        return False
+
+    def backlog(self):
+        """Bytes written to the log that have not been read yet"""
+        try:
+            return max(os.fstat(self._file.fileno()).st_size - self.offset, 0)
+        except OSError:
+            return 0
+
+    def seek(self, offset):
+        """Continue reading the current file from a byte offset (at a line start)"""
+        self._file.seek(offset)
+        self._carry = b""
+        self._skip_line = False
+
+    def _read_available(self, line_filter=None, filter_until=None):
+        while True:
+            data = self._file.read(self.block_size)
+            if not data:
+                return
+            if self._skip_line:
+                end = data.find(b"\n")
+                if end < 0:
+                    continue
+                data = data[end + 1:]
+                self._skip_line = False
+            if self._carry:
+                data = self._carry + data
+            cut = data.rfind(b"\n")
+            if cut < 0:
+                if len(data) > self.max_line_size:
+                    print(f"Skipping a log line longer than {self.max_line_size} bytes")
+                    self._carry = b""
+                    self._skip_line = True
+                else:
+                    # No complete line yet, keep everything for the next read
+                    self._carry = data
+                continue
+            self._carry = data[cut + 1:]
+            block = data[:cut + 1]
+            if line_filter is not None:
+                block = self._filter_block(block, line_filter, filter_until)
+            yield block.decode("utf-8", errors="replace")
+
+    def _filter_block(self, block, line_filter, filter_until):
+        """Filter the lines of a block that start before filter_until, the rest stay whole"""
+        if filter_until is None:
+            return line_filter(block)
+        split = filter_until - (self.offset - len(block))
+        if split <= 0:
+            return block
+        if split >= len(block):
+            return line_filter(block)
+        # The line filter_until falls in is kept whole
+        split = block.rfind(b"\n", 0, split) + 1
+        return line_filter(block[:split]) + block[split:]
+
+    def read_blocks(self, line_filter=None, filter_until=None):
+        """Yield the newly appended complete lines, at most block_size bytes at a time.
+        line_filter, if given, gets each block as bytes and returns the part to keep;
+        with filter_until it only applies to the lines before that byte offset."""
+        rotated = self._check_file()
+        yield from self._read_available(line_filter, filter_until)
+        if not rotated:
+            return
+
+        # The old file is finished, its last line is complete even without a newline
+        if self._carry:
+            yield self._carry.decode("utf-8", errors="replace") + "\n"
+        print("Log file was replaced, reopening")
+        self._file.close()
+        self._open()
+        yield from self._read_available(line_filter)
+
+    def read(self):
+        """All complete lines appended since the last read"""
+        return "".join(self.read_blocks())
+
+    def poll(self, timeout=None):
+        """Wait for a change, then return what was appended"""
+        self.wait(timeout)
+        return self.read()
+
+    @property
+    def inode(self):
+        return self._inode
+
+    def close(self):
+        self._watcher.close()
+        self._file.close()
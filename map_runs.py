@@ -0,0 +1,81 @@
+"""
+Map run segmentation.
+A small state machine over the PageApplyBase@ _UpdateGameEnd scene changes decides when a
+map run starts and ends. Scene changes are applied one at a time in log order, so entering
+and leaving within one chunk is handled the same as in separate chunks, and run times come
+from the timestamps in the log rather than from when the line happened to be read.
+
+Hub scenes (the hideout by default) are where runs start from and end in; any other scene
+under /Game/Art/Maps entered from a hub starts a run, and moving between map scenes without
+passing a hub stays in the same run.
+"""
+
+from collections import namedtuple
+
+from log_parser import HIDEOUT_SCENE, MAP_SCENE_PREFIX
+
+# Not in a run yet and no hub seen, e.g. right after starting on an old log
+UNKNOWN = "unknown"
+HUB = "hub"
+MAP = "map"
+
+ENTER = "enter"
+EXIT = "exit"
+
+# One finished map run, values in the tracker's tax setting
+MapRun = namedtuple("MapRun", "index scene name start end duration gains consumption income")
+
+def scene_name(scene):
+    """Short name of a scene path, "/Game/Art/Maps/04DC/DC_DiXiaCheng000/DC_DiXiaCheng000.DC_DiXiaCheng000" -> "DC_DiXiaCheng000" """
+    if not scene:
+        return scene
+    return scene.rsplit("/", 1)[-1].split(".", 1)[0]
+
+class MapRunMachine:
+    """Hub / map state of the player, fed with SceneChange events"""
+
+    def __init__(self, hub_scenes=None):
+        # Hubs can be given as full scene paths or short names
+        self.hubs = frozenset(scene_name(scene) for scene in (hub_scenes or (HIDEOUT_SCENE,)))
+        self.state = UNKNOWN
+        self.scene = None   # scene the current run was entered with
+        self.start = None   # log time the current run started
+
+    def is_hub(self, scene):
+        return scene_name(scene) in self.hubs
+
+    def is_map(self, scene):
+        return scene.startswith(MAP_SCENE_PREFIX) and not self.is_hub(scene)
+
+    def feed(self, event):
+        """Apply one scene change, returns ENTER, EXIT or None"""
+        if self.is_hub(event.next_scene):
+            was_in_map = self.state == MAP
+            self.state = HUB
+            return EXIT if was_in_map else None
+        if self.is_map(event.next_scene) and self.state != MAP:
+            if self.state == HUB or self.is_hub(event.last_scene):
+                self.state = MAP
+                self.scene = event.next_scene
+                self.start = event.time
+                return ENTER
+        return None
+
+    def assume(self, event):
+        """Take the state after a scene change without reporting a transition, e.g. when the
+        bag is rebuilt from an old log. Returns True if that leaves the player in a map."""
+        if self.is_hub(event.next_scene):
+            self.state = HUB
+        elif self.is_map(event.next_scene):
+            self.state = MAP
+            self.scene = event.next_scene
+            self.start = event.time
+        return self.state == MAP
+
+    def snapshot(self):
+        return {"state": self.state, "scene": self.scene, "start": self.start}
+
+    def restore(self, data):
+        self.state = data["state"]
+        self.scene = data["scene"]
+        self.start = data["start"]
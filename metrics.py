@@ -0,0 +1,172 @@
+"""
+Cheap always-on instrumentation for the log thread.
+Each stage of a tick (read, parse, bag diff, drops, prices, persistence, network, UI) is
+timed into a fixed-size power-of-two histogram, bytes and lines per tick are recorded the
+same way, and queue depths are sampled from registered gauges. The numbers are shown in
+the Stats panel, dumped to a file every so often, and a cProfile run of the log thread
+can be switched on and off while the tool is running.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+STATS_PATH = "tick_stats.txt"
+PROFILE_PATH = "profile.prof"
+
+class Histogram:
+    """Counts per power-of-two bucket of `unit`, so adding a value is O(1) and memory is fixed"""
+
+    BUCKETS = 48
+
+    def __init__(self, unit=1.0):
+        self.unit = unit
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, value):
+        bucket = min(int(value / self.unit).bit_length(), self.BUCKETS - 1)
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += value
+        self.last = value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min((1 << bucket) * self.unit, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "last": self.last,
+            "total": self.total,
+        }
+
+class TickStats:
+    """Stage timings, per-tick sizes and queue depths of the tracking pipeline"""
+
+    def __init__(self):
+        self.stages = {}   # stage name -> Histogram of seconds
+        self.values = {}   # value name -> Histogram of per-tick amounts
+        self.gauges = {}   # gauge name -> callable returning the current depth
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._last_dump = time.monotonic()
+        self.profile_requested = False
+        self._profiler = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.stages.get(name)
+            if histogram is None:
+                # 1 microsecond resolution, the top bucket is far beyond any sane tick
+                histogram = self.stages[name] = Histogram(1e-6)
+            histogram.add(seconds)
+
+    def observe(self, name, value):
+        with self._lock:
+            histogram = self.values.get(name)
+            if histogram is None:
+                histogram = self.values[name] = Histogram(1)
+            histogram.add(value)
+
+    def add_gauge(self, name, read):
+        self.gauges[name] = read
+
+    def snapshot(self):
+        with self._lock:
+            stages = {name: h.summary() for name, h in self.stages.items()}
+            values = {name: h.summary() for name, h in self.values.items()}
+        gauges = {}
+        for name, read in self.gauges.items():
+            try:
+                gauges[name] = read()
+            except Exception as e:
+                gauges[name] = f"error: {e}"
+        return {"uptime": time.time() - self.started, "stages": stages, "values": values,
+                "gauges": gauges, "profiling": self._profiler is not None}
+
+    def format(self):
+        """Human readable report of snapshot()"""
+        snap = self.snapshot()
+        lines = [f"Uptime {round(snap['uptime'])}s" + (", profiling" if snap["profiling"] else "")]
+        lines.append(f"{'stage':<10}{'count':>8}{'mean ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'total s':>10}")
+        for name, s in sorted(snap["stages"].items()):
+            lines.append(f"{name:<10}{s['count']:>8}{s['mean'] * 1000:>10.3f}{s['p50'] * 1000:>10.3f}"
+                         f"{s['p99'] * 1000:>10.3f}{s['max'] * 1000:>10.3f}{s['total']:>10.2f}")
+        for name, s in sorted(snap["values"].items()):
+            lines.append(f"{name} per tick: mean {round(s['mean'], 1)}, p99 {s['p99']}, max {s['max']}, "
+                         f"last {s['last']}, total {round(s['total'])}")
+        for name, depth in sorted(snap["gauges"].items()):
+            lines.append(f"{name}: {depth}")
+        return "\n".join(lines)
+
+    def maybe_dump(self, path=STATS_PATH, interval=60.0):
+        """Write the report to path at most once per interval (0 disables)"""
+        now = time.monotonic()
+        if not interval or now - self._last_dump < interval:
+            return False
+        self._last_dump = now
+        self.dump(path)
+        return True
+
+    def dump(self, path=STATS_PATH):
+        try:
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(time.strftime("%Y-%m-%d %H:%M:%S") + "\n" + self.format() + "\n")
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error writing {path}: {e}")
+
+    def set_profiling(self, enabled):
+        """Ask the profiled thread to start or stop cProfile on its next update_profiler()"""
+        self.profile_requested = enabled
+
+    def update_profiler(self, path=PROFILE_PATH):
+        """Called from the thread to profile; cProfile only sees the thread that enables it"""
+        if self.profile_requested and self._profiler is None:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            print("Profiling the log thread")
+        elif not self.profile_requested and self._profiler is not None:
+            profiler = self._profiler
+            self._profiler = None
+            profiler.disable()
+            try:
+                profiler.dump_stats(path)
+                out = io.StringIO()
+                pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(20)
+                print(out.getvalue())
+                print(f"Profile saved to {path}")
+            except Exception as e:
+                print(f"Error saving profile: {e}")
@@ -0,0 +1,132 @@
+"""
+Orderbook statistics of exchange search results.
+The "+n [price]" listings of an XchgSearchPrice response are turned into one sorted NumPy
+array, and everything the overlay asks about the item afterwards (quantiles, a price with
+outliers rejected, what selling N of it right now is worth) is answered from that array
+and its cumulative sums, cached per item for a while instead of going back to the log text.
+
+The log lists one price per listing without the quantity on offer, so every listing counts
+as one unit of depth.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+# Listings outside the quartiles by more than this many interquartile ranges are ignored
+OUTLIER_IQR = 1.5
+
+class Orderbook:
+    """Sorted listing prices of one search result and statistics over them"""
+
+    def __init__(self, values, time_seen=None):
+        prices = np.asarray(values, dtype=np.float64)
+        prices = np.sort(prices[np.isfinite(prices) & (prices > 0)])
+        self.time = time_seen if time_seen is not None else time.time()
+        self.prices = prices
+        if prices.size:
+            self.quantiles = np.quantile(prices, QUANTILES)
+            q1, q3 = np.quantile(prices, (0.25, 0.75))
+            spread = (q3 - q1) * OUTLIER_IQR
+            self.clean = prices[(prices >= q1 - spread) & (prices <= q3 + spread)]
+        else:
+            self.quantiles = None
+            self.clean = prices
+        self._cost = np.cumsum(self.clean)
+
+    def __len__(self):
+        return int(self.prices.size)
+
+    @property
+    def depth(self):
+        """Listings left after outlier rejection"""
+        return int(self.clean.size)
+
+    def quantile(self, q):
+        if not self.prices.size:
+            return None
+        return float(np.quantile(self.prices, q))
+
+    def robust_price(self):
+        """Median of the listings without outliers"""
+        if not self.clean.size:
+            return None
+        return float(np.median(self.clean))
+
+    def fill_prices(self, quantities):
+        """Average price per unit of taking the `quantity` cheapest listings, for every quantity.
+        Beyond the depth of the book the remaining units are counted at the last listing."""
+        quantities = np.maximum(np.asarray(quantities, dtype=np.int64), 1)
+        if not self.clean.size:
+            return np.full(quantities.shape, np.nan)
+        depth = self.clean.size
+        taken = np.minimum(quantities, depth)
+        cost = self._cost[taken - 1] + (quantities - taken) * self.clean[-1]
+        return cost / quantities
+
+    def fill_price(self, quantity):
+        if not self.clean.size:
+            return None
+        return float(self.fill_prices([quantity])[0])
+
+    def sell_now(self, quantity):
+        """What selling `quantity` units at the prices of the cheapest listings would bring"""
+        price = self.fill_price(quantity)
+        return None if price is None else price * max(quantity, 1)
+
+    def summary(self):
+        return {
+            "time": self.time,
+            "listings": len(self),
+            "depth": self.depth,
+            "quantiles": (dict(zip(QUANTILES, (round(float(q), 4) for q in self.quantiles)))
+                          if self.quantiles is not None else None),
+            "robust_price": self.robust_price(),
+        }
+
+class OrderbookCache:
+    """Latest orderbook per item, valid for ttl seconds after it was seen.
+    clock gives the current time on the same clock the books are stamped with, e.g. the
+    tracker's log time, so a replay or a lagging log does not expire them all at once."""
+
+    def __init__(self, ttl=600.0, clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+        self._books = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._books)
+
+    def update(self, item_id, values, time_seen=None):
+        book = Orderbook(values, time_seen if time_seen is not None else self.clock())
+        with self._lock:
+            self._books[str(item_id)] = book
+        return book
+
+    def get(self, item_id, now=None):
+        """Cached orderbook of an item, None if there is none or it expired"""
+        now = now if now is not None else self.clock()
+        with self._lock:
+            book = self._books.get(str(item_id))
+            if book is None:
+                return None
+            if now - book.time > self.ttl:
+                del self._books[str(item_id)]
+                return None
+            return book
+
+    def sell_now(self, item_id, quantity, now=None):
+        book = self.get(item_id, now)
+        return book.sell_now(quantity) if book is not None else None
+
+    def prune(self, now=None):
+        """Drop every expired orderbook, returns how many were dropped"""
+        now = now if now is not None else self.clock()
+        with self._lock:
+            expired = [item_id for item_id, book in self._books.items() if now - book.time > self.ttl]
+            for item_id in expired:
+                del self._books[item_id]
+        return len(expired)
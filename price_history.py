@@ -0,0 +1,250 @@
+"""
+Per-item price history.
+Every price seen for an item, from an exchange search in the log or from the price server,
+is appended to a fixed-size ring buffer of (time, price, depth) in parallel arrays instead
+of overwriting the single price in full_table.json. A drop is valued at the price in effect
+when it dropped, and the history answers "price at time t" with a binary search and window
+statistics (median, depth-weighted average) over a slice, so long histories stay cheap.
+
+How an exchange search result (the "+n [price]" listings, cheapest first) becomes one price
+is configurable:
+    mean30        mean of the 30 cheapest listings (what the tracker always did)
+    median        median of the 30 cheapest listings
+    trimmed_mean  mean of the 30 cheapest listings without the lowest and highest 10%
+The listings carry no quantities, so a volume-weighted average is taken over the history
+instead: vwap() weights every recorded price by the number of listings it came from.
+
+The history is saved to price_history.json as base64 encoded arrays.
+"""
+
+import base64
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from array import array
+
+HISTORY_PATH = "price_history.json"
+ORDERBOOK_DEPTH = 30
+DEFAULT_ESTIMATOR = "mean30"
+
+def mean30(values):
+    return sum(values) / len(values)
+
+def median(values):
+    return statistics.median(values)
+
+def trimmed_mean(values, cut=0.1):
+    values = sorted(values)
+    k = int(len(values) * cut)
+    if k and len(values) > 2 * k:
+        values = values[k:-k]
+    return sum(values) / len(values)
+
+ESTIMATORS = {"mean30": mean30, "median": median, "trimmed_mean": trimmed_mean}
+
+def estimate_price(values, estimator=DEFAULT_ESTIMATOR):
+    """One price out of the listings of a search result, None if there are none"""
+    values = [float(value) for value in values[:ORDERBOOK_DEPTH]]
+    if not values:
+        return None
+    return ESTIMATORS[estimator](values)
+
+def _pack(values):
+    data = array("d", values)
+    if sys.byteorder == "big":
+        data.byteswap()
+    return base64.b64encode(data.tobytes()).decode("ascii")
+
+def _unpack(text):
+    data = array("d")
+    data.frombytes(base64.b64decode(text))
+    if sys.byteorder == "big":
+        data.byteswap()
+    return data
+
+class PriceSeries:
+    """Ring buffer of the last `capacity` prices of one item, oldest first in logical order"""
+
+    def __init__(self, capacity=256):
+        self.capacity = capacity
+        self.times = array("d")
+        self.prices = array("d")
+        self.depths = array("d")
+        self._start = 0     # physical index of the oldest entry once the buffer is full
+
+    def __len__(self):
+        return len(self.times)
+
+    def _index(self, i):
+        return (self._start + i) % self.capacity if len(self.times) == self.capacity else i
+
+    def append(self, t, price, depth=1):
+        if self.times and t < self.times[self._index(len(self.times) - 1)]:
+            # Older than the newest entry, e.g. a log price read after a server price
+            self._insert(t, price, depth)
+            return
+        if len(self.times) < self.capacity:
+            self.times.append(t)
+            self.prices.append(price)
+            self.depths.append(depth)
+        else:
+            self.times[self._start] = t
+            self.prices[self._start] = price
+            self.depths[self._start] = depth
+            self._start = (self._start + 1) % self.capacity
+
+    def _insert(self, t, price, depth):
+        """Put an entry at its place in time order, the buffer stays sorted for the search"""
+        position = self._count_until(t)
+        if position == 0 and len(self.times) == self.capacity:
+            # Older than everything kept, it would be the first to go
+            return
+        times, prices, depths = (array("d", column) for column in self.window(None, None))
+        times.insert(position, t)
+        prices.insert(position, price)
+        depths.insert(position, depth)
+        if len(times) > self.capacity:
+            del times[0], prices[0], depths[0]
+        self.times, self.prices, self.depths = times, prices, depths
+        self._start = 0
+
+    def last(self):
+        """(time, price) of the newest entry, None if empty"""
+        if not self.times:
+            return None
+        i = self._index(len(self.times) - 1)
+        return self.times[i], self.prices[i]
+
+    def _count_until(self, t, inclusive=True):
+        """Number of entries with a time <= t (< t if not inclusive)"""
+        lo, hi = 0, len(self.times)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            time_mid = self.times[self._index(mid)]
+            if time_mid <= t if inclusive else time_mid < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def at(self, t, default=None):
+        """Price in effect at time t: the last one recorded at or before t"""
+        n = self._count_until(t)
+        if n == 0:
+            return default
+        return self.prices[self._index(n - 1)]
+
+    def window(self, start, end):
+        """(times, prices, depths) recorded in [start, end]"""
+        first = self._count_until(start, inclusive=False) if start is not None else 0
+        last = self._count_until(end) if end is not None else len(self.times)
+        indexes = [self._index(i) for i in range(first, last)]
+        return ([self.times[i] for i in indexes], [self.prices[i] for i in indexes],
+                [self.depths[i] for i in indexes])
+
+    def median(self, start=None, end=None):
+        _, prices, _ = self.window(start, end)
+        return statistics.median(prices) if prices else None
+
+    def vwap(self, start=None, end=None):
+        """Average of the prices in [start, end], weighted by the listings each came from"""
+        _, prices, depths = self.window(start, end)
+        total = sum(depths)
+        if not total:
+            return None
+        return sum(price * depth for price, depth in zip(prices, depths)) / total
+
+    def to_dict(self):
+        times, prices, depths = self.window(None, None)
+        return {"t": _pack(times), "p": _pack(prices), "d": _pack(depths)}
+
+    @classmethod
+    def from_dict(cls, data, capacity=256):
+        series = cls(capacity)
+        for t, price, depth in zip(_unpack(data["t"]), _unpack(data["p"]), _unpack(data["d"])):
+            series.append(t, price, depth)
+        return series
+
+class PriceHistory:
+    """Price series of every item, shared by the log thread and the price sync thread"""
+
+    def __init__(self, path=HISTORY_PATH, capacity=256, estimator=DEFAULT_ESTIMATOR):
+        if estimator not in ESTIMATORS:
+            print(f"Unknown price estimator {estimator}, using {DEFAULT_ESTIMATOR}")
+            estimator = DEFAULT_ESTIMATOR
+        self.path = path
+        self.capacity = capacity
+        self.estimator = estimator
+        self.series = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def __len__(self):
+        return len(self.series)
+
+    def get(self, item_id):
+        return self.series.get(str(item_id))
+
+    def record(self, item_id, price, t=None, depth=1):
+        """Append a price for an item"""
+        item_id = str(item_id)
+        with self._lock:
+            series = self.series.get(item_id)
+            if series is None:
+                series = self.series[item_id] = PriceSeries(self.capacity)
+            series.append(t if t is not None else time.time(), float(price), depth)
+            self._dirty = True
+
+    def record_listings(self, item_id, values, t=None):
+        """Turn the listings of an exchange search into one price with the configured estimator
+        and record it. Returns the price, or None if the search found nothing."""
+        price = estimate_price(values, self.estimator)
+        if price is not None:
+            self.record(item_id, price, t, depth=min(len(values), ORDERBOOK_DEPTH))
+        return price
+
+    def price_at(self, item_id, t, default=None):
+        """Price of an item in effect at time t"""
+        with self._lock:
+            series = self.series.get(str(item_id))
+            return series.at(t, default) if series is not None else default
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            return 0
+        with self._lock:
+            self.series = {item_id: PriceSeries.from_dict(series, self.capacity)
+                           for item_id, series in data.get("items", {}).items()}
+        return len(self.series)
+
+    def maybe_flush(self, interval=60.0):
+        """Save at most once per interval, and only after something was recorded"""
+        if time.monotonic() - self._last_flush >= interval:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._dirty:
+                return
+            self._dirty = False
+            data = {"version": 1, "items": {item_id: series.to_dict() for item_id, series in self.series.items()}}
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving {self.path}: {e}")
+            with self._lock:
+                self._dirty = True
@@ -0,0 +1,172 @@
+"""
+Background submission of exchange prices to the price server.
+Prices found in the log are queued instead of being sent from the log thread. A worker
+thread coalesces repeated prices for the same item, sends each batch over one pooled
+keep-alive Session, backs off exponentially while the server fails, and spills unsent
+prices to disk so they survive going offline or closing the tool.
+"""
+
+import json
+import os
+import threading
+import time
+
+import requests as rq
+from requests.adapters import HTTPAdapter
+
+SPOOL_PATH = "price_spool.json"
+
+class PriceSubmitter:
+    """Queue of {item_id: price} submissions drained by a background worker"""
+
+    def __init__(self, base_url, get_user, batch_interval=2.0, timeout=10,
+                 min_backoff=5.0, max_backoff=600.0, spool_path=SPOOL_PATH, session=None, stats=None):
+        self.base_url = base_url.rstrip("/")
+        self.get_user = get_user
+        self.batch_interval = batch_interval
+        self.timeout = timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.spool_path = spool_path
+        self.session = session or self._create_session()
+        self.stats = stats
+        self.pending = {}
+        self.in_flight = {}
+        self.backoff = 0
+        self.sent = 0
+        self.failed = 0
+        self._spooled = False  # the spool file holds prices that may since have been sent
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+        self._load_spool()
+
+    @staticmethod
+    def _create_session():
+        session = rq.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def submit(self, item_id, price):
+        """Queue a price, replacing any price for the same item that has not been sent yet"""
+        with self._condition:
+            self.pending[str(item_id)] = price
+            self._condition.notify()
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self.pending)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="price-submitter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Stop the worker and keep whatever is still unsent on disk"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread:
+            self._thread.join(timeout)
+        self._save_spool()
+
+    def _take_batch(self):
+        """Wait for the first price, then for the batch interval (or backoff delay), and take everything queued"""
+        with self._condition:
+            while self._running and not self.pending:
+                self._condition.wait()
+            deadline = time.monotonic() + (self.backoff or self.batch_interval)
+            while self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            if not self._running:
+                # Leave the queue alone, stop() spills it to disk
+                return {}
+            batch = self.pending
+            self.pending = {}
+            self.in_flight = batch
+            return batch
+
+    def _run(self):
+        while self._running:
+            batch = self._take_batch()
+            if not batch:
+                continue
+            failed = self.send_batch(batch)
+            with self._condition:
+                self.in_flight = {}
+                # Anything queued meanwhile is newer than what failed
+                for item_id, price in failed.items():
+                    self.pending.setdefault(item_id, price)
+            if failed:
+                self.backoff = min(max(self.backoff * 2, self.min_backoff), self.max_backoff)
+                print(f"Price submission failed for {len(failed)} items, retrying in {self.backoff}s")
+                self._save_spool()
+            else:
+                if self.backoff or self._spooled:
+                    self._save_spool()
+                self.backoff = 0
+
+    def send_batch(self, batch):
+        """Send a batch, returns the {item_id: price} entries that could not be sent"""
+        # The server takes one item per request; the batch shares one pooled connection
+        user = self.get_user()
+        failed = {}
+        items = list(batch.items())
+        for index, (item_id, price) in enumerate(items):
+            start = time.perf_counter()
+            try:
+                r = self.session.get(f"{self.base_url}/submit",
+                                     params={"user": user, "ids": item_id, "new_price": price},
+                                     timeout=self.timeout)
+                r.raise_for_status()
+                print(r.json())
+                self.sent += 1
+            except Exception as e:
+                print(e)
+                self.failed += 1
+                # The server is unreachable, don't hammer it with the rest of the batch
+                failed.update(items[index:])
+                break
+            finally:
+                if self.stats:
+                    self.stats.record("submit", time.perf_counter() - start)
+        return failed
+
+    def _load_spool(self):
+        if not self.spool_path or not os.path.exists(self.spool_path):
+            return
+        try:
+            with open(self.spool_path, "r", encoding="utf-8") as f:
+                self.pending.update(json.load(f))
+            self._spooled = True
+            print(f"Loaded {len(self.pending)} unsent prices from {self.spool_path}")
+        except Exception as e:
+            print(f"Error loading unsent prices: {e}")
+
+    def _save_spool(self):
+        """Write the unsent prices to disk, or remove the spool once everything went out"""
+        if not self.spool_path:
+            return
+        with self._condition:
+            # A batch still being sent when we stop is not known to have arrived
+            pending = dict(self.in_flight)
+            pending.update(self.pending)
+        try:
+            if not pending:
+                if os.path.exists(self.spool_path):
+                    os.remove(self.spool_path)
+                self._spooled = False
+                return
+            tmp_path = self.spool_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(pending, f, ensure_ascii=False)
+            os.replace(tmp_path, self.spool_path)
+            self._spooled = True
+        except Exception as e:
+            print(f"Error saving unsent prices: {e}")
@@ -0,0 +1,88 @@
+"""
+Incremental price sync with the price server.
+Requests are conditional (If-None-Match / If-Modified-Since), so an unchanged price list
+costs a 304 instead of a full download, which still confirms the prices of the last list.
+Of a new list only the items whose server price differs from the catalog are applied, and
+full_table.json is only rewritten when a price actually changed.
+"""
+
+import time
+
+import requests as rq
+
+class PriceSync:
+    """Pulls /get from the price server into an ItemCatalog"""
+
+    def __init__(self, base_url, catalog, timeout=10, session=None, history=None):
+        self.base_url = base_url.rstrip("/")
+        self.catalog = catalog
+        self.history = history  # optional PriceHistory that also gets every moved price
+        self.timeout = timeout
+        self.session = session or rq.Session()
+        self.etag = None
+        self.last_modified = None
+        self.snapshot = {}  # item_id -> price of the last list the server sent
+
+        # Metrics, shown as gauges in the Stats panel
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_transferred = 0
+        self.items_changed = 0
+        self.last_sync = None
+
+    def sync(self):
+        """Fetch and apply the server prices. Returns the number of items changed, or None on failure."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+
+        # Get data from server
+        response = self.session.get(f"{self.base_url}/get", headers=headers, timeout=self.timeout)
+        self.requests += 1
+        self.bytes_transferred += int(response.headers.get("Content-Length") or len(response.content))
+
+        if response.status_code == 304:
+            self.not_modified += 1
+            self.last_sync = time.time()
+            # The server confirmed the prices it sent last time
+            self.catalog.touch(self.snapshot)
+            print("Server prices unchanged")
+            return 0
+
+        # Check if response is successful and has content
+        if response.status_code != 200:
+            print(f"Server returned status code: {response.status_code}")
+            return None
+
+        if not response.text.strip():
+            print("Server returned empty response")
+            return None
+
+        # Try to parse JSON
+        try:
+            r = response.json()
+        except ValueError:
+            print(f"Failed to parse JSON from server. Response content: {response.text[:200]}...")
+            return None
+
+        prices = {str(item_id): item_data["price"] for item_id, item_data in r.items()}
+        # Only the items whose price differs from the catalog, which may also hold a newer
+        # exchange price from the log; the others are just confirmed
+        delta = {item_id: price for item_id, price in prices.items()
+                 if item_id in self.catalog and self.catalog.price(item_id, None) != price}
+        changed = self.catalog.update_prices(delta) if delta else 0
+        if self.history is not None:
+            now = time.time()
+            for item_id, price in delta.items():
+                self.history.record(item_id, price, now)
+        self.catalog.touch(item_id for item_id in prices if item_id not in delta)
+
+        self.snapshot = prices
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+        self.items_changed += changed
+        self.last_sync = time.time()
+        print(f"Server sent {len(prices)} prices, {changed} changed locally")
+        return changed
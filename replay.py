@@ -0,0 +1,110 @@
+"""
+Offline replay of a UE_game.log through the tracking core.
+Runs without Tk, win32 or network access and as fast as the disk allows, then prints the
+income, drops and consumption of every map run found in the log.
+
+Usage:
+    python replay.py path/to/UE_game.log [--table full_table.json] [--tax] [--json] [--verbose]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+
+from item_catalog import ItemCatalog, FULL_TABLE_PATH
+from log_parser import LogParser
+from log_tailer import LogTailer
+from tracker import Tracker, split_at_scene_changes
+
+def replay(log_path, table_path=FULL_TABLE_PATH, tax=False, verbose=False):
+    """Feed a whole log through a fresh Tracker, returns (tracker, per-map records, stats)"""
+    catalog = ItemCatalog(table_path, autosave=False)
+    tracker = Tracker(catalog=catalog, tax=tax, drop_log_path=None)
+    # There is no Initialize button here, so take the first full bag dump in the log
+    tracker.start_initialization()
+
+    maps = []
+    stats = {"bytes": 0, "lines": 0, "events": 0}
+    start = time.perf_counter()
+    tailer = LogTailer(log_path, from_end=False, use_notifications=False)
+    parser = LogParser()
+    output = sys.stdout if verbose else io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            for text in tailer.read_blocks():
+                events = parser.parse(text)
+                stats["bytes"] += len(text)
+                stats["lines"] += text.count("\n")
+                process_events(tracker, events, maps, stats)
+                if not verbose:
+                    output.seek(0)
+                    output.truncate()
+            process_events(tracker, parser.flush(), maps, stats)
+    finally:
+        tailer.close()
+    stats["seconds"] = time.perf_counter() - start
+    return tracker, maps, stats
+
+def process_events(tracker, events, maps, stats):
+    """Run one batch through the tracker, opening a map record whenever a map is entered"""
+    stats["events"] += len(events)
+    for segment in split_at_scene_changes(events):
+        map_count = tracker.map_count
+        tracker.deal_change(segment)
+        if tracker.map_count != map_count:
+            maps.append({"map": tracker.map_count, "income": 0, "drops": {}, "consumption": {}, "value": {}})
+        if maps and tracker.is_in_map:
+            record_map(maps[-1], tracker)
+    tracker.get_price_info(events)
+
+def record_map(record, tracker):
+    """Copy the running per-map counters of the tracker into the map record"""
+    record["income"] = round(tracker.income, 4)
+    record["market_value"] = round(tracker.market_value, 4)
+    record["drops"] = {item_id: amount for item_id, amount in tracker.drop_list.items() if amount > 0}
+    record["consumption"] = {item_id: -amount for item_id, amount in tracker.drop_list.items() if amount < 0}
+    record["value"] = {item_id: round(value, 4) for item_id, value in tracker.drop_value.items()}
+
+def print_report(tracker, maps, stats):
+    catalog = tracker.catalog
+    runs = {run.index: run for run in tracker.runs}
+    for record in maps:
+        run = runs.get(record["map"])
+        where = f" {run.name}, {round(run.duration)}s" if run else ""
+        print(f"=== Map {record['map']}{where}: income {record['income']} ===")
+        # Valued at the prices in effect when the items dropped or were used
+        value = record["value"]
+        for item_id, amount in sorted(record["drops"].items(), key=lambda kv: -value.get(kv[0], 0)):
+            print(f"  + {catalog.name(item_id, item_id)} x{amount} [{round(value.get(item_id, 0), 2)}]")
+        for item_id, amount in record["consumption"].items():
+            print(f"  - {catalog.name(item_id, item_id)} x{amount} [{round(-value.get(item_id, 0), 2)}]")
+    print("=== Total ===")
+    print(f"Maps: {tracker.map_count}, income: {round(tracker.income_all, 2)}")
+    mb = stats["bytes"] / (1024 * 1024)
+    seconds = max(stats["seconds"], 1e-9)
+    print(f"Replayed {stats['lines']} lines ({round(mb, 2)} MB) in {round(seconds, 3)}s "
+          f"({round(stats['lines'] / seconds)} lines/s, {round(mb / seconds, 2)} MB/s)")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a UE_game.log and report per-map income, drops and consumption")
+    parser.add_argument("log", help="path to UE_game.log")
+    parser.add_argument("--table", default=FULL_TABLE_PATH, help="item table with names and prices")
+    parser.add_argument("--tax", action="store_true", help="value items after the exchange tax")
+    parser.add_argument("--json", action="store_true", help="print the results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="show the tracker's per-event output")
+    args = parser.parse_args(argv)
+
+    tracker, maps, stats = replay(args.log, args.table, tax=args.tax, verbose=args.verbose)
+    if args.json:
+        print(json.dumps({"maps": maps, "map_count": tracker.map_count, "income": tracker.income_all,
+                          "market_value": tracker.market_value_all, "drops": tracker.drop_list_all,
+                          "categories": tracker.ledger.session.category_totals(tracker.tax),
+                          "runs": [run._asdict() for run in tracker.runs], "stats": stats}, indent=4, ensure_ascii=False))
+    else:
+        print_report(tracker, maps, stats)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Durable history of tracking sessions in an SQLite database (WAL mode).
+The tracker's MapEnter, MapExit and ItemDelta events are queued and written by a single
+background thread that commits them in batches, so a bag sort producing hundreds of
+changes costs one transaction instead of one file open per line. Every item delta keeps
+the price it was valued at, and map runs keep their income, so weeks of sessions stay
+queryable by run and by item after the tool is closed. Deltas also keep the price before
+tax and whether tax was taken off, so sessions recorded with different tax settings can
+be compared.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+
+from tracker import ItemDelta, MapEnter, MapExit
+
+DB_PATH = "sessions.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL
+);
+CREATE TABLE IF NOT EXISTS map_runs (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    map_index INTEGER NOT NULL,
+    scene TEXT,
+    entered REAL NOT NULL,
+    exited REAL,
+    duration REAL,
+    income REAL
+);
+CREATE TABLE IF NOT EXISTS item_deltas (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    run_id INTEGER REFERENCES map_runs(id),
+    time REAL NOT NULL,
+    item_id TEXT NOT NULL,
+    amount INTEGER NOT NULL,
+    price REAL NOT NULL,
+    raw_price REAL,
+    taxed INTEGER
+);
+CREATE INDEX IF NOT EXISTS map_runs_session ON map_runs(session_id, entered);
+CREATE INDEX IF NOT EXISTS item_deltas_run ON item_deltas(run_id);
+CREATE INDEX IF NOT EXISTS item_deltas_item ON item_deltas(item_id, time);
+"""
+
+# Columns added to item_deltas after the first release, with their types
+ADDED_COLUMNS = (("raw_price", "REAL"), ("taxed", "INTEGER"))
+
+INSERT_DELTA = ("INSERT INTO item_deltas (session_id, run_id, time, item_id, amount, price, raw_price, taxed) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+def connect(path=DB_PATH):
+    """Open the database in WAL mode with the schema in place"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL with synchronous=NORMAL only risks the last commits on power loss, never corruption
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Databases written by older versions lack the newer columns, their rows keep NULL there
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(item_deltas)")}
+    for name, sql_type in ADDED_COLUMNS:
+        if name not in columns:
+            conn.execute(f"ALTER TABLE item_deltas ADD COLUMN {name} {sql_type}")
+    return conn
+
+class SessionStore:
+    """Batched, append-only writer for one tracking session"""
+
+    def __init__(self, path=DB_PATH, batch_size=500, flush_interval=2.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.session_id = None
+        self.run_id = None
+        self.written = 0
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = None
+
+    def handle(self, event):
+        """Tracker listener, queues the event for the writer thread"""
+        if isinstance(event, (ItemDelta, MapEnter, MapExit)):
+            self._queue.put(event)
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._thread.start()
+        # The session row exists before the first event can reference it
+        self._ready.wait(5.0)
+
+    def stop(self, timeout=5.0):
+        """Write everything still queued, close the session and the database"""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _take_batch(self):
+        """Wait for the first event, then collect up to batch_size more within flush_interval.
+        Returns (events, stop)."""
+        event = self._queue.get()
+        if event is None:
+            return [], True
+        batch = [event]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                event = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if event is None:
+                return batch, True
+            batch.append(event)
+        return batch, False
+
+    def _run(self):
+        try:
+            conn = connect(self.path)
+            with conn:
+                self.session_id = conn.execute("INSERT INTO sessions (started) VALUES (?)",
+                                               (time.time(),)).lastrowid
+        except Exception as e:
+            print(f"Error opening session store {self.path}: {e}")
+            self._ready.set()
+            return
+        self._ready.set()
+
+        stop = False
+        while not stop:
+            batch, stop = self._take_batch()
+            if batch:
+                try:
+                    with conn:
+                        self._write(conn, batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    print(f"Error writing {len(batch)} session events: {e}")
+
+        try:
+            with conn:
+                conn.execute("UPDATE sessions SET ended = ? WHERE id = ?", (time.time(), self.session_id))
+            conn.close()
+        except Exception as e:
+            print(f"Error closing session store: {e}")
+
+    def _write(self, conn, batch):
+        """Write one batch in the current transaction; runs of item deltas go through executemany"""
+        deltas = []
+        for event in batch:
+            if isinstance(event, ItemDelta):
+                raw_price = event.raw_price if event.raw_price is not None else event.price
+                deltas.append((self.session_id, self.run_id, event.time, event.item_id, event.amount,
+                               event.price, raw_price, int(event.price != raw_price)))
+                continue
+            if deltas:
+                conn.executemany(INSERT_DELTA, deltas)
+                deltas = []
+            if isinstance(event, MapEnter):
+                self.run_id = conn.execute("INSERT INTO map_runs (session_id, map_index, scene, entered) "
+                                           "VALUES (?, ?, ?, ?)",
+                                           (self.session_id, event.map_index, event.scene, event.time)).lastrowid
+            elif isinstance(event, MapExit) and self.run_id is not None:
+                conn.execute("UPDATE map_runs SET exited = ?, duration = ?, income = ? WHERE id = ?",
+                             (event.time, event.duration, event.income, self.run_id))
+                self.run_id = None
+        if deltas:
+            conn.executemany(INSERT_DELTA, deltas)
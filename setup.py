@@ -2,7 +2,7 @@ from distutils.core import setup
 import py2exe
 options = {
     'py2exe': {
-        'includes': ['win32gui', 'win32process', 'win32api', 'tkinter', 'psutil', 're', 'json']
+        'includes': ['win32gui', 'win32process', 'win32api', 'tkinter', 'psutil', 're', 'json', 'log_parser', 'item_catalog', 'inventory', 'log_tailer', 'tracker', 'drop_view', 'price_submitter', 'price_sync', 'session_store', 'checkpoint', 'metrics', 'ui_events', 'sinks', 'item_table', 'bag_scan', 'price_history', 'orderbook', 'accounting', 'map_runs']
     }
 }
 
@@ -0,0 +1,289 @@
+"""
+Output sinks for drop, consumption and map events.
+Every sink is a tracker listener with its own bounded queue and worker thread: the log
+thread only appends to a deque, the worker writes whole batches, and when a sink falls
+behind the oldest events are dropped (and counted) instead of blocking the log thread or
+the other sinks. Sinks write JSON Lines, rolling CSV files, or serve a local HTTP feed
+with Server-Sent Events for stream overlays and dashboards.
+"""
+
+import abc
+import collections
+import csv
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from tracker import ItemDelta, MapEnter, MapExit
+
+def event_to_dict(event, catalog=None):
+    """Plain dict of a tracker event with a "type" of drop, consumption, map_enter or map_exit"""
+    if isinstance(event, ItemDelta):
+        data = {"type": "drop" if event.amount > 0 else "consumption", **event._asdict()}
+        data["value"] = event.amount * event.price
+        if catalog is not None:
+            data["name"] = catalog.name(event.item_id, event.item_id)
+        return data
+    if isinstance(event, MapEnter):
+        return {"type": "map_enter", **event._asdict()}
+    if isinstance(event, MapExit):
+        return {"type": "map_exit", **event._asdict()}
+    return None
+
+class AsyncSink(abc.ABC):
+    """Base class: non-blocking handle(), batched write() on a worker thread"""
+
+    name = "sink"
+
+    def __init__(self, catalog=None, max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.catalog = catalog
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._queue = collections.deque(maxlen=max_queue)
+        self._wakeup = threading.Event()
+        self._running = False
+        self._thread = None
+
+    def handle(self, event):
+        """Tracker listener; never blocks, a full queue loses its oldest event"""
+        data = event_to_dict(event, self.catalog)
+        if data is None:
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+        self._queue.append(data)
+        if len(self._queue) >= self.batch_size:
+            self._wakeup.set()
+
+    def queue_depth(self):
+        return len(self._queue)
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f"{self.name}-sink", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        self._running = False
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        self.close()
+
+    def _take_batch(self):
+        batch = []
+        while self._queue and len(batch) < self.batch_size:
+            batch.append(self._queue.popleft())
+        return batch
+
+    def _run(self):
+        while True:
+            # Wake when a batch is full or the flush interval passed, whichever comes first
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while self._queue:
+                batch = self._take_batch()
+                try:
+                    self.write(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    self.dropped += len(batch)
+                    print(f"Error in {self.name} sink: {e}")
+            if not self._running:
+                return
+
+    @abc.abstractmethod
+    def write(self, batch):
+        """Write a batch of event dicts, called on the worker thread"""
+
+    def close(self):
+        pass
+
+class JsonlSink(AsyncSink):
+    """Appends one JSON object per event to a file"""
+
+    name = "jsonl"
+
+    def __init__(self, path, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._file = None
+
+    def write(self, batch):
+        if self._file is None:
+            self._file = open(self.path, "a", encoding="utf-8")
+        self._file.write("".join(json.dumps(data, ensure_ascii=False) + "\n" for data in batch))
+        self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+class CsvSink(AsyncSink):
+    """CSV files rolled over per day (strftime codes in the path) and when they exceed max_bytes.
+    Events go into the file of the day they happened in the log, also when a catch-up or replay
+    writes old ones."""
+
+    name = "csv"
+    COLUMNS = ["time", "type", "map_index", "item_id", "name", "amount", "price", "value", "scene", "duration", "income"]
+
+    def __init__(self, path="drops-%Y-%m-%d.csv", max_bytes=10 * 1024 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.current_path = None
+        self._file = None
+        self._writer = None
+
+    def _base_path(self, data):
+        """Path of the day an event happened"""
+        return datetime.fromtimestamp(data.get("time") or time.time()).strftime(self.path)
+
+    def _target(self, base):
+        """File to append to for a day's path, with a numbered suffix once a file is full"""
+        root, ext = os.path.splitext(base)
+        part = 0
+        path = base
+        while os.path.exists(path) and os.path.getsize(path) >= self.max_bytes:
+            part += 1
+            path = f"{root}.{part}{ext}"
+        return path
+
+    def write(self, batch):
+        for base, rows in itertools.groupby(batch, key=self._base_path):
+            path = self._target(base)
+            if path != self.current_path:
+                self.close()
+                new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+                self._file = open(path, "a", encoding="utf-8", newline="")
+                self._writer = csv.DictWriter(self._file, fieldnames=self.COLUMNS, extrasaction="ignore")
+                if new_file:
+                    self._writer.writeheader()
+                self.current_path = path
+            self._writer.writerows(rows)
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._writer = None
+        self.current_path = None
+
+class HttpSink(AsyncSink):
+    """Local HTTP feed: GET /events streams Server-Sent Events, GET /recent returns the last events as JSON.
+    Each client has its own bounded queue; a client that cannot keep up loses events, never the tracker."""
+
+    name = "http"
+
+    def __init__(self, host="127.0.0.1", port=8765, recent=200, client_queue=1000, **kwargs):
+        kwargs.setdefault("flush_interval", 0.2)
+        super().__init__(**kwargs)
+        self.host = host
+        self.port = port
+        self.client_queue = client_queue
+        self.recent = collections.deque(maxlen=recent)
+        self.clients = set()
+        self._clients_lock = threading.Lock()
+        self._server = None
+        self._server_thread = None
+
+    def start(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/recent":
+                    body = json.dumps(list(sink.recent), ensure_ascii=False).encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/json; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.send_header("Access-Control-Allow-Origin", "*")
+                    self.end_headers()
+                    self.wfile.write(body)
+                elif self.path == "/events":
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.send_header("Access-Control-Allow-Origin", "*")
+                    self.end_headers()
+                    sink.serve_client(self.wfile)
+                else:
+                    self.send_error(404)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self._server_thread = threading.Thread(target=self._server.serve_forever, name="http-sink-server", daemon=True)
+        self._server_thread.start()
+        print(f"Event feed on http://{self.host}:{self._server.server_address[1]}/events")
+        super().start()
+
+    def serve_client(self, wfile):
+        """Stream events to one client until it disconnects or the sink stops"""
+        client = queue.Queue(maxsize=self.client_queue)
+        with self._clients_lock:
+            self.clients.add(client)
+        try:
+            while self._running:
+                try:
+                    chunk = client.get(timeout=15)
+                except queue.Empty:
+                    # Comment line, keeps proxies from closing an idle stream
+                    chunk = b": keep-alive\n\n"
+                if chunk is None:
+                    break
+                wfile.write(chunk)
+                wfile.flush()
+        except OSError:
+            pass
+        finally:
+            with self._clients_lock:
+                self.clients.discard(client)
+
+    def write(self, batch):
+        self.recent.extend(batch)
+        chunk = "".join(f"event: {data['type']}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                        for data in batch).encode("utf-8")
+        with self._clients_lock:
+            clients = list(self.clients)
+        for client in clients:
+            try:
+                client.put_nowait(chunk)
+            except queue.Full:
+                self.dropped += len(batch)
+
+    def close(self):
+        with self._clients_lock:
+            for client in self.clients:
+                try:
+                    client.put_nowait(None)
+                except queue.Full:
+                    pass
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+def create_sinks(config, catalog=None):
+    """Sinks enabled in the "sinks" section of config.json, e.g.
+    {"jsonl": "events.jsonl", "csv": "drops-%Y-%m-%d.csv", "http_port": 8765}"""
+    sinks = []
+    if config.get("jsonl"):
+        sinks.append(JsonlSink(config["jsonl"], catalog=catalog))
+    if config.get("csv"):
+        sinks.append(CsvSink(config["csv"], max_bytes=config.get("csv_max_bytes", 10 * 1024 * 1024), catalog=catalog))
+    if config.get("http_port"):
+        sinks.append(HttpSink(config.get("http_host", "127.0.0.1"), config["http_port"], catalog=catalog))
+    return sinks
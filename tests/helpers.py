@@ -0,0 +1,58 @@
+"""
+Shared setup of the tests: the repository root on sys.path, trackers on a catalog that is
+never written back, and builders for the UE_game.log lines the tracker reads.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from item_catalog import ItemCatalog
+from tracker import Tracker
+
+MAP_SCENE = "/Game/Art/Maps/04DC/DC_DiXiaCheng000/DC_DiXiaCheng000.DC_DiXiaCheng000"
+TOWN_SCENE = "/Game/Art/Maps/01SD/Town000/Town000.Town000"
+
+def new_catalog():
+    """full_table.json of the repository, loaded without autosave so tests never change it"""
+    return ItemCatalog(os.path.join(ROOT, "full_table.json"), autosave=False)
+
+def new_tracker(catalog=None, **kwargs):
+    """Tracker without a drop log, on new_catalog() unless given one"""
+    return Tracker(catalog=catalog if catalog is not None else new_catalog(), drop_log_path=None, **kwargs)
+
+def line(text, second=0, ms=0):
+    """One game log line, `second` seconds after 2025.10.22 14:00:00"""
+    return (f"[2025.10.22-14.{second // 60:02d}.{second % 60:02d}:{ms:03d}][  0]"
+            f"GameLog: Display: [Game] {text}\n")
+
+def bag_line(kind, slot, item_id, num, page=102, second=0):
+    """kind is "InitBagData" or "Modfy BagItem" """
+    return line(f"BagMgr@:{kind} PageId = {page} SlotId = {slot} ConfigBaseId = {item_id} Num = {num}", second)
+
+def dump(slots, page=102, item_id="1009", num=1, second=0):
+    """InitBagData lines of the given slots, all holding the same item"""
+    return [bag_line("InitBagData", slot, item_id, num, page, second) for slot in slots]
+
+def modify(slot, item_id, num, page=102, second=0):
+    return bag_line("Modfy BagItem", slot, item_id, num, page, second)
+
+def scene_line(last_scene, next_scene, second=0):
+    return line(f"PageApplyBase@ _UpdateGameEnd: LastSceneName = World'{last_scene}' NextSceneName = World'{next_scene}'",
+                second)
+
+def login_line(second=0):
+    return line("PlayerInitPkgMgr@:OnLogin", second)
+
+def price_lines(syn_id, item_id, values, second=0):
+    """An XchgSearchPrice request for item_id and its response listing values"""
+    lines = [line(f"----Socket SendMessage STT----XchgSearchPrice----SynId = {syn_id}", second),
+             f"+filter+0+refer [{item_id}]\n",
+             "----Socket SendMessage End----\n",
+             line(f"----Socket RecvMessage STT----XchgSearchPrice----SynId = {syn_id}", second)]
+    lines += [f"+{n + 1} [{value}]\n" for n, value in enumerate(values)]
+    lines.append("----Socket RecvMessage End----\n")
+    return lines
@@ -0,0 +1,49 @@
+"""
+Booking into the ledger and revaluing holdings when prices change.
+"""
+
+import unittest
+
+from helpers import new_catalog, new_tracker
+
+from accounting import Ledger
+from tracker import CURRENCY_ID, TAX_RATE
+
+class LedgerTest(unittest.TestCase):
+
+    def test_booked_value_stays_market_value_moves(self):
+        ledger = Ledger(TAX_RATE, untaxed_ids=(CURRENCY_ID,))
+        ledger.book("1001", 10, 5.0)
+        ledger.book("1009", -2, 3.0)
+        ledger.reprice("1001", 7.0)
+        self.assertEqual(ledger.session.income(), 44.0)
+        self.assertEqual(ledger.market_value(ledger.session), 64.0)
+        self.assertAlmostEqual(ledger.market_value(ledger.session, taxed=True), 64.0 * TAX_RATE)
+
+    def test_currency_is_not_taxed(self):
+        ledger = Ledger(TAX_RATE, untaxed_ids=(CURRENCY_ID,))
+        ledger.book(CURRENCY_ID, 100, 1.0)
+        ledger.book("1001", 10, 5.0)
+        self.assertAlmostEqual(ledger.market_value(ledger.session, taxed=True), 100 + 50 * TAX_RATE)
+
+    def test_new_map_starts_empty(self):
+        ledger = Ledger(TAX_RATE)
+        ledger.book("1001", 10, 5.0)
+        ledger.start_map()
+        ledger.reprice("1001", 6.0)
+        self.assertEqual(ledger.market_value(ledger.map), 0)
+        self.assertEqual(ledger.market_value(ledger.session), 60.0)
+
+class TrackerMarketValueTest(unittest.TestCase):
+
+    def test_view_state_follows_catalog_prices(self):
+        catalog = new_catalog()
+        tracker = new_tracker(catalog)
+        tracker.ledger.book("1001", 2, 10.0)
+        catalog.update_price("1001", 15.0)
+        view = tracker.view_state()
+        self.assertEqual(view["income_all"], 20.0)
+        self.assertEqual(view["market_value_all"], 30.0)
+
+if __name__ == "__main__":
+    unittest.main()
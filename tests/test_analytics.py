@@ -0,0 +1,122 @@
+"""
+Session history queries over a small sessions.db, and their command line.
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import helpers  # puts the repository root on sys.path
+
+import analytics
+from item_catalog import ItemCatalog
+from session_store import connect
+
+ITEMS = {"1001": {"name": "Compass A", "type": "Compass", "price": 2.0},
+         "1009": {"name": "Compass B", "type": "罗盘", "price": 100.0},
+         "100300": {"name": "Flame Elementium", "type": "Currency", "price": 5.0}}
+
+# (id, session, map index, entered, exited, duration); run 3 never ended
+RUNS = [(1, 1, 1, 0.0, 3600.0, 3600.0),
+        (2, 1, 2, 4000.0, 5800.0, 1800.0),
+        (3, 1, 3, 6000.0, None, None),
+        (4, 2, 1, 7000.0, 7060.0, 60.0)]
+# (run, item, amount, price, price before tax); the 1009 drop was recorded with tax on
+DELTAS = [(1, "1001", 10, 2.0, 2.0),
+          (1, "1009", 1, 87.5, 100.0),
+          (1, "100300", -2, 5.0, 5.0),
+          (2, "1001", 5, 2.0, 2.0),
+          (2, "100300", -1, 5.0, 5.0),
+          (3, "1001", 100, 2.0, 2.0),
+          (4, "1001", 1, 2.0, 2.0)]
+
+class AnalyticsTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.TemporaryDirectory()
+        cls.db_path = os.path.join(cls.folder.name, "sessions.db")
+        conn = connect(cls.db_path)
+        with conn:
+            conn.executemany("INSERT INTO sessions (id, started) VALUES (?, 0)", [(1,), (2,)])
+            conn.executemany("INSERT INTO map_runs (id, session_id, map_index, scene, entered, exited, duration) "
+                             "VALUES (?, ?, ?, 'scene', ?, ?, ?)", RUNS)
+            conn.executemany("INSERT INTO item_deltas (session_id, run_id, time, item_id, amount, price, raw_price, taxed) "
+                             "VALUES (1, ?, 0, ?, ?, ?, ?, 0)", DELTAS)
+        conn.close()
+        cls.table_path = os.path.join(cls.folder.name, "full_table.json")
+        with open(cls.table_path, "w", encoding="utf-8") as f:
+            json.dump(ITEMS, f)
+        cls.catalog = ItemCatalog(cls.table_path, autosave=False)
+        cls.history = analytics.load_history(cls.db_path, session_id=1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.folder.cleanup()
+
+    def test_only_finished_runs_are_loaded(self):
+        self.assertEqual(list(self.history.run_ids), [1, 2])
+        self.assertEqual(len(analytics.load_history(self.db_path)), 3)
+        self.assertEqual(len(analytics.load_history(self.db_path, since=6500)), 1)
+
+    def test_map_profit(self):
+        rows = [(row["run"], row["gains"], row["cost"], row["profit"], row["per_hour"])
+                for row in analytics.map_profit(self.history)]
+        # Valued before tax
+        self.assertEqual(rows, [(1, 120.0, 10.0, 110.0, 110.0), (2, 10.0, 5.0, 5.0, 10.0)])
+
+    def test_rolling_profit_per_hour(self):
+        rows = [(row["runs"], row["profit"], round(row["per_hour"], 4))
+                for row in analytics.rolling_profit_per_hour(self.history, window=3600)]
+        self.assertEqual(rows, [(1, 110.0, 110.0), (2, 115.0, 76.6667)])
+        rows = analytics.rolling_profit_per_hour(self.history, window=1000)
+        self.assertEqual([(row["runs"], row["per_hour"]) for row in rows], [(1, 110.0), (1, 10.0)])
+
+    def test_item_distribution(self):
+        rows = analytics.item_distribution(self.history, self.catalog)
+        self.assertEqual(rows, [
+            {"item": "1009", "name": "Compass B", "total": 1.0, "value": 100.0, "per_map": 0.5,
+             "per_map_std": 0.5, "drop_rate": 0.5},
+            {"item": "1001", "name": "Compass A", "total": 15.0, "value": 30.0, "per_map": 7.5,
+             "per_map_std": 2.5, "drop_rate": 1.0},
+        ])
+
+    def test_type_distribution(self):
+        # Both spellings of the compass type are one row
+        rows = analytics.type_distribution(self.history, self.catalog)
+        self.assertEqual(rows, [{"type": "Compass", "total": 16.0, "value": 130.0, "per_map": 8.0,
+                                 "per_map_std": 3.0, "drop_rate": 1.0}])
+
+    def test_consumption_cost(self):
+        rows = analytics.consumption_cost(self.history, self.catalog)
+        self.assertEqual(rows, [{"item": "100300", "name": "Flame Elementium", "used": 3.0, "cost": 15.0,
+                                 "cost_per_map": 7.5, "maps_used_in": 2}])
+
+    def test_empty_history(self):
+        history = analytics.load_history(self.db_path, session_id=3)
+        self.assertEqual(analytics.map_profit(history), [])
+        self.assertEqual(analytics.rolling_profit_per_hour(history), [])
+        self.assertEqual(analytics.item_distribution(history), [])
+
+    def test_command_line_json(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            analytics.main(["consumption", "--db", self.db_path, "--session", "1", "--table", self.table_path, "--json"])
+        self.assertEqual(json.loads(output.getvalue())[0]["cost"], 15.0)
+
+class AnalyticsMainTest(unittest.TestCase):
+
+    def test_missing_database(self):
+        with tempfile.TemporaryDirectory() as folder:
+            db_path = os.path.join(folder, "sessions.db")
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                analytics.main(["maps", "--db", db_path])
+            self.assertIn("No session history yet", output.getvalue())
+            self.assertFalse(os.path.exists(db_path))
+
+if __name__ == "__main__":
+    unittest.main()
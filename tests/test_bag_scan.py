@@ -0,0 +1,91 @@
+"""
+Rebuilding the bag from the last InitBagData dump in an existing log.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+
+from helpers import MAP_SCENE, bag_line, dump, line, login_line, modify, new_tracker, scene_line
+
+from bag_scan import rebuild_from_log
+from log_parser import HIDEOUT_SCENE, parse_log
+from tracker import MapEnter
+
+class RebuildFromLogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "UE_game.log")
+        self.tracker = new_tracker()
+
+    def rebuild(self, lines):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+        return rebuild_from_log(self.path, self.tracker)
+
+    def test_back_to_back_dumps_are_not_merged(self):
+        # A sort a second after another one: slot 24 was emptied in between
+        self.assertIsNotNone(self.rebuild(dump(range(25)) + dump(range(24), num=2, second=1)))
+        self.assertEqual(len(self.tracker.bag_state), 24)
+        self.assertEqual(self.tracker.bag_state.totals, {"1009": 48})
+
+    def test_dump_with_unordered_slots_is_read_whole(self):
+        entries = [(page, slot) for page in (102, 103) for slot in range(15)]
+        random.Random(5).shuffle(entries)
+        lines = dump(range(30), num=2)
+        lines += [bag_line("InitBagData", slot, "1009", 1, page, second=1) for page, slot in entries]
+        self.assertIsNotNone(self.rebuild(lines))
+        self.assertEqual(len(self.tracker.bag_state), 30)
+        self.assertEqual(self.tracker.bag_state.totals, {"1009": 30})
+
+    def test_slot_listed_again_in_the_same_frame_ends_the_dump(self):
+        self.assertIsNotNone(self.rebuild(dump(range(25)) + dump(range(10, 30), num=2)))
+        self.assertEqual(self.tracker.bag_state.totals, {"1009": 40})
+
+    def test_dump_starts_after_login(self):
+        lines = dump(range(25), page=103, item_id="1001") + [login_line()] + dump(range(25))
+        self.assertIsNotNone(self.rebuild(lines))
+        self.assertEqual(self.tracker.bag_state.totals, {"1009": 25})
+
+    def test_dump_starts_after_bag_change(self):
+        lines = dump(range(25), page=103, item_id="1001") + [modify(0, "1001", 3, page=103)] + dump(range(25))
+        self.assertIsNotNone(self.rebuild(lines))
+        self.assertEqual(self.tracker.bag_state.totals, {"1009": 25})
+
+    def test_changes_after_dump_are_applied(self):
+        lines = dump(range(25)) + [line("noise"), modify(3, "1009", 5), modify(30, "1001", 2)]
+        end = self.rebuild(lines)
+        self.assertEqual(end[1], os.path.getsize(self.path))
+        self.assertEqual(self.tracker.bag_state.totals, {"1009": 29, "1001": 2})
+        self.assertTrue(self.tracker.initialization_complete)
+
+    def test_small_dump_is_not_used(self):
+        self.assertIsNone(self.rebuild(dump(range(5))))
+        self.assertFalse(self.tracker.initialization_complete)
+
+class TrackerRebuildTest(unittest.TestCase):
+
+    def test_later_dump_replaces_the_bag(self):
+        tracker = new_tracker()
+        lines = dump(range(25)) + [modify(40, "1001", 7)] + dump(range(20))
+        self.assertTrue(tracker.rebuild(parse_log("".join(lines))))
+        # Slots 20-24 and 40 are not in the last dump, so they are empty now
+        self.assertEqual(tracker.bag_state.totals, {"1009": 20})
+
+    def test_log_ending_in_a_map_opens_a_run(self):
+        tracker = new_tracker()
+        events = []
+        tracker.listeners.append(events.append)
+        lines = dump(range(25)) + [scene_line(HIDEOUT_SCENE, MAP_SCENE, second=10), modify(0, "1009", 4, second=20)]
+        self.assertTrue(tracker.rebuild(parse_log("".join(lines))))
+        self.assertEqual(events, [MapEnter(tracker.map_start, 1, MAP_SCENE)])
+        self.assertTrue(tracker.is_in_map)
+        self.assertEqual(tracker.map_count, 1)
+        # What happened in the map before the rebuild is not counted as drops
+        self.assertEqual(tracker.drop_list, {})
+
+if __name__ == "__main__":
+    unittest.main()
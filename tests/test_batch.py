@@ -0,0 +1,81 @@
+"""
+Finding archived logs, merging per-log summaries, and the process pool analysis.
+"""
+
+import os
+import tempfile
+import unittest
+
+from helpers import MAP_SCENE, ROOT, dump, modify, scene_line
+
+import batch
+from log_parser import HIDEOUT_SCENE
+
+def map_run(item_id, num, start):
+    return [scene_line(HIDEOUT_SCENE, MAP_SCENE, second=start), modify(30, item_id, num, second=start + 5),
+            scene_line(MAP_SCENE, HIDEOUT_SCENE, second=start + 20)]
+
+class TotalsTest(unittest.TestCase):
+
+    def summary(self, map_income, drops, value):
+        return {"account": "a", "path": "x.log", "map_count": len(map_income), "income": sum(map_income),
+                "map_income": map_income, "drops": drops, "consumption": {}, "value": value, "bytes": 10,
+                "seconds": 0.1}
+
+    def test_summaries_are_merged(self):
+        totals = batch.Totals()
+        totals.add(self.summary([5.0, 15.0], {"1001": 2}, {"1001": 20.0}))
+        totals.add(self.summary([], {}, {}))
+        totals.add(self.summary([30.0], {"1001": 1, "1009": 4}, {"1001": 10.0, "1009": 20.0}))
+        totals.add({"account": "a", "path": "bad.log", "error": "unreadable"})
+        self.assertEqual(totals.as_dict(), {
+            "logs": 3, "errors": 1, "map_count": 3, "income": 50.0, "income_per_map": 16.6667, "best_map": 30.0,
+            "drops": {"1001": 3, "1009": 4}, "consumption": {}, "value": {"1001": 30.0, "1009": 20.0},
+        })
+        self.assertEqual(totals.bytes, 30)
+
+    def test_empty(self):
+        self.assertEqual(batch.Totals().as_dict()["income_per_map"], 0)
+
+class AnalyzeTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.root = folder.name
+        self.table_path = os.path.join(ROOT, "full_table.json")
+        self.write("alice/2024-05-01/UE_game.log", dump(range(25)) + map_run("1001", 2, 10) + map_run("1001", 5, 40))
+        self.write("alice/2024-05-02/UE_game.log", dump(range(25)) + map_run("1009", 3, 10))
+        self.write("bob.log", dump(range(25)) + map_run("1001", 1, 10) + ["x" * 500 + "\n"])
+        self.write("notes.txt", ["not a log\n"])
+
+    def write(self, name, lines):
+        path = os.path.join(self.root, *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    def test_find_logs(self):
+        logs = batch.find_logs(self.root)
+        self.assertEqual(sorted(account for account, _ in logs), ["alice", "alice", "bob"])
+        # Largest first
+        sizes = [os.path.getsize(path) for _, path in logs]
+        self.assertEqual(sizes, sorted(sizes, reverse=True))
+        single = os.path.join(self.root, "bob.log")
+        self.assertEqual(batch.find_logs(single), [("bob", single)])
+
+    def test_accounts_across_worker_processes(self):
+        results = []
+        accounts, overall = batch.analyze(batch.find_logs(self.root), self.table_path, jobs=2,
+                                          on_result=results.append)
+        self.assertEqual(len(results), 3)
+        self.assertEqual(sorted(accounts), ["alice", "bob"])
+        self.assertEqual((accounts["alice"].logs, accounts["alice"].map_count), (2, 3))
+        self.assertEqual(accounts["alice"].drops, {"1001": 5, "1009": 3})
+        self.assertEqual(accounts["bob"].drops, {"1001": 1})
+        self.assertEqual(overall.map_count, 4)
+        self.assertEqual(overall.drops, {"1001": 6, "1009": 3})
+        self.assertAlmostEqual(overall.income, accounts["alice"].income + accounts["bob"].income)
+
+if __name__ == "__main__":
+    unittest.main()
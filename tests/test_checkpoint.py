@@ -0,0 +1,118 @@
+"""
+Saving the tracking state with the log position it belongs to, and resuming from it.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+from helpers import MAP_SCENE, dump, modify, new_tracker, price_lines, scene_line
+
+from checkpoint import Checkpointer
+from log_parser import HIDEOUT_SCENE, LogParser, SceneChange
+from log_tailer import LogTailer
+
+class CheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.log_path = os.path.join(self.folder.name, "UE_game.log")
+
+    def save_and_load(self, tracker):
+        checkpointer = Checkpointer(os.path.join(self.folder.name, "checkpoint.json"))
+        tailer = SimpleNamespace(path=self.log_path, inode=1, offset=4096)
+        self.assertTrue(checkpointer.save(tracker, LogParser(), tailer, force=True))
+        return checkpointer.load(self.log_path)
+
+    def test_open_run_keeps_log_time_start(self):
+        tracker = new_tracker()
+        tracker.process([SceneChange(HIDEOUT_SCENE, MAP_SCENE, 1000.0)])
+        checkpoint = self.save_and_load(tracker)
+
+        restored = new_tracker()
+        Checkpointer.restore(checkpoint, restored, LogParser())
+        self.assertTrue(restored.is_in_map)
+        self.assertEqual(restored.map_start, 1000.0)
+        self.assertEqual(restored.log_time, 1000.0)
+        # The exit read from the tail of the log after the restart ends the run at its log time
+        restored.process([SceneChange(MAP_SCENE, HIDEOUT_SCENE, 1300.0)])
+        self.assertEqual(restored.runs[0].start, 1000.0)
+        self.assertEqual(restored.runs[0].duration, 300.0)
+        self.assertEqual(restored.total_time, 300.0)
+
+    def test_only_saves_when_due(self):
+        checkpointer = Checkpointer(os.path.join(self.folder.name, "checkpoint.json"), interval=3600)
+        tailer = SimpleNamespace(path=self.log_path, inode=1, offset=10)
+        tracker, parser = new_tracker(), LogParser()
+        self.assertTrue(checkpointer.save(tracker, parser, tailer))
+        tailer.offset = 20
+        self.assertFalse(checkpointer.save(tracker, parser, tailer))
+        self.assertTrue(checkpointer.save(tracker, parser, tailer, force=True))
+        self.assertEqual(checkpointer.load(self.log_path)["offset"], 20)
+        self.assertFalse(os.path.exists(checkpointer.path + ".tmp"))
+
+    def test_checkpoint_of_another_log_or_version_is_not_used(self):
+        checkpoint_path = os.path.join(self.folder.name, "checkpoint.json")
+        self.save_and_load(new_tracker())
+        checkpointer = Checkpointer(checkpoint_path)
+        self.assertIsNone(checkpointer.load(os.path.join(self.folder.name, "other.log")))
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        checkpoint["version"] -= 1
+        with open(checkpoint_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        self.assertIsNone(checkpointer.load(self.log_path))
+        self.assertIsNone(Checkpointer(os.path.join(self.folder.name, "missing.json")).load(self.log_path))
+
+class ResumeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.log_path = os.path.join(self.folder.name, "UE_game.log")
+        self.checkpointer = Checkpointer(os.path.join(self.folder.name, "checkpoint.json"))
+        search = price_lines(7, "1001", [4.0, 6.0], second=40)
+        # The app stops in the middle of a map and of an exchange response
+        self.before = dump(range(25)) + [scene_line(HIDEOUT_SCENE, MAP_SCENE, second=10),
+                                         modify(30, "1001", 3, second=20)] + search[:5]
+        self.after = search[5:] + [modify(30, "1001", 5, second=50), modify(0, "1009", 0, second=55),
+                                   scene_line(MAP_SCENE, HIDEOUT_SCENE, second=70)]
+
+    def tail(self, tracker, parser, resume=None):
+        tailer = LogTailer(self.log_path, from_end=False, use_notifications=False, resume=resume)
+        self.addCleanup(tailer.close)
+        tracker.process(parser.parse(tailer.read()))
+        return tailer
+
+    def test_resume_continues_where_the_checkpoint_was_taken(self):
+        with open(self.log_path, "w", encoding="utf-8") as f:
+            f.writelines(self.before)
+        tracker, parser = new_tracker(), LogParser()
+        tracker.start_initialization()
+        tailer = self.tail(tracker, parser)
+        self.assertTrue(self.checkpointer.save(tracker, parser, tailer, force=True))
+        with open(self.log_path, "a", encoding="utf-8") as f:
+            f.writelines(self.after)
+
+        checkpoint = self.checkpointer.load(self.log_path)
+        resumed, resumed_parser = new_tracker(), LogParser()
+        Checkpointer.restore(checkpoint, resumed, resumed_parser)
+        tailer = self.tail(resumed, resumed_parser, resume=(checkpoint["inode"], checkpoint["offset"]))
+        self.assertTrue(tailer.resumed)
+
+        # Same result as reading the whole log in one go
+        whole = new_tracker()
+        whole.start_initialization()
+        self.tail(whole, LogParser())
+        self.assertEqual(resumed.bag_state.totals, whole.bag_state.totals)
+        self.assertEqual(resumed.drop_list_all, {"1001": 5, "1009": -1})
+        self.assertEqual(resumed.drop_list_all, whole.drop_list_all)
+        self.assertEqual(resumed.income_all, whole.income_all)
+        self.assertEqual(resumed.runs, whole.runs)
+        self.assertEqual(resumed.catalog.price("1001"), 5.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+The tracking core runs on Linux without Tk: log text is parsed, run through the Tracker, and
+what the window would draw comes out of the UiEventQueue.
+"""
+
+import subprocess
+import sys
+import unittest
+
+from helpers import MAP_SCENE, ROOT, bag_line, new_catalog, new_tracker, price_lines, scene_line
+
+from log_parser import HIDEOUT_SCENE, LogParser
+from tracker import ItemDelta
+from ui_events import UiEventQueue
+
+class HeadlessTrackerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.catalog = new_catalog()
+        self.catalog.update_price("1001", 10.0)
+        self.tracker = new_tracker(self.catalog)
+        self.ui_events = UiEventQueue()
+        self.tracker.on_refresh = lambda: self.ui_events.post("state", self.tracker.view_state())
+        self.tracker.on_initialized = lambda count: self.ui_events.post("initialized", count)
+        self.parser = LogParser()
+
+    def feed(self, lines):
+        self.tracker.process(self.parser.parse("".join(lines)))
+
+    def test_map_run_from_log_text(self):
+        # A bag sort after asking for initialization: slot 0 holds 10 of item 1001
+        self.tracker.start_initialization()
+        dump = [bag_line("InitBagData", 0, "1001", 10)]
+        dump += [bag_line("InitBagData", slot, "1009", 1) for slot in range(1, 25)]
+        self.feed(dump)
+        self.assertTrue(self.tracker.initialization_complete)
+        self.assertEqual(self.ui_events.drain()["initialized"], 2)
+
+        self.feed([scene_line(HIDEOUT_SCENE, MAP_SCENE, second=10),
+                   bag_line("Modfy BagItem", 0, "1001", 15, second=20),
+                   bag_line("Modfy BagItem", 1, "1009", 0, second=21)])
+        # Several refreshes in one batch reach the window as one state update
+        pending = self.ui_events.drain()
+        self.assertEqual(list(pending), ["state"])
+        self.assertGreater(self.ui_events.coalesced, 0)
+        state = pending["state"]
+        self.assertEqual(state["map_count"], 1)
+        self.assertEqual(state["drop_list"], {"1001": 5, "1009": -1})
+        self.assertEqual(state["drop_value"]["1001"], 50.0)
+
+        # A new exchange price revalues the drop without changing what it was booked at
+        self.feed(price_lines(7, "1001", [20.0, 20.0, 20.0], second=30))
+        self.assertEqual(self.catalog.price("1001"), 20.0)
+        self.assertEqual(self.tracker.drop_value["1001"], 50.0)
+        self.assertEqual(self.tracker.market_value, 100.0 - self.catalog.price("1009"))
+
+        self.feed([scene_line(MAP_SCENE, HIDEOUT_SCENE, second=130)])
+        self.assertFalse(self.tracker.is_in_map)
+        run = self.tracker.runs[0]
+        self.assertEqual((run.name, run.duration), ("DC_DiXiaCheng000", 120.0))
+        self.assertEqual(run.income, 50.0 - self.catalog.price("1009"))
+        self.assertEqual(self.ui_events.drain()["state"]["income"], run.income)
+
+    def test_drops_carry_the_time_of_their_own_bag_event(self):
+        self.tracker.start_initialization()
+        self.feed([bag_line("InitBagData", slot, "1009", 1) for slot in range(25)])
+        deltas = []
+        self.tracker.listeners.append(lambda event: deltas.append(event) if isinstance(event, ItemDelta) else None)
+
+        # One read during catch-up holds a whole minute of the map
+        self.feed([scene_line(HIDEOUT_SCENE, MAP_SCENE, second=0),
+                   bag_line("Modfy BagItem", 30, "1001", 2, second=20),
+                   bag_line("Modfy BagItem", 0, "1009", 0, second=35),
+                   bag_line("Modfy BagItem", 30, "1001", 3, second=50)])
+        times = {delta.item_id: delta.time - self.tracker.map_start for delta in deltas}
+        self.assertEqual(times, {"1001": 50.0, "1009": 35.0})
+
+    def test_core_does_not_import_tkinter(self):
+        code = ("import sys; import tracker, ui_events, log_parser, log_tailer, replay; "
+                "sys.exit('tkinter' in sys.modules)")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT)
+        self.assertEqual(result.returncode, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+"""
+Bag slots, per-item totals and baselines, and the bag changes the tracker derives from them.
+"""
+
+import unittest
+
+from helpers import dump, modify, new_tracker
+
+from inventory import Inventory
+from log_parser import parse_log
+
+class InventoryTest(unittest.TestCase):
+
+    def test_set_slot_returns_the_deltas(self):
+        bag = Inventory()
+        self.assertEqual(bag.set_slot(102, 0, "1001", 5), [("1001", 5)])
+        self.assertEqual(bag.set_slot(102, 0, "1001", 8), [("1001", 3)])
+        self.assertEqual(bag.set_slot(102, 0, "1001", 8), [])
+        # Another item takes the slot: the old stack leaves, the new one arrives
+        self.assertEqual(bag.set_slot(102, 0, "1009", 2), [("1001", -8), ("1009", 2)])
+        self.assertEqual(bag.set_slot(102, 0, "1009", 0), [("1009", -2)])
+        self.assertEqual(len(bag), 0)
+        self.assertEqual(bag.totals, {})
+
+    def test_totals_across_slots_and_pages(self):
+        bag = Inventory()
+        bag.set_slot(102, 0, "1001", 5)
+        bag.set_slot(103, 0, "1001", 7)
+        bag.set_slot(102, 1, "1009", 1)
+        self.assertEqual(bag.totals, {"1001": 12, "1009": 1})
+        self.assertEqual(bag.total("1001"), 12)
+        self.assertEqual(bag.total("404"), 0)
+
+    def test_baselines(self):
+        bag = Inventory()
+        bag.load([(102, 0, "1001", 5), (102, 1, "1009", 1, 123.0)])
+        self.assertEqual(bag.baselines, {"1001": 5, "1009": 1})
+        bag.set_slot(102, 2, "1001", 3)
+        bag.set_slot(102, 1, "1009", 0)
+        self.assertEqual((bag.net_change("1001"), bag.net_change("1009")), (3, -1))
+        bag.commit("1001")
+        self.assertEqual((bag.net_change("1001"), bag.net_change("1009")), (0, -1))
+        bag.reset_baseline()
+        self.assertEqual(bag.net_change("1009"), 0)
+
+    def test_snapshot_round_trip(self):
+        bag = Inventory()
+        bag.load([(102, 0, "1001", 5), (103, 4, "1009", 2)])
+        bag.set_slot(102, 0, "1001", 9)
+        restored = Inventory()
+        restored.restore(bag.snapshot())
+        self.assertEqual(restored.slots, bag.slots)
+        self.assertEqual(restored.totals, bag.totals)
+        self.assertEqual(restored.net_change("1001"), 4)
+
+class BagChangesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = new_tracker()
+        self.tracker.start_initialization()
+        self.tracker.process(parse_log("".join(dump(range(25)))))
+
+    def changes(self, lines):
+        return [change[:2] for change in self.tracker.detect_bag_changes(parse_log("".join(lines)))]
+
+    def test_moving_a_stack_is_not_a_change(self):
+        self.assertEqual(self.changes([modify(0, "1009", 0), modify(40, "1009", 1)]), [])
+
+    def test_net_change_per_item(self):
+        changes = self.changes([modify(30, "1001", 2), modify(31, "1001", 3), modify(0, "1009", 0)])
+        self.assertEqual(sorted(changes), [("1001", 5), ("1009", -1)])
+        # Booked changes move the baseline, the same bag state is no change the next time
+        self.assertEqual(self.changes([modify(31, "1001", 3)]), [])
+
+    def test_nothing_before_initialization(self):
+        tracker = new_tracker()
+        self.assertEqual(tracker.detect_bag_changes(parse_log(modify(0, "1001", 2))), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+ItemCatalog's in-memory price updates and its debounced, atomic write-behind to the table file.
+"""
+
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import helpers  # puts the repository root on sys.path
+
+import item_table
+from item_catalog import ItemCatalog
+
+ITEMS = {"1001": {"name": "Compass A", "type": "Compass", "price": 1.0},
+         "1009": {"name": "Glow", "type": "Memory Fluorescence", "price": 2.0}}
+
+class ItemCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "full_table.json")
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(ITEMS, f)
+
+    def catalog(self, **kwargs):
+        catalog = ItemCatalog(self.path, **kwargs)
+        self.addCleanup(catalog.flush)
+        return catalog
+
+    def saved(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_lookups(self):
+        catalog = self.catalog(autosave=False)
+        self.assertIn(1001, catalog)
+        self.assertEqual(catalog.name("1001"), "Compass A")
+        self.assertEqual(catalog.category(1009), item_table.MEMORY_GLOW)
+        self.assertEqual(catalog.category("9"), item_table.OTHER)
+        self.assertFalse(catalog.update_price("9", 1.0))
+
+    def test_burst_of_changes_is_written_once(self):
+        catalog = self.catalog(save_delay=0.1)
+        with mock.patch("item_catalog.os.replace", wraps=os.replace) as replace:
+            catalog.update_price("1001", 3.0)
+            catalog.update_prices({"1001": 4.0, "1009": 5.0})
+            self.assertEqual(self.saved()["1001"]["price"], 1.0)
+            deadline = time.monotonic() + 5
+            while not replace.called and time.monotonic() < deadline:
+                time.sleep(0.01)
+            time.sleep(0.2)
+        self.assertEqual(replace.call_count, 1)
+        self.assertEqual(replace.call_args[0], (self.path + ".tmp", self.path))
+        self.assertEqual({item_id: entry["price"] for item_id, entry in self.saved().items()}, {"1001": 4.0, "1009": 5.0})
+        self.assertFalse(os.path.exists(self.path + ".tmp"))
+
+    def test_content_is_synced_before_the_swap(self):
+        catalog = self.catalog(autosave=False)
+        calls = []
+        with mock.patch("item_catalog.os.fsync", side_effect=lambda fd: calls.append("fsync")), \
+                mock.patch("item_catalog.os.replace", side_effect=lambda *args: calls.append("replace")):
+            catalog.update_price("1001", 3.0)
+            catalog.flush()
+        self.assertEqual(calls, ["fsync", "replace"])
+
+    def test_touch_and_unchanged_prices_do_not_save(self):
+        catalog = self.catalog(autosave=False)
+        catalog.touch(["1001"])
+        self.assertEqual(catalog.update_prices({"1009": 2.0}), 0)
+        with mock.patch("item_catalog.os.replace") as replace:
+            catalog.flush()
+        replace.assert_not_called()
+        self.assertGreater(catalog.get("1001")["last_update"], 0)
+
+    def test_failed_write_is_retried(self):
+        catalog = self.catalog(autosave=False)
+        catalog.update_price("1001", 3.0)
+        with mock.patch("item_catalog.os.replace", side_effect=OSError("locked")):
+            catalog.flush()
+        catalog.flush()
+        self.assertEqual(self.saved()["1001"]["price"], 3.0)
+
+    def test_price_listeners(self):
+        catalog = self.catalog(autosave=False)
+        changes = []
+        catalog.listeners.append(lambda item_id, price: changes.append((item_id, price)))
+        catalog.update_price("1001", 1.0)
+        catalog.update_price("1001", 6.0)
+        catalog.update_prices({1009: 7.0})
+        self.assertEqual(changes, [("1001", 6.0), ("1009", 7.0)])
+
+if __name__ == "__main__":
+    unittest.main()
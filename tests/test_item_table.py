@@ -0,0 +1,55 @@
+"""
+Type normalization and category selection of the compiled item table.
+"""
+
+import unittest
+
+import helpers  # puts the repository root on sys.path
+
+import item_table
+from item_table import ItemTable, normalize_type
+
+class NormalizeTypeTest(unittest.TestCase):
+
+    def test_spellings(self):
+        self.assertEqual(normalize_type("Memory Fluorescence"), item_table.MEMORY_GLOW)
+        self.assertEqual(normalize_type("记忆荧光"), item_table.MEMORY_GLOW)
+        self.assertEqual(normalize_type("BOSS  Ticket"), item_table.BOSS_TICKET)
+        self.assertEqual(normalize_type("Magic Cube Materials"), item_table.CUBE_MATERIAL)
+        self.assertEqual(normalize_type("Ashes"), item_table.EQUIPMENT_MATERIAL)
+        self.assertEqual(normalize_type("Ashe"), item_table.OTHER)
+        self.assertEqual(normalize_type(None), item_table.OTHER)
+
+class SelectTest(unittest.TestCase):
+
+    def setUp(self):
+        self.table = ItemTable.compile({
+            "1": {"name": "Compass A", "type": "Compass", "price": 1},
+            "2": {"name": "Ember", "type": "Hard Currency", "price": 2},
+            "3": {"name": "Glow", "type": "Memory Glow", "price": 3},
+            "4": {"name": "Compass B", "type": "罗盘", "price": 4},
+            "6": {"name": "Trinket", "type": "Something New", "price": 6},
+        })
+
+    def test_mask_keeps_order_and_skips_unknown_items(self):
+        drops = ["4", "9", "2", "1", "3"]
+        self.assertEqual(self.table.select(drops, item_table.COMPASS), [("4", 3), ("1", 0)])
+        self.assertEqual([item_id for item_id, _ in self.table.select(drops, item_table.ALL)], ["4", "2", "1", "3"])
+        self.assertEqual(self.table.select(drops, item_table.DREAM_MATERIAL), [])
+        self.assertEqual(self.table.select([], item_table.ALL), [])
+
+    def test_listed_leaves_out_unknown_types(self):
+        self.assertEqual(self.table.category("6"), item_table.OTHER)
+        self.assertEqual(self.table.category("9"), item_table.OTHER)
+        self.assertEqual(self.table.category("4"), item_table.COMPASS)
+        self.assertEqual([item_id for item_id, _ in self.table.select(["6", "1"], item_table.ALL)], ["6", "1"])
+        self.assertEqual([item_id for item_id, _ in self.table.select(["6", "1"], item_table.LISTED)], ["1"])
+
+    def test_added_and_retyped_items_are_selected(self):
+        self.assertEqual(self.table.select(["3"], item_table.COMPASS), [])
+        self.table.add("3", "Glow", "Compass")
+        self.table.add("5", "Compass C", "Compass")
+        self.assertEqual(self.table.select(["3", "5"], item_table.COMPASS), [("3", 2), ("5", 5)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+"""
+Tokenizing log text into events, and skipping to the lines that matter when catching up.
+"""
+
+import calendar
+import unittest
+
+from helpers import MAP_SCENE, bag_line, line, login_line, modify, price_lines, scene_line
+
+from log_parser import (HIDEOUT_SCENE, BagInit, BagModify, LogClock, LogParser, PlayerLogin, PriceQuery,
+                        PriceResult, SceneChange, filter_lines, parse_log)
+
+# 2025.10.22 14:00:00 UTC, the time helpers.line() counts from
+START = calendar.timegm((2025, 10, 22, 14, 0, 0))
+
+class LogParserTest(unittest.TestCase):
+
+    def test_event_types(self):
+        lines = [bag_line("InitBagData", 3, "1009", 2, page=103, second=1), modify(4, "1001", 0, second=2),
+                 scene_line(HIDEOUT_SCENE, MAP_SCENE, second=3), login_line(second=4), line("noise", second=5)]
+        self.assertEqual(parse_log("".join(lines)), [
+            BagInit(103, 3, "1009", 2, START + 1),
+            BagModify(102, 4, "1001", 0, START + 2),
+            SceneChange(HIDEOUT_SCENE, MAP_SCENE, START + 3),
+            PlayerLogin(START + 4),
+        ])
+
+    def test_exchange_block(self):
+        events = parse_log("".join(price_lines(7, "1001", [1.5, 2.0, 3.25], second=9)))
+        self.assertEqual(events, [PriceQuery("7", "1001", START + 9),
+                                  PriceResult("7", ["1.5", "2.0", "3.25"], START + 9)])
+
+    def test_exchange_block_split_at_every_line(self):
+        lines = price_lines(7, "1001", [1.5, 2.0]) + [modify(0, "1001", 1)]
+        expected = parse_log("".join(lines))
+        for cut in range(1, len(lines)):
+            parser = LogParser()
+            events = parser.parse("".join(lines[:cut])) + parser.parse("".join(lines[cut:])) + parser.flush()
+            self.assertEqual(events, expected, f"split after line {cut}")
+
+    def test_socket_marker_closes_the_open_block(self):
+        parser = LogParser()
+        lines = price_lines(7, "1001", [1.0])[:-1] + price_lines(8, "1009", [2.0])
+        events = parser.parse("".join(lines))
+        self.assertEqual([type(event).__name__ for event in events],
+                         ["PriceQuery", "PriceResult", "PriceQuery", "PriceResult"])
+        self.assertEqual(parser.flush(), [])
+
+    def test_unfinished_block_is_left_open_until_flushed(self):
+        parser = LogParser()
+        self.assertEqual(parser.parse("".join(price_lines(7, "1001", [1.0, 2.0])[:-2])), [PriceQuery("7", "1001", START)])
+        resumed = LogParser()
+        resumed.restore(parser.snapshot())
+        self.assertEqual(resumed.parse("+2 [2.0]\n"), [])
+        self.assertEqual(resumed.flush(), [PriceResult("7", ["1.0", "2.0"], START)])
+
+class LogClockTest(unittest.TestCase):
+
+    def test_milliseconds_and_cached_second(self):
+        clock = LogClock()
+        self.assertEqual(clock.parse(line("a", second=5, ms=80)), START + 5.08)
+        self.assertEqual(clock.parse(line("b", second=5, ms=999)), START + 5.999)
+        self.assertEqual(clock.parse(line("c", second=6)), START + 6)
+
+    def test_rollover(self):
+        clock = LogClock()
+        stamps = ["2025.12.31-23.59.59:900", "2026.01.01-00.00.00:100", "2026.01.01-00.01.00:000",
+                  "2024.02.28-23.59.59:000", "2024.02.29-00.00.00:000"]
+        times = [clock.parse(f"[{stamp}][  0]GameLog: x") for stamp in stamps]
+        expected = [calendar.timegm((2025, 12, 31, 23, 59, 59)) + 0.9, calendar.timegm((2026, 1, 1, 0, 0, 0)) + 0.1,
+                    calendar.timegm((2026, 1, 1, 0, 1, 0)), calendar.timegm((2024, 2, 28, 23, 59, 59)),
+                    calendar.timegm((2024, 2, 29, 0, 0, 0))]
+        self.assertEqual([round(t, 3) for t in times], [round(t, 3) for t in expected])
+
+    def test_lines_without_a_timestamp(self):
+        clock = LogClock()
+        self.assertIsNone(clock.parse("+1 [2.0]"))
+        self.assertIsNone(clock.parse("[not a time stamp at all]xx"))
+        self.assertIsNone(clock.parse("[2025.10.22-14.00.xx:000][  0]GameLog: x"))
+
+class FilterLinesTest(unittest.TestCase):
+
+    def test_only_marked_lines_are_kept_in_log_order(self):
+        kept = [modify(0, "1001", 2, second=1), scene_line(HIDEOUT_SCENE, MAP_SCENE, second=2),
+                login_line(second=3), bag_line("InitBagData", 4, "1009", 1, second=4)]
+        lines = price_lines(7, "1001", [1.0, 2.0]) + kept[:2] + price_lines(8, "1009", [3.0]) + kept[2:]
+        data = "".join(lines).encode()
+        self.assertEqual(filter_lines(data), "".join(kept).encode())
+
+    def test_line_with_several_markers_is_kept_once(self):
+        data = b"noise\nBagMgr@: PlayerInitPkgMgr Login2Client\nmore noise\n"
+        self.assertEqual(filter_lines(data), b"BagMgr@: PlayerInitPkgMgr Login2Client\n")
+
+    def test_block_without_markers(self):
+        self.assertEqual(filter_lines("".join(price_lines(7, "1001", [1.0])).encode()), b"")
+
+    def test_last_line_without_newline(self):
+        self.assertEqual(filter_lines(b"noise\nBagMgr@:x"), b"BagMgr@:x")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+"""
+LogTailer against a log that a simulated game appends to, splits lines in, truncates and rotates.
+"""
+
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from helpers import line
+
+from log_parser import filter_lines
+from log_tailer import InotifyWatcher, LogTailer, PollWatcher
+
+class LogTailerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "UE_game.log")
+        self.write(b"", "wb")
+
+    def write(self, data, mode="ab"):
+        with open(self.path, mode) as f:
+            f.write(data)
+
+    def tailer(self, **kwargs):
+        kwargs.setdefault("min_latency", 0)
+        kwargs.setdefault("use_notifications", False)
+        tailer = LogTailer(self.path, from_end=False, **kwargs)
+        self.addCleanup(tailer.close)
+        return tailer
+
+    def test_split_line_is_carried_over(self):
+        tailer = self.tailer()
+        self.write(b"first\nsec")
+        self.assertEqual(tailer.read(), "first\n")
+        self.assertEqual(tailer.offset, len(b"first\n"))
+        self.write(b"ond\n")
+        self.assertEqual(tailer.read(), "second\n")
+        self.assertEqual(tailer.read(), "")
+
+    def test_blocks_never_split_lines(self):
+        tailer = self.tailer(block_size=7)
+        lines = [f"line {i}\n" for i in range(50)]
+        self.write("".join(lines).encode())
+        blocks = list(tailer.read_blocks())
+        self.assertGreater(len(blocks), 1)
+        self.assertTrue(all(block.endswith("\n") for block in blocks))
+        self.assertEqual("".join(blocks), "".join(lines))
+
+    def test_resume_from_offset_of_the_same_file(self):
+        self.write(b"seen\nnew\n")
+        inode = os.stat(self.path).st_ino
+        tailer = self.tailer(resume=(inode, len(b"seen\n")))
+        self.assertTrue(tailer.resumed)
+        self.assertEqual(tailer.read(), "new\n")
+        # Another file, or an offset past its end, is read from the start (from_end=False)
+        self.assertFalse(self.tailer(resume=(inode + 1, 5)).resumed)
+        self.assertFalse(self.tailer(resume=(inode, 100)).resumed)
+
+    def test_truncate(self):
+        tailer = self.tailer()
+        self.write(b"old line one\nold line two\n")
+        tailer.read()
+        self.write(b"new\n", "wb")
+        self.assertEqual(tailer.read(), "new\n")
+
+    def test_rewrite_with_same_size(self):
+        tailer = self.tailer()
+        self.write(b"aaaa\n")
+        tailer.read()
+        with open(self.path, "r+b") as f:
+            f.write(b"bbbb\ncc\n")
+        self.assertEqual(tailer.read(), "bbbb\ncc\n")
+
+    def test_rotate(self):
+        tailer = self.tailer()
+        self.write(b"before\nunfinished")
+        self.assertEqual(tailer.read(), "before\n")
+        os.rename(self.path, self.path + ".1")
+        self.write(b"after\n", "wb")
+        # The old file's last line is finished by the rotation, then the new file follows
+        self.assertEqual(tailer.read(), "unfinished\nafter\n")
+        self.write(b"more\n")
+        self.assertEqual(tailer.read(), "more\n")
+
+    def test_overlong_line_is_skipped(self):
+        tailer = self.tailer(block_size=16, max_line_size=64)
+        self.write(b"ok\n" + b"x" * 200)
+        self.assertEqual(tailer.read(), "ok\n")
+        self.assertLessEqual(len(tailer._carry), 64 + 16)
+        self.write(b"x" * 100 + b"\nnext\n")
+        self.assertEqual(tailer.read(), "next\n")
+
+    def test_only_lines_before_filter_until_are_filtered(self):
+        tailer = self.tailer(block_size=64)
+        old = [line(f"old {i}") for i in range(20)] + [line("BagMgr@: old bag")]
+        recent = [line(f"recent {i}") for i in range(10)]
+        self.write("".join(old + recent).encode())
+        # The cut falls inside the first recent line, which is still read whole
+        until = len("".join(old).encode()) + 5
+        keep_bag = lambda data: filter_lines(data, (b"BagMgr@:",))
+        text = "".join(tailer.read_blocks(keep_bag, until))
+        self.assertEqual(text, line("BagMgr@: old bag") + "".join(recent))
+
+    def test_simulated_writer(self):
+        lines = [line(f"line {i}", second=i % 60) for i in range(2000)]
+        data = "".join(lines).encode()
+        tailer = self.tailer(block_size=256, max_latency=0.05)
+
+        def writer():
+            rng = random.Random(1)
+            position = 0
+            while position < len(data):
+                # Arbitrary cuts, including in the middle of lines
+                step = rng.randint(1, 300)
+                self.write(data[position:position + step])
+                position += step
+                if rng.random() < 0.1:
+                    time.sleep(0.001)
+
+        thread = threading.Thread(target=writer)
+        thread.start()
+        received = []
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            received.append(tailer.poll(0.05))
+            if not thread.is_alive() and tailer.backlog() == 0:
+                break
+        thread.join()
+        received.append(tailer.read())
+        self.assertEqual("".join(received), "".join(lines))
+
+class WatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "UE_game.log")
+        with open(self.path, "wb"):
+            pass
+
+    def append_later(self, delay=0.05):
+        def append():
+            time.sleep(delay)
+            with open(self.path, "ab") as f:
+                f.write(b"line\n")
+        thread = threading.Thread(target=append)
+        thread.start()
+        self.addCleanup(thread.join)
+
+    def check_watcher(self, watcher):
+        self.addCleanup(watcher.close)
+        self.assertFalse(watcher.wait(0.05))
+        self.append_later()
+        self.assertTrue(watcher.wait(5))
+
+    def test_poll_watcher(self):
+        self.check_watcher(PollWatcher(self.path, min_interval=0.01, max_interval=0.05))
+
+    @unittest.skipUnless(sys.platform.startswith("linux"), "inotify is Linux only")
+    def test_inotify_watcher(self):
+        self.check_watcher(InotifyWatcher(self.path))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Histograms, stage timings and gauges of the log thread's instrumentation.
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+import helpers  # puts the repository root on sys.path
+
+from metrics import Histogram, TickStats
+
+class HistogramTest(unittest.TestCase):
+
+    def test_percentiles_are_bucket_bounds(self):
+        histogram = Histogram(1)
+        for value in range(1, 101):
+            histogram.add(value)
+        # 63 values are below 64, so the median lies in the 32..63 bucket
+        self.assertEqual(histogram.percentile(50), 64)
+        self.assertEqual(histogram.percentile(10), 16)
+        # The top bucket is capped at the largest value seen
+        self.assertEqual(histogram.percentile(99), 100)
+        self.assertEqual(histogram.summary(), {"count": 100, "mean": 50.5, "p50": 64, "p99": 100, "max": 100,
+                                               "last": 100, "total": 5050.0})
+
+    def test_unit_and_overflow(self):
+        histogram = Histogram(1e-3)
+        histogram.add(0.0005)
+        histogram.add(0.003)
+        histogram.add(1e12)
+        self.assertEqual(histogram.counts[0], 1)
+        self.assertEqual(histogram.counts[2], 1)
+        self.assertEqual(histogram.counts[-1], 1)
+        self.assertEqual(histogram.percentile(30), 0.001)
+
+    def test_empty(self):
+        self.assertEqual(Histogram().percentile(50), 0.0)
+        self.assertEqual(Histogram().summary()["mean"], 0.0)
+
+class TickStatsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def test_snapshot(self):
+        stats = TickStats()
+        with stats.stage("parse"):
+            pass
+        stats.record("parse", 0.002)
+        stats.observe("lines", 40)
+        stats.add_gauge("queue", lambda: 3)
+        stats.add_gauge("broken", lambda: 1 / 0)
+        snap = stats.snapshot()
+        self.assertEqual(snap["stages"]["parse"]["count"], 2)
+        self.assertEqual(snap["stages"]["parse"]["max"], 0.002)
+        self.assertEqual(snap["values"]["lines"]["total"], 40)
+        self.assertEqual(snap["gauges"]["queue"], 3)
+        self.assertTrue(snap["gauges"]["broken"].startswith("error"))
+        report = stats.format()
+        for name in ("parse", "lines per tick", "queue: 3"):
+            self.assertIn(name, report)
+
+    def test_dump_interval(self):
+        stats = TickStats()
+        path = os.path.join(self.folder.name, "tick_stats.txt")
+        self.assertFalse(stats.maybe_dump(path, interval=0))
+        self.assertFalse(stats.maybe_dump(path, interval=3600))
+        self.assertFalse(os.path.exists(path))
+        self.assertTrue(stats.maybe_dump(path, interval=1e-9))
+        with open(path, "r", encoding="utf-8") as f:
+            self.assertIn("Uptime", f.read())
+
+    def test_profiler_is_switched_from_the_profiled_thread(self):
+        stats = TickStats()
+        path = os.path.join(self.folder.name, "profile.prof")
+        stats.set_profiling(True)
+        stats.update_profiler(path)
+        self.assertTrue(stats.snapshot()["profiling"])
+        sum(range(1000))
+        stats.set_profiling(False)
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats.update_profiler(path)
+        self.assertFalse(stats.snapshot()["profiling"])
+        self.assertTrue(os.path.exists(path))
+
+if __name__ == "__main__":
+    unittest.main()
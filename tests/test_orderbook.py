@@ -0,0 +1,73 @@
+"""
+Orderbook statistics over known listings, and the cache that keeps them per item.
+"""
+
+import math
+import unittest
+
+from helpers import new_catalog, price_lines
+
+from log_parser import parse_log
+from orderbook import Orderbook, OrderbookCache
+from tracker import Tracker
+
+# One listing far above the others, outside the quartiles by more than 1.5 IQR
+LISTINGS = [9, 1, 8, 2, 100, 7, 3, 6, 4, 5]
+
+class OrderbookTest(unittest.TestCase):
+
+    def setUp(self):
+        self.book = Orderbook(LISTINGS, time_seen=0)
+
+    def test_quantiles(self):
+        self.assertEqual(len(self.book), 10)
+        self.assertEqual(self.book.quantile(0.5), 5.5)
+        # The outlier still counts for the quantiles, the 90% one is pulled up by it
+        self.assertEqual([round(float(q), 6) for q in self.book.quantiles], [1.9, 3.25, 5.5, 7.75, 18.1])
+
+    def test_outliers_are_rejected(self):
+        self.assertEqual(self.book.depth, 9)
+        self.assertEqual(list(self.book.clean), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(self.book.robust_price(), 5.0)
+
+    def test_fill_prices(self):
+        # 3 units take the three cheapest listings; past the depth the last listing is repeated
+        self.assertEqual(list(self.book.fill_prices([1, 3, 12])), [1.0, 2.0, 6.0])
+        self.assertEqual(self.book.fill_price(0), 1.0)
+        self.assertEqual(self.book.sell_now(3), 6.0)
+
+    def test_invalid_listings_are_ignored(self):
+        book = Orderbook([0, -1, math.nan, math.inf, 2, 4], time_seen=0)
+        self.assertEqual(list(book.prices), [2, 4])
+
+    def test_empty_book(self):
+        book = Orderbook([], time_seen=0)
+        self.assertIsNone(book.quantile(0.5))
+        self.assertIsNone(book.robust_price())
+        self.assertIsNone(book.sell_now(2))
+        self.assertTrue(math.isnan(book.fill_prices([1])[0]))
+        self.assertIsNone(book.summary()["quantiles"])
+
+class OrderbookCacheTest(unittest.TestCase):
+
+    def test_books_expire_on_the_cache_clock(self):
+        clock = [1000.0]
+        cache = OrderbookCache(ttl=100, clock=lambda: clock[0])
+        cache.update(1001, LISTINGS)
+        cache.update("1009", LISTINGS, time_seen=950.0)
+        clock[0] = 1060.0
+        self.assertEqual(cache.sell_now("1001", 3), 6.0)
+        self.assertEqual(cache.prune(), 1)
+        self.assertIsNone(cache.get("1009"))
+        clock[0] = 1101.0
+        self.assertIsNone(cache.get("1001"))
+        self.assertEqual(len(cache), 0)
+
+    def test_replayed_searches_are_fresh_on_log_time(self):
+        tracker = Tracker.from_config({"show_sell_now": True}, catalog=new_catalog(), drop_log_path=None)
+        # The search is from a log months old, the tracker's clock is the log's
+        tracker.process(parse_log("".join(price_lines(7, "1001", LISTINGS))))
+        self.assertEqual(tracker.orderbooks.sell_now("1001", 3), 6.0)
+
+if __name__ == "__main__":
+    unittest.main()
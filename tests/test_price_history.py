@@ -0,0 +1,97 @@
+"""
+The per-item price ring buffer, the listing estimators and saving the history.
+"""
+
+import os
+import tempfile
+import unittest
+
+import helpers  # puts the repository root on sys.path
+
+from price_history import PriceHistory, PriceSeries, estimate_price
+
+class PriceSeriesTest(unittest.TestCase):
+
+    def series(self, times, capacity=4):
+        series = PriceSeries(capacity)
+        for t in times:
+            series.append(t, t * 10.0)
+        return series
+
+    def test_full_buffer_keeps_the_newest_in_order(self):
+        series = self.series([1, 2, 3, 4, 5, 6])
+        self.assertEqual(len(series), 4)
+        self.assertEqual(series.window(None, None)[0], [3, 4, 5, 6])
+        self.assertEqual(series.last(), (6, 60.0))
+
+    def test_price_at(self):
+        series = self.series([10, 20, 30])
+        self.assertIsNone(series.at(5))
+        self.assertEqual(series.at(5, default=-1), -1)
+        self.assertEqual(series.at(10), 100.0)
+        self.assertEqual(series.at(29), 200.0)
+        self.assertEqual(series.at(99), 300.0)
+
+    def test_out_of_order_sample_is_inserted_at_its_time(self):
+        series = self.series([10, 30])
+        series.append(20, 999.0)
+        self.assertEqual(series.window(None, None)[0], [10, 20, 30])
+        self.assertEqual(series.at(25), 999.0)
+        self.assertEqual(series.at(30), 300.0)
+
+    def test_out_of_order_sample_in_a_wrapped_buffer(self):
+        series = self.series([1, 2, 3, 4, 5, 7])
+        series.append(6, 999.0)
+        self.assertEqual(series.window(None, None)[0], [4, 5, 6, 7])
+        series.append(8, 80.0)
+        self.assertEqual(series.window(None, None)[0], [5, 6, 7, 8])
+        # Older than everything kept, it is not recorded
+        series.append(1, 999.0)
+        self.assertEqual(series.window(None, None)[0], [5, 6, 7, 8])
+
+    def test_window_statistics(self):
+        series = PriceSeries()
+        series.append(1, 10.0, depth=1)
+        series.append(2, 20.0, depth=3)
+        series.append(3, 90.0, depth=0)
+        self.assertEqual(series.window(2, 3)[1], [20.0, 90.0])
+        self.assertEqual(series.median(), 20.0)
+        self.assertEqual(series.median(1, 2), 15.0)
+        self.assertEqual(series.vwap(), 17.5)
+        self.assertIsNone(series.vwap(3, 3))
+        self.assertIsNone(series.median(5, 6))
+
+class EstimatorTest(unittest.TestCase):
+
+    def test_estimators(self):
+        values = [1, 2, 3, 4, 5, 6, 7, 8, 9, 100]
+        self.assertEqual(estimate_price(values, "mean30"), 14.5)
+        self.assertEqual(estimate_price(values, "median"), 5.5)
+        self.assertEqual(estimate_price(values, "trimmed_mean"), 5.5)
+        self.assertIsNone(estimate_price([]))
+
+    def test_only_the_cheapest_30_listings_count(self):
+        self.assertEqual(estimate_price([1.0] * 30 + [1000.0]), 1.0)
+
+class PriceHistoryTest(unittest.TestCase):
+
+    def test_save_and_load(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        path = os.path.join(folder.name, "price_history.json")
+        history = PriceHistory(path, estimator="median")
+        self.assertEqual(history.record_listings(1001, [3, 1, 2], t=100), 2)
+        history.record("1001", 5.0, t=50)
+        history.flush()
+
+        loaded = PriceHistory(path)
+        self.assertEqual(loaded.load(), 1)
+        self.assertEqual(loaded.get("1001").window(None, None), ([50, 100], [5.0, 2.0], [1, 3]))
+        self.assertEqual(loaded.price_at("1001", 99), 5.0)
+        self.assertEqual(loaded.price_at("1009", 99, default=-1), -1)
+
+    def test_unknown_estimator_falls_back(self):
+        self.assertEqual(PriceHistory(estimator="nope").estimator, "mean30")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+"""
+Pairing exchange search requests with their responses by SynId, across chunks.
+"""
+
+import unittest
+
+from helpers import new_tracker, price_lines
+
+from log_parser import LogParser, PriceQuery, PriceResult
+from tracker import CURRENCY_ID, MAX_PENDING_PRICE_QUERIES
+
+class PriceMatchingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tracker = new_tracker()
+        self.prices = []
+        self.tracker.on_price = lambda item_id, price: self.prices.append((item_id, price))
+
+    def test_response_in_a_later_chunk(self):
+        lines = price_lines(7, "1001", [2.0, 4.0])
+        parser = LogParser()
+        self.tracker.process(parser.parse("".join(lines[:5])))
+        self.assertEqual(self.prices, [])
+        self.tracker.process(parser.parse("".join(lines[5:])))
+        self.assertEqual(self.prices, [("1001", 3.0)])
+        self.assertEqual(self.tracker.catalog.price("1001"), 3.0)
+        self.assertEqual(self.tracker.price_queries, {})
+
+    def test_interleaved_searches(self):
+        self.tracker.get_price_info([PriceQuery("1", "1001"), PriceQuery("2", "1009"),
+                                     PriceResult("2", ["5"]), PriceResult("1", ["1", "2"])])
+        self.assertEqual(self.prices, [("1009", 5.0), ("1001", 1.5)])
+
+    def test_unmatched_and_currency_responses_are_ignored(self):
+        self.tracker.get_price_info([PriceResult("9", ["5"]), PriceQuery("3", CURRENCY_ID), PriceResult("3", ["1"])])
+        self.assertEqual(self.prices, [])
+        self.assertEqual(self.tracker.price_queries, {})
+
+    def test_pending_requests_are_bounded(self):
+        queries = [PriceQuery(str(n), "1001") for n in range(MAX_PENDING_PRICE_QUERIES + 5)]
+        self.tracker.get_price_info(queries)
+        self.assertEqual(len(self.tracker.price_queries), MAX_PENDING_PRICE_QUERIES)
+        # The oldest requests were given up on
+        self.tracker.get_price_info([PriceResult("0", ["5"]), PriceResult("5", ["6"])])
+        self.assertEqual(self.prices, [("1001", 6.0)])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+PriceSubmitter against a local stub of the price server's /submit endpoint.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import helpers  # puts the repository root on sys.path
+
+from price_submitter import PriceSubmitter
+
+class SubmitServer(ThreadingHTTPServer):
+    """Records every submitted (item id, price), or answers 503 while failing"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), SubmitHandler)
+        self.failing = False
+        self.attempts = 0
+        self.received = []
+
+class SubmitHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.attempts += 1
+        if server.failing:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        query = parse_qs(urlparse(self.path).query)
+        server.received.append((query["ids"][0], float(query["new_price"][0])))
+        body = b'{"ok": true}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+class PriceSubmitterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = SubmitServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.spool_path = os.path.join(self.folder.name, "price_spool.json")
+
+    def submitter(self, **kwargs):
+        kwargs.setdefault("batch_interval", 0.1)
+        kwargs.setdefault("min_backoff", 0.2)
+        kwargs.setdefault("timeout", 5)
+        submitter = PriceSubmitter(f"http://127.0.0.1:{self.server.server_address[1]}", lambda: "test-user",
+                                   spool_path=self.spool_path, **kwargs)
+        self.addCleanup(submitter.stop)
+        return submitter
+
+    def test_repeated_prices_are_coalesced(self):
+        submitter = self.submitter(batch_interval=0.3)
+        submitter.start()
+        submitter.submit("1001", 1.0)
+        submitter.submit("1001", 2.0)
+        submitter.submit(1009, 3.0)
+        self.assertTrue(wait_until(lambda: submitter.sent == 2))
+        self.assertEqual(sorted(self.server.received), [("1001", 2.0), ("1009", 3.0)])
+        self.assertEqual(submitter.queue_depth(), 0)
+
+    def test_backoff_while_the_server_fails(self):
+        self.server.failing = True
+        submitter = self.submitter()
+        submitter.start()
+        submitter.submit("1001", 5.0)
+        self.assertTrue(wait_until(lambda: submitter.backoff > 0))
+        self.assertEqual(submitter.backoff, 0.2)
+        # Unsent prices are on disk while the server is down
+        self.assertTrue(os.path.exists(self.spool_path))
+        self.assertTrue(wait_until(lambda: submitter.backoff >= 0.4))
+        attempts = self.server.attempts
+        self.assertGreaterEqual(attempts, 2)
+
+        self.server.failing = False
+        self.assertTrue(wait_until(lambda: submitter.sent == 1))
+        self.assertEqual(self.server.received, [("1001", 5.0)])
+        self.assertTrue(wait_until(lambda: submitter.backoff == 0))
+        self.assertFalse(os.path.exists(self.spool_path))
+
+    def test_spool_is_replayed_on_the_next_start(self):
+        offline = self.submitter()
+        offline.submit("1001", 7.0)
+        offline.submit("1011", 8.0)
+        offline.stop()
+        self.assertTrue(os.path.exists(self.spool_path))
+        self.assertEqual(self.server.received, [])
+
+        submitter = self.submitter()
+        self.assertEqual(submitter.queue_depth(), 2)
+        submitter.start()
+        self.assertTrue(wait_until(lambda: submitter.sent == 2))
+        self.assertEqual(sorted(self.server.received), [("1001", 7.0), ("1011", 8.0)])
+        self.assertTrue(wait_until(lambda: not os.path.exists(self.spool_path)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+PriceSync against a local server that versions its price list with an ETag.
+"""
+
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from helpers import new_catalog
+
+from price_sync import PriceSync
+
+class PriceServer(ThreadingHTTPServer):
+    """Serves /get with the current prices, or 304 if the client already has this version"""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), PriceHandler)
+        self.prices = {}
+        self.version = 0
+        self.requests = []
+
+    def publish(self, prices):
+        self.prices = dict(prices)
+        self.version += 1
+
+class PriceHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        etag = f'"v{server.version}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = json.dumps({item_id: {"price": price} for item_id, price in server.prices.items()}).encode()
+        self.send_response(200)
+        self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class PriceSyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = PriceServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.catalog = new_catalog()
+        self.sync = PriceSync(f"http://127.0.0.1:{self.server.server_address[1]}", self.catalog, timeout=5)
+
+    def test_unchanged_list_is_a_304_that_confirms_prices(self):
+        self.server.publish({"1001": 10.0, "1009": 20.0})
+        self.assertEqual(self.sync.sync(), 2)
+        self.catalog.items["1001"]["last_update"] = 0
+
+        self.assertEqual(self.sync.sync(), 0)
+        self.assertEqual(self.server.requests[-1].get("If-None-Match"), '"v1"')
+        self.assertEqual(self.sync.not_modified, 1)
+        self.assertGreater(self.catalog.items["1001"]["last_update"], 0)
+
+    def test_only_prices_that_differ_from_the_catalog_are_applied(self):
+        self.server.publish({"1001": 10.0, "1009": 20.0})
+        self.sync.sync()
+        self.server.publish({"1001": 10.0, "1009": 25.0})
+        self.assertEqual(self.sync.sync(), 1)
+        self.assertEqual(self.catalog.price("1009"), 25.0)
+        self.assertEqual(self.sync.items_changed, 3)
+
+    def test_server_price_is_applied_again_after_a_local_price(self):
+        self.server.publish({"1001": 10.0})
+        self.sync.sync()
+        # An exchange search in the log overwrites the price locally
+        self.catalog.update_price("1001", 12.0)
+        # The server list moves on for other items, its price for 1001 stays the same
+        self.server.publish({"1001": 10.0, "1009": 20.0})
+        self.sync.sync()
+        self.assertEqual(self.catalog.price("1001"), 10.0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Offline replay of a whole log through the tracking core.
+"""
+
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from helpers import MAP_SCENE, ROOT, dump, modify, new_catalog, price_lines, scene_line
+
+import replay
+from log_parser import HIDEOUT_SCENE
+
+class ReplayTest(unittest.TestCase):
+
+    def setUp(self):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        self.path = os.path.join(folder.name, "UE_game.log")
+        self.table_path = os.path.join(ROOT, "full_table.json")
+        # Two map runs after the bag dump, with an exchange search between them
+        lines = dump(range(25))
+        lines += [scene_line(HIDEOUT_SCENE, MAP_SCENE, second=10), modify(30, "1001", 4, second=20),
+                  modify(0, "1009", 0, second=30), scene_line(MAP_SCENE, HIDEOUT_SCENE, second=70)]
+        lines += price_lines(7, "1001", [10.0, 10.0], second=80)
+        lines += [scene_line(HIDEOUT_SCENE, MAP_SCENE, second=100), modify(30, "1001", 6, second=110),
+                  scene_line(MAP_SCENE, HIDEOUT_SCENE, second=160)]
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(lines)
+
+    def test_maps_of_the_log(self):
+        tracker, maps, stats = replay.replay(self.path, self.table_path)
+        self.assertEqual(tracker.map_count, 2)
+        self.assertEqual([(run.index, run.duration) for run in tracker.runs], [(1, 60.0), (2, 60.0)])
+        self.assertEqual([(record["drops"], record["consumption"]) for record in maps],
+                         [({"1001": 4}, {"1009": 1}), ({"1001": 2}, {})])
+        # Drops are valued at the table's price, the search only updates it once its batch is done
+        self.assertEqual(maps[1]["value"], {"1001": round(2 * new_catalog().price("1001"), 4)})
+        self.assertEqual(tracker.catalog.price("1001"), 10.0)
+        self.assertEqual(stats["lines"], 25 + 7 + 4 + 3)
+        self.assertEqual(stats["bytes"], os.path.getsize(self.path))
+
+    def test_json_output(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            replay.main([self.path, "--table", self.table_path, "--json"])
+        report = json.loads(output.getvalue())
+        self.assertEqual(report["map_count"], 2)
+        self.assertEqual(report["drops"], {"1001": 6, "1009": -1})
+        self.assertEqual(len(report["runs"]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Writing tracker events to sessions.db and reading them back.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+
+import helpers  # puts the repository root on sys.path
+
+from session_store import SessionStore, connect
+from tracker import ItemDelta, MapEnter, MapExit
+
+class SessionStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, "sessions.db")
+
+    def record(self, events):
+        store = SessionStore(self.path, flush_interval=0.05)
+        store.start()
+        for event in events:
+            store.handle(event)
+        store.stop()
+        self.assertEqual(store.written, len(events))
+        conn = sqlite3.connect(self.path)
+        self.addCleanup(conn.close)
+        return conn
+
+    def test_round_trip(self):
+        conn = self.record([ItemDelta(90.0, 0, "1001", 1, 2.0),
+                            MapEnter(100.0, 1, "/Game/Art/Maps/A"),
+                            ItemDelta(110.0, 1, "1001", 4, 8.75, 10.0),
+                            ItemDelta(120.0, 1, "100300", -2, 1.0, 1.0),
+                            MapExit(160.0, 1, 60.0, 33.0)])
+        run = conn.execute("SELECT id, map_index, scene, entered, exited, duration, income FROM map_runs").fetchall()
+        self.assertEqual(run, [(1, 1, "/Game/Art/Maps/A", 100.0, 160.0, 60.0, 33.0)])
+        deltas = conn.execute("SELECT run_id, time, item_id, amount, price, raw_price, taxed FROM item_deltas "
+                              "ORDER BY id").fetchall()
+        self.assertEqual(deltas, [(None, 90.0, "1001", 1, 2.0, 2.0, 0),
+                                  (1, 110.0, "1001", 4, 8.75, 10.0, 1),
+                                  (1, 120.0, "100300", -2, 1.0, 1.0, 0)])
+        started, ended = conn.execute("SELECT started, ended FROM sessions").fetchone()
+        self.assertLessEqual(started, ended)
+
+    def test_older_database_gets_the_new_columns(self):
+        conn = sqlite3.connect(self.path)
+        conn.executescript("""
+            CREATE TABLE sessions (id INTEGER PRIMARY KEY, started REAL NOT NULL, ended REAL);
+            CREATE TABLE item_deltas (id INTEGER PRIMARY KEY, session_id INTEGER NOT NULL, run_id INTEGER,
+                                      time REAL NOT NULL, item_id TEXT NOT NULL, amount INTEGER NOT NULL,
+                                      price REAL NOT NULL);
+            INSERT INTO sessions (started) VALUES (1.0);
+            INSERT INTO item_deltas (session_id, time, item_id, amount, price) VALUES (1, 5.0, '1001', 1, 3.0);
+        """)
+        conn.close()
+        connect(self.path).close()
+        conn = self.record([ItemDelta(10.0, 0, "1001", 1, 8.75, 10.0)])
+        self.assertEqual(conn.execute("SELECT price, raw_price, taxed FROM item_deltas ORDER BY id").fetchall(),
+                         [(3.0, None, None), (8.75, 10.0, 1)])
+
+if __name__ == "__main__":
+    unittest.main()
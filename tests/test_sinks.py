@@ -0,0 +1,55 @@
+"""
+Event feeds written by the sinks.
+"""
+
+import csv
+import os
+import tempfile
+import unittest
+from datetime import datetime
+
+import helpers  # puts the repository root on sys.path
+
+from sinks import AsyncSink, CsvSink, event_to_dict
+from tracker import ItemDelta, MapExit
+
+class CsvSinkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def read(self, name):
+        with open(os.path.join(self.folder.name, name), encoding="utf-8", newline="") as f:
+            return list(csv.DictReader(f))
+
+    def test_events_are_filed_under_their_log_day(self):
+        sink = CsvSink(path=os.path.join(self.folder.name, "drops-%Y-%m-%d.csv"))
+        self.addCleanup(sink.close)
+        monday = datetime(2025, 10, 20, 23, 59).timestamp()
+        tuesday = datetime(2025, 10, 21, 0, 1).timestamp()
+        # A catch-up batch that spans midnight, long before today
+        sink.write([event_to_dict(ItemDelta(monday, 1, "1001", 2, 5.0)),
+                    event_to_dict(ItemDelta(tuesday, 1, "1009", 1, 3.0)),
+                    event_to_dict(MapExit(tuesday, 1, 240.0, 13.0))])
+        self.assertEqual([row["item_id"] for row in self.read("drops-2025-10-20.csv")], ["1001"])
+        tuesday_rows = self.read("drops-2025-10-21.csv")
+        self.assertEqual([row["type"] for row in tuesday_rows], ["drop", "map_exit"])
+        self.assertEqual(sorted(os.listdir(self.folder.name)), ["drops-2025-10-20.csv", "drops-2025-10-21.csv"])
+
+    def test_full_file_rolls_over(self):
+        sink = CsvSink(path=os.path.join(self.folder.name, "drops-%Y-%m-%d.csv"), max_bytes=1)
+        self.addCleanup(sink.close)
+        monday = datetime(2025, 10, 20, 12, 0).timestamp()
+        sink.write([event_to_dict(ItemDelta(monday, 1, "1001", 2, 5.0))])
+        sink.write([event_to_dict(ItemDelta(monday, 1, "1009", 1, 3.0))])
+        self.assertEqual(self.read("drops-2025-10-20.1.csv")[0]["item_id"], "1009")
+
+class AsyncSinkTest(unittest.TestCase):
+
+    def test_write_must_be_implemented(self):
+        with self.assertRaises(TypeError):
+            AsyncSink()
+
+if __name__ == "__main__":
+    unittest.main()
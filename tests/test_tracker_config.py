@@ -0,0 +1,46 @@
+"""
+The tracker is set up from config.json the same way the app does it in index.py.
+"""
+
+import unittest
+
+from helpers import MAP_SCENE, TOWN_SCENE, new_catalog
+
+from log_parser import HIDEOUT_SCENE, SceneChange
+from orderbook import OrderbookCache
+from tracker import Tracker
+
+class TrackerConfigTest(unittest.TestCase):
+
+    def test_defaults(self):
+        tracker = Tracker.from_config({}, catalog=new_catalog(), drop_log_path=None)
+        self.assertIsNone(tracker.orderbooks)
+        self.assertFalse(tracker.tax)
+
+    def test_show_sell_now_attaches_orderbook_cache(self):
+        config = {"show_sell_now": True, "orderbook_ttl": 120}
+        tracker = Tracker.from_config(config, catalog=new_catalog(), drop_log_path=None)
+        self.assertIsInstance(tracker.orderbooks, OrderbookCache)
+        self.assertEqual(tracker.orderbooks.ttl, 120)
+
+    def test_tax(self):
+        tracker = Tracker.from_config({"tax": 1}, catalog=new_catalog(), drop_log_path=None)
+        self.assertTrue(tracker.tax)
+
+    def test_hub_scenes(self):
+        run = [SceneChange(HIDEOUT_SCENE, TOWN_SCENE, 1000.0),
+               SceneChange(TOWN_SCENE, MAP_SCENE, 1010.0),
+               SceneChange(MAP_SCENE, TOWN_SCENE, 1100.0)]
+        tracker = Tracker.from_config({"hub_scenes": ["Town000"]}, catalog=new_catalog(), drop_log_path=None)
+        tracker.process(run)
+        self.assertEqual(tracker.map_count, 1)
+        self.assertEqual(tracker.runs[0].duration, 90.0)
+        # Without the setting only the hideout is a hub: the town starts a run that never ends
+        tracker = Tracker.from_config({}, catalog=new_catalog(), drop_log_path=None)
+        tracker.process(run)
+        self.assertEqual(tracker.map_count, 1)
+        self.assertTrue(tracker.is_in_map)
+        self.assertEqual(tracker.runs, [])
+
+if __name__ == "__main__":
+    unittest.main()
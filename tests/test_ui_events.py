@@ -0,0 +1,49 @@
+"""
+The latest-payload-per-topic mailbox between the log thread and the window.
+"""
+
+import threading
+import unittest
+
+import helpers  # puts the repository root on sys.path
+
+from ui_events import UiEventQueue
+
+class UiEventQueueTest(unittest.TestCase):
+
+    def test_latest_payload_per_topic_in_first_posted_order(self):
+        events = UiEventQueue()
+        events.post("state", 1)
+        events.post("initialized", 25)
+        events.post("state", 2)
+        self.assertEqual(len(events), 2)
+        self.assertEqual(list(events.drain().items()), [("state", 2), ("initialized", 25)])
+        self.assertEqual((events.posted, events.coalesced), (3, 1))
+        self.assertEqual(events.drain(), {})
+
+    def test_posts_from_many_threads(self):
+        events = UiEventQueue()
+        drained = []
+
+        def post(topic):
+            for n in range(1000):
+                events.post(topic, n)
+                if n % 100 == 0:
+                    drained.append(events.drain())
+
+        threads = [threading.Thread(target=post, args=(f"topic {i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        drained.append(events.drain())
+        self.assertEqual(events.posted, 4000)
+        # Every topic ends with its last payload, nothing is lost between drains
+        last = {}
+        for pending in drained:
+            last.update(pending)
+        self.assertEqual(last, {f"topic {i}": 999 for i in range(4)})
+        self.assertEqual(events.coalesced + sum(len(pending) for pending in drained), 4000)
+
+if __name__ == "__main__":
+    unittest.main()
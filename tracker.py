@@ -0,0 +1,629 @@
+"""
+Headless tracking core for the Torchlight Infinite profit tracker.
+Everything that turns parsed log events into bag state, drops, consumption and income
+lives here, free of Tk, win32 and network access, so the same pipeline runs behind the
+App window in index.py and in the offline replay in replay.py.
+"""
+
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from accounting import Ledger
+from inventory import Inventory
+from item_catalog import get_catalog
+from map_runs import MapRunMachine, MapRun, ENTER, EXIT, scene_name
+from log_parser import BagModify, BagInit, SceneChange, PlayerLogin, PriceQuery, PriceResult
+from metrics import TickStats
+from orderbook import OrderbookCache
+from price_history import estimate_price, DEFAULT_ESTIMATOR
+
+# Primordial Essence is the trade currency: never taxed, never priced from the exchange
+CURRENCY_ID = "100300"
+TAX_RATE = 0.875
+# Price searches waiting for their response; the oldest are given up beyond this
+MAX_PENDING_PRICE_QUERIES = 64
+# Fewer InitBagData entries than this is not taken for a full bag dump
+MIN_BAG_DUMP = 20
+
+# What the tracker tells its listeners, in the order it happens
+MapEnter = namedtuple("MapEnter", "time map_index scene")
+MapExit = namedtuple("MapExit", "time map_index duration income")
+# price is in the tracker's tax setting, raw_price the same before tax
+ItemDelta = namedtuple("ItemDelta", "time map_index item_id amount price raw_price", defaults=(None,))
+
+def split_at_scene_changes(events):
+    """Split an event batch so every scene change starts a new segment, keeping map boundaries in order"""
+    segment = []
+    for event in events:
+        if isinstance(event, SceneChange) and segment:
+            yield segment
+            segment = []
+        segment.append(event)
+    if segment:
+        yield segment
+
+class Tracker:
+    """Bag state, map state and income counters fed by parsed log events"""
+
+    def __init__(self, catalog=None, tax=False, drop_log_path="drop.txt", stats=None, price_history=None,
+                 hub_scenes=None):
+        self.catalog = catalog if catalog is not None else get_catalog()
+        # Optional PriceHistory; without one only the catalog's current price is known
+        self.price_history = price_history
+        # Optional OrderbookCache that keeps the full listings of every exchange search
+        self.orderbooks = None
+        # Holdings are revalued whenever the catalog learns a new price
+        self.catalog.listeners.append(self.reprice)
+        self.tax = tax
+        self.drop_log_path = drop_log_path
+        self.stats = stats if stats is not None else TickStats()
+
+        # Hooks for the UI / network side, all optional
+        self.on_refresh = None       # called when the drop view should be redrawn
+        self.on_initialized = None   # called with the number of item types after a bag init
+        self.on_price = None         # called with (item_id, price) for every exchange price found
+        self.listeners = []          # called with every MapEnter, MapExit and ItemDelta
+
+        self.exclude_list = []
+        self.pending_items = {}
+        self.price_queries = {}  # SynId -> item id of searches still waiting for a response
+        # Hub / map state from the scene changes; hub_scenes defaults to the hideout
+        self.map_runs = MapRunMachine(hub_scenes)
+        # Event time: the log timestamp of the newest event processed and when it was processed
+        self.log_time = None
+        self._log_time_seen = None
+        self.is_in_map = False
+        self.map_start = self.now()
+        self.reset()
+
+    @classmethod
+    def from_config(cls, config, catalog=None, price_history=None, **kwargs):
+        """Tracker set up from the settings in config.json"""
+        tracker = cls(catalog=catalog, tax=config.get("tax", 0) == 1, price_history=price_history,
+                      hub_scenes=config.get("hub_scenes"), **kwargs)
+        if config.get("show_sell_now", False):
+            # Full exchange listings per item, for "sell now" values in the drop list
+            tracker.orderbooks = OrderbookCache(ttl=config.get("orderbook_ttl", 600), clock=tracker.now)
+        return tracker
+
+    def reset(self):
+        """Clear bag state, initialization status and all statistics (the map state is kept)"""
+        # Track bag state and initialization status
+        self.bag_state = Inventory()
+        self.bag_initialized = False
+        self.first_scan = True
+
+        # Initialize button state
+        self.awaiting_initialization = False
+        self.initialization_complete = False
+        self.initialization_in_progress = False
+
+        # Drops and consumption of the current map and of the session, valued when they happened
+        self.ledger = Ledger(TAX_RATE, untaxed_ids=(CURRENCY_ID,))
+        self.total_time = 0
+        self.map_count = 0
+        self.runs = []  # MapRun of every finished map
+
+    def snapshot(self):
+        """JSON-friendly copy of the bag, initialization status, map state and counters"""
+        return {
+            "bag": self.bag_state.snapshot(),
+            "bag_initialized": self.bag_initialized,
+            "first_scan": self.first_scan,
+            "initialization_complete": self.initialization_complete,
+            "ledger": self.ledger.to_dict(),
+            "total_time": self.total_time,
+            "map_count": self.map_count,
+            "is_in_map": self.is_in_map,
+            # Absolute log times, so a run still open at a restart keeps its real start
+            "map_start": self.map_start,
+            "log_time": self.log_time,
+            "map_runs": self.map_runs.snapshot(),
+            "runs": [list(run) for run in self.runs],
+            "pending_items": dict(self.pending_items),
+            "price_queries": dict(self.price_queries),
+        }
+
+    def restore(self, state):
+        """Continue from a snapshot(); a map in progress keeps the log time it started at"""
+        self.reset()
+        self.bag_state.restore(state["bag"])
+        self.bag_initialized = state["bag_initialized"]
+        self.first_scan = state["first_scan"]
+        self.initialization_complete = state["initialization_complete"]
+        self.ledger.restore(state["ledger"])
+        self.total_time = state["total_time"]
+        self.map_count = state["map_count"]
+        self.is_in_map = state["is_in_map"]
+        self.map_start = state["map_start"]
+        self.log_time = state["log_time"]
+        self._log_time_seen = time.monotonic() if self.log_time is not None else None
+        self.map_runs.restore(state["map_runs"])
+        self.runs = [MapRun(*run) for run in state["runs"]]
+        self.pending_items = dict(state["pending_items"])
+        self.price_queries = dict(state["price_queries"])
+
+        if self.initialization_complete and self.on_initialized:
+            self.on_initialized(len(self.bag_state.totals))
+        self.refresh()
+
+    def refresh(self):
+        if self.on_refresh:
+            with self.stats.stage("ui"):
+                self.on_refresh()
+
+    # Counters of the current map and the session, in the tax setting currently chosen
+    @property
+    def drop_list(self):
+        return self.ledger.map.amounts
+
+    @property
+    def drop_list_all(self):
+        return self.ledger.session.amounts
+
+    @property
+    def drop_value(self):
+        return self.ledger.map.item_values(self.tax)
+
+    @property
+    def drop_value_all(self):
+        return self.ledger.session.item_values(self.tax)
+
+    @property
+    def income(self):
+        return self.ledger.map.income(self.tax)
+
+    @property
+    def income_all(self):
+        return self.ledger.session.income(self.tax)
+
+    @property
+    def market_value(self):
+        """Drops and consumption of the current map at the latest known prices"""
+        return self.ledger.market_value(self.ledger.map, self.tax)
+
+    @property
+    def market_value_all(self):
+        return self.ledger.market_value(self.ledger.session, self.tax)
+
+    def reprice(self, item_id, price):
+        """Catalog listener, revalues what is held of one item"""
+        self.ledger.reprice(str(item_id), price)
+
+    def view_state(self):
+        """Copy of what the drop view shows, safe to hand to another thread"""
+        return {
+            "map_count": self.map_count,
+            "income": self.income,
+            "income_all": self.income_all,
+            "market_value": self.market_value,
+            "market_value_all": self.market_value_all,
+            "drop_list": dict(self.drop_list),
+            "drop_list_all": dict(self.drop_list_all),
+            "drop_value": dict(self.drop_value),
+            "drop_value_all": dict(self.drop_value_all),
+        }
+
+    def emit(self, event):
+        for listener in self.listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in tracker listener: {e}")
+
+    def raw_price(self, item_id, at=None):
+        """Price of an item before tax: the one in effect at time `at` if there is a price
+        history, otherwise the catalog's current price"""
+        price = self.catalog.price(item_id)
+        if at is not None and self.price_history is not None:
+            price = self.price_history.price_at(item_id, at, price)
+        return price
+
+    def item_price(self, item_id, at=None):
+        """Price of an item, after tax if enabled"""
+        price = self.raw_price(item_id, at)
+        if self.tax and item_id != CURRENCY_ID:
+            price = price * TAX_RATE
+        return price
+
+    def process(self, events):
+        """Run one batch of parsed log events through map, bag and price handling"""
+        # Bag changes before a scene change belong to the map state before it, also when
+        # a large batch spans several maps
+        for segment in split_at_scene_changes(events):
+            self.deal_change(segment)
+        with self.stats.stage("prices"):
+            self.get_price_info(events)
+
+    def get_price_info(self, events):
+        try:
+            # Pair each price search request with its response by SynId, also when the
+            # response only shows up in a later chunk
+            queries = self.price_queries
+            for event in events:
+                if isinstance(event, PriceQuery):
+                    queries[event.syn_id] = event.item_id
+                    if len(queries) > MAX_PENDING_PRICE_QUERIES:
+                        ids = queries.pop(next(iter(queries)))
+                        print(f'Record found: ID:{ids}, Price:-1')
+                    continue
+                if not isinstance(event, PriceResult) or event.syn_id not in queries:
+                    continue
+                ids = queries.pop(event.syn_id)
+                if ids == CURRENCY_ID:
+                    continue
+
+                # All +number [value] values of the response (ignore currency), reduced to one
+                # price by the configured estimator and kept in the price history
+                now = event.time or self.now()
+                if self.orderbooks is not None:
+                    self.orderbooks.update(ids, event.values, now)
+                if self.price_history is not None:
+                    average_value = self.price_history.record_listings(ids, event.values, now)
+                else:
+                    average_value = estimate_price(event.values, DEFAULT_ESTIMATOR)
+                if average_value is None:
+                    average_value = -1
+
+                # Update the price in memory, the catalog writes full_table.json behind us
+                self.catalog.update_price(ids, round(average_value, 4), source="FurryHeiLi", timestamp=round(now))
+                print(f'Updating item value: ID:{ids}, Name:{self.catalog.name(ids)}, Price:{round(average_value, 4)}')
+                if self.on_price:
+                    self.on_price(ids, round(average_value, 4))
+        except Exception as e:
+            print(e)
+
+    def initialize_bag_state(self, events):
+        """Initialize the bag state by scanning all current items (legacy method)"""
+        if not self.first_scan:
+            return False  # Only try to initialize on the first scan
+
+        self.first_scan = False
+
+        # Try to find initialization marker
+        if any(isinstance(event, PlayerLogin) for event in events):
+            print("Detected player login or initialization - resetting bag state")
+            self.bag_state.clear()
+            return True
+
+        # All bag item modifications in this chunk
+        matches = [event for event in events if isinstance(event, BagModify)]
+
+        if len(matches) > 10:  # Assume we found a big batch of items - good for initialization
+            print(f"Found {len(matches)} bag items - initializing bag state")
+            for match in matches:
+                page_id, slot_id, config_base_id, num = match[:4]
+                # Update the bag state
+                self.bag_state.set_slot(page_id, slot_id, config_base_id, num)
+
+            self.bag_initialized = True
+            return True
+
+        return False
+
+    def start_initialization(self):
+        """Wait for the next bag refresh (sort) to initialize from. Returns False if already waiting."""
+        if self.initialization_in_progress:
+            return False
+
+        # Set the flag to await initialization
+        self.awaiting_initialization = True
+        self.initialization_in_progress = True
+        return True
+
+    def process_initialization(self, events):
+        """Process the log events for initialization by scanning for BagMgr@:InitBagData entries"""
+        if not self.awaiting_initialization:
+            return False
+
+        # BagMgr@:InitBagData entries (complete inventory data)
+        matches = [event for event in events if isinstance(event, BagInit)]
+
+        # Only proceed if we found a significant number of entries
+        if len(matches) < MIN_BAG_DUMP:
+            return False
+
+        print(f"Found {len(matches)} BagMgr@:InitBagData entries - initializing bag state")
+
+        # Replace the bag with the complete inventory; the totals become the baseline
+        self.bag_state.load(matches)
+        item_count = len(self.bag_state.totals)
+
+        print(f"Successfully initialized {item_count} unique item types across {len(matches)} inventory slots")
+        self.bag_initialized = True
+        self.initialization_complete = True
+        self.awaiting_initialization = False
+        self.initialization_in_progress = False
+
+        if self.on_initialized:
+            self.on_initialized(item_count)
+        return True
+
+    def rebuild(self, events):
+        """Take over the bag and map state from past log events that start with a bag dump,
+        without counting any of it as drops. Returns False if there is no usable dump."""
+        dump = []   # InitBagData entries read since the last other event
+        loaded = False
+        last_scene = None
+        for event in events:
+            if isinstance(event, BagInit):
+                dump.append(event)
+                continue
+            if dump:
+                loaded = self._apply_dump(dump, loaded)
+                dump = []
+            if not loaded:
+                return False
+            if isinstance(event, BagModify):
+                self.bag_state.set_slot(*event[:4])
+            elif isinstance(event, SceneChange):
+                last_scene = event
+        if dump:
+            loaded = self._apply_dump(dump, loaded)
+        if not loaded:
+            return False
+
+        # Changes from now on are measured against the bag as it is at the end of the log
+        self.bag_state.reset_baseline()
+        self.bag_initialized = True
+        self.initialization_complete = True
+        self.first_scan = False
+        self.awaiting_initialization = False
+        self.initialization_in_progress = False
+        if last_scene is not None and self.map_runs.assume(last_scene):
+            # The log ends inside a map, open a run for the rest of it so listeners see it start
+            self.enter_map(last_scene)
+
+        item_count = len(self.bag_state.totals)
+        print(f"Rebuilt {item_count} unique item types across {len(self.bag_state)} inventory slots from the log")
+        if self.on_initialized:
+            self.on_initialized(item_count)
+        self.refresh()
+        return True
+
+    def _apply_dump(self, dump, loaded):
+        """A full dump replaces the bag, slots it leaves out are empty now; a few entries
+        after the bag is loaded only refresh those slots. Returns whether the bag is loaded."""
+        if len(dump) >= MIN_BAG_DUMP:
+            self.bag_state.load(dump)
+            return True
+        if loaded:
+            for entry in dump:
+                self.bag_state.set_slot(*entry[:4])
+        return loaded
+
+    def detect_bag_changes(self, events):
+        """Detect changes to the bag and calculate both gains and losses, as (item_id, net change, time)
+        with the log time of the last modification of that item"""
+        # If bag isn't initialized yet, we can't detect changes properly
+        if not self.bag_initialized:
+            return []
+
+        # Bag item modifications
+        matches = [event for event in events if isinstance(event, BagModify)]
+
+        if not matches:
+            return []
+
+        changes = []
+        changed_items = {}  # item_id -> log time of its last modification
+
+        # Apply every slot modification, the inventory keeps per-item totals up to date
+        for match in matches:
+            page_id, slot_id, config_base_id, count = match[:4]
+            for item_id, delta in self.bag_state.set_slot(page_id, slot_id, config_base_id, count):
+                changed_items[item_id] = match.time
+
+        # Now compare with the baseline values to see net changes
+        for item_id, changed_at in changed_items.items():
+            net_change = self.bag_state.net_change(item_id)
+
+            if net_change != 0:
+                changes.append((item_id, net_change, changed_at))
+
+                # Update the baseline to current total for this item
+                # This ensures subsequent changes are measured from the new baseline
+                self.bag_state.commit(item_id)
+
+        return changes
+
+    def scan_for_bag_changes(self, events):
+        """Enhanced bag change scanner that handles initialization"""
+        # Check if we're in initialization mode and process accordingly
+        if self.awaiting_initialization:
+            if self.process_initialization(events):
+                return []  # Skip drop detection during initialization
+
+        # If bag is properly initialized, use the new tracking method
+        if self.bag_initialized and self.initialization_complete:
+            return self.detect_bag_changes(events)
+
+        # If bag isn't initialized yet, use the old method
+        if not self.bag_initialized:
+            # Use the original initialization method as fallback
+            if self.initialize_bag_state(events):
+                return []
+
+        # Legacy method for tracking changes if not properly initialized
+        matches = [event for event in events if isinstance(event, BagModify)]
+
+        if not matches:
+            return []
+
+        drops = []
+
+        # Net change of every item touched by this update, even across stacks
+        item_changes = {}
+        changed_at = {}
+        for match in matches:
+            page_id, slot_id, config_base_id, num = match[:4]
+            for item_id, delta in self.bag_state.set_slot(page_id, slot_id, config_base_id, num):
+                item_changes[item_id] = item_changes.get(item_id, 0) + delta
+                changed_at[item_id] = match.time
+
+        for item_id, change in item_changes.items():
+            if change > 0:
+                # We got more of this item
+                drops.append((item_id, change, changed_at[item_id]))
+
+        return drops
+
+    def process_drops(self, drops):
+        """Process detected drops and consumption given as (item_id, amount, log time), update statistics"""
+        # First, consolidate multiple changes to the same item in this batch
+        consolidated_changes = {}
+        changed_at = {}
+        for item_id, amount, event_time in drops:
+            item_id = str(item_id)
+            if item_id not in consolidated_changes:
+                consolidated_changes[item_id] = 0
+            consolidated_changes[item_id] += amount
+            if event_time is not None:
+                changed_at[item_id] = event_time
+
+        # Now process the consolidated changes
+        # Each change happens at the log time of the last modification of its item
+        fallback = self.log_time if self.log_time is not None else self.now()
+        log_lines = []
+        for item_id, amount in consolidated_changes.items():
+            now = changed_at.get(item_id, fallback)
+            # Check if we have a name for this item
+            if item_id in self.catalog:
+                item_name = self.catalog.name(item_id)
+            else:
+                # No item name found, use ID as name and add to pending queue
+                item_name = f"Unknown item (ID: {item_id})"
+                if item_id not in self.pending_items:
+                    print(f"[NETWORK] ID {item_id} doesn't exist locally, fetching")
+                    self.pending_items[item_id] = amount
+                else:
+                    self.pending_items[item_id] += amount
+                    print(f"[NETWORK] ID {item_id} already in queue, accumulated: {self.pending_items[item_id]}")
+                continue
+
+            # Check exclusion list
+            if self.exclude_list and item_name in self.exclude_list:
+                print(f"Excluded: {item_name} x{amount}")
+                continue
+
+            # Book it at the price in effect now, later price changes do not revalue it.
+            # Amount can be positive (gain) or negative (consumption)
+            raw_price = self.raw_price(item_id, now)
+            self.ledger.book(item_id, amount, raw_price, self.catalog.category(item_id))
+            price = raw_price * TAX_RATE if self.tax and item_id != CURRENCY_ID else raw_price
+
+            # If this is consumption (negative amount), immediately update the UI
+            if amount < 0:
+                self.refresh()
+
+            self.emit(ItemDelta(now, self.map_count, item_id, amount, price, raw_price))
+
+            # Collect lines for drop.txt, written once for the whole batch
+            if self.drop_log_path:
+                timestamp = datetime.fromtimestamp(now).strftime("%Y-%m-%d %H:%M:%S")
+                if amount > 0:
+                    log_lines.append(f"[{timestamp}] Drop: {item_name} x{amount} ({round(price, 3)}/each)\n")
+                else:
+                    log_lines.append(f"[{timestamp}] Consumed: {item_name} x{abs(amount)} ({round(price, 3)}/each)\n")
+
+            if amount > 0:
+                print(f"Processed drop: {item_name} x{amount} ({round(price, 3)}/each)")
+            else:
+                print(f"Processed consumption: {item_name} x{abs(amount)} ({round(price, 3)}/each)")
+
+        if log_lines:
+            try:
+                with open(self.drop_log_path, "a", encoding="utf-8") as f:
+                    f.writelines(log_lines)
+            except Exception as e:
+                print(f"Error writing {self.drop_log_path}: {e}")
+
+    def reset_map_baseline(self):
+        """Reset the baseline for map tracking to current inventory state"""
+        # Snapshot the running per-item totals as the new baseline
+        self.bag_state.reset_baseline()
+
+        print(f"Reset map baseline for {len(self.bag_state.baselines)} items")
+
+    def now(self):
+        """Current event time: the log time of the newest event, moved on by the wall time since
+        it was processed. A backlog read in a second still spans the hours it covers in the log,
+        and while the log is quiet the clock keeps running."""
+        if self.log_time is None:
+            return time.time()
+        return self.log_time + max(time.monotonic() - self._log_time_seen, 0)
+
+    def advance_clock(self, events):
+        """Move the event clock to the newest timestamp in a batch of events"""
+        for event in reversed(events):
+            event_time = getattr(event, "time", None)
+            if event_time is not None:
+                if self.log_time is None or event_time > self.log_time:
+                    self.log_time = event_time
+                self._log_time_seen = time.monotonic()
+                return
+
+    def deal_change(self, events):
+        self.advance_clock(events)
+        # Enter and leave maps one scene change at a time, in log order
+        for event in events:
+            if isinstance(event, SceneChange):
+                transition = self.map_runs.feed(event)
+                if transition == ENTER:
+                    self.enter_map(event)
+                elif transition == EXIT:
+                    self.exit_map(event)
+
+        # Scan for bag changes to keep internal state up to date at all times
+        # Note: We only process and count changes while inside a map.
+        with self.stats.stage("bag_diff"):
+            drops = self.scan_for_bag_changes(events)
+        if self.is_in_map and drops:
+            with self.stats.stage("drops"):
+                self.process_drops(drops)
+            self.refresh()
+
+    def enter_map(self, event):
+        """A map run starts at the log time of the scene change"""
+        start = event.time or self.now()
+        self.is_in_map = True
+        self.ledger.start_map()  # Start fresh for this map, costs will be tracked automatically
+        self.map_count += 1
+        self.map_start = start
+
+        # Reset baseline when entering a map - snapshot current state as starting point
+        # This needs to happen BEFORE processing any bag changes from this log batch
+        self.reset_map_baseline()
+        self.emit(MapEnter(start, self.map_count, event.next_scene))
+        # Refresh UI so raw income per map shows 0 at the start of a new map
+        self.refresh()
+
+    def exit_map(self, event):
+        """A map run ends at the log time of the scene change back to a hub"""
+        end = event.time or self.now()
+        self.is_in_map = False
+        duration = max(end - self.map_start, 0)
+        self.total_time += duration
+        account = self.ledger.map
+        gains, consumption = (account.gains_taxed, account.consumption_taxed) if self.tax else (account.gains, account.consumption)
+        self.runs.append(MapRun(self.map_count, self.map_runs.scene, scene_name(self.map_runs.scene),
+                                self.map_start, end, duration, gains, consumption, self.income))
+        self.emit(MapExit(end, self.map_count, duration, self.income))
+        # Refresh UI when leaving a map
+        self.refresh()
+
+    def tick(self, now=None):
+        """Keep the map clock anchored while out of map"""
+        if not self.is_in_map:
+            self.map_start = now if now is not None else self.now()
+
+    def current_map_time(self, now=None):
+        """Seconds spent in the current map"""
+        if not self.is_in_map:
+            return 0
+        return (now if now is not None else self.now()) - self.map_start
+
+    def total_map_time(self, now=None):
+        """Seconds spent in maps, including the current one"""
+        return self.total_time + self.current_map_time(now)
@@ -0,0 +1,36 @@
+"""
+Thread-safe hand-off from the tracking core to the Tk window.
+The log thread never touches Tk; it posts state changes here and the window drains them
+from its own thread with after(), a bounded number of times per second. Only the latest
+payload per topic is kept, so the several refreshes a bag sort causes within one frame
+cost a single redraw.
+"""
+
+import threading
+
+class UiEventQueue:
+    """Latest-payload-per-topic mailbox between worker threads and the UI thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.posted = 0
+        self.coalesced = 0
+
+    def post(self, topic, payload=None):
+        with self._lock:
+            if topic in self._pending:
+                self.coalesced += 1
+            self._pending[topic] = payload
+            self.posted += 1
+
+    def drain(self):
+        """Everything posted since the last drain, as {topic: latest payload} in first-posted order"""
+        with self._lock:
+            pending = self._pending
+            self._pending = {}
+        return pending
+
+    def __len__(self):
+        with self._lock:
+            return len(self._pending)